@@ -1,10 +1,21 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Response
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-from typing import List, Optional, Dict, Any
-from src.agents.graph import app as agent_app
-from langchain_core.messages import HumanMessage, AIMessage
+from typing import List, Optional, Dict, Any, Tuple
+from src.agents.graph import app as agent_app, turn_input
+from src.agents.checkpointing import thread_config
+from src.vector_db.config import config as vector_config
+from src.vector_db.model_registry import model_registry, warmup_configured_models
+from src.vector_db.batching import batcher_stats
+from langchain_core.messages import BaseMessage, HumanMessage, AIMessage
+from sse_starlette.sse import EventSourceResponse
+from src.agents.streaming import astream_turn, chat_result
+from src.agents.session_store import create_session_store
+from src.agents.response_cache import create_response_cache
+from src.agents.speculation import speculation_stats
+from src.agents.telemetry import render_metrics, trace_turn
 import asyncio
+import time
 import uuid
 import json
 import re
@@ -23,8 +34,47 @@ api.add_middleware(
     allow_headers=["*"],
 )
 
-# In-memory storage for conversation sessions
-conversation_sessions = {}
+@api.on_event("startup")
+async def warmup_models():
+    """Optionally load all models before the first request is served"""
+    if vector_config.WARMUP_MODELS:
+        await asyncio.to_thread(warmup_configured_models)
+
+# Bounded conversation session storage (in-memory or SQLite, see SESSION_BACKEND).
+# Each session is also a checkpointed graph thread, released when the session ends
+session_store = create_session_store(on_remove=agent_app.checkpointer.delete_thread)
+
+# Complete turn results for repeated questions (None when RESPONSE_CACHE=false)
+response_cache = create_response_cache()
+
+async def session_turn_input(session_id: str, message: str) -> Tuple[dict, List[BaseMessage]]:
+    """
+    Graph input for a turn and the conversation before it. The input is only
+    the new message when the session's thread has state. A thread without
+    state (e.g. after a restart with the in-memory checkpointer) is seeded
+    from the stored session history.
+    """
+    inputs = turn_input(message)
+    snapshot = await agent_app.aget_state(thread_config(session_id))
+    if snapshot.values:
+        history = snapshot.values.get("messages", [])
+    else:
+        history = session_store.get(session_id) or []
+        inputs["messages"] = history + inputs["messages"]
+    return inputs, history
+
+async def record_cached_turn(session_id: str, inputs: dict, cached: Dict[str, Any]) -> None:
+    """Write a turn answered from the response cache to the session's thread and history."""
+    thread = thread_config(session_id)
+    await agent_app.aupdate_state(thread, {
+        **inputs,
+        "messages": inputs["messages"] + [AIMessage(content=cached["response"])],
+        "route": cached["route"],
+        "filtered_results": cached["products"],
+        "cited_products": list(range(len(cached["products"] or []))),
+    }, as_node="update_memory")
+    snapshot = await agent_app.aget_state(thread)
+    session_store.set(session_id, snapshot.values.get("messages", []))
 
 class ChatRequest(BaseModel):
     message: str
@@ -47,6 +97,34 @@ async def health_check():
         message="E-commerce Personal Shopper Agent API is running"
     )
 
+@api.get("/models")
+async def list_models():
+    """List the models currently loaded in this process, their memory use and inference batching"""
+    models = model_registry.resident()
+    return {
+        "models": models,
+        "total_memory_bytes": sum(model["memory_bytes"] for model in models),
+        "batching": batcher_stats(),
+    }
+
+@api.get("/cache")
+async def response_cache_stats():
+    """Hit rate and saved graph time of the semantic response cache"""
+    return {"enabled": response_cache is not None, **(response_cache.stats() if response_cache else {})}
+
+@api.get("/speculation")
+async def speculation_metrics():
+    """Latency saved and work wasted by speculative retrieval (SPECULATIVE_RETRIEVAL)"""
+    return speculation_stats.stats()
+
+@api.get("/metrics")
+async def prometheus_metrics():
+    """Prometheus metrics: turn, node, retrieval stage and LLM latency histograms, tokens, routes, cache lookups"""
+    body = render_metrics()
+    if body is None:
+        raise HTTPException(status_code=404, detail="Metrics are disabled (set METRICS_ENABLED=true)")
+    return Response(content=body, media_type="text/plain; version=0.0.4; charset=utf-8")
+
 @api.post("/chat", response_model=ChatResponse)
 async def chat(req: ChatRequest):
     """Endpoint for chatting with the e-commerce agent"""
@@ -56,70 +134,80 @@ async def chat(req: ChatRequest):
         else:
             session_id = str(uuid.uuid4())
         
-        if session_id not in conversation_sessions:
-            conversation_sessions[session_id] = []
-        
-        conversation_history = conversation_sessions[session_id]
-        conversation_history.append(HumanMessage(content=req.message))
+        inputs, history = await session_turn_input(session_id, req.message)
         
-        inputs = {"messages": conversation_history}
+        cached = await response_cache.alookup(req.message, history) if response_cache else None
+        if cached:
+            await record_cached_turn(session_id, inputs, cached)
+            return ChatResponse(response=cached["response"], session_id=session_id, products=cached["products"])
         
-        response = agent_app.invoke(inputs)
+        # Async graph execution: LLM, Qdrant and model calls never block the event loop
+        start = time.perf_counter()
+        with trace_turn(session_id) as trace:
+            response = await agent_app.ainvoke(inputs, config=trace.config(thread_config(session_id)))
+        elapsed = time.perf_counter() - start
         
-        updated_history = response.get("messages", [])
-        conversation_sessions[session_id] = updated_history
+        session_store.set(session_id, response.get("messages", []))
         
-        ai_response = "Sorry, I couldn't process that request."
-        if updated_history and isinstance(updated_history[-1], AIMessage):
-            ai_response = updated_history[-1].content
-        elif "search_results" in response:
-            # Fallback for workflows that don't add an AIMessage
-            ai_response = str(response.get("search_results", ai_response))
+        ai_response, route, products_to_return = chat_result(response)
         
-        route = response.get("route", "")
-        
-        products_to_return = None
-        if route != "faq":
-            filtered_products = response.get("filtered_results", [])
-            
-            mentioned_products = extract_mentioned_products(ai_response, filtered_products)
-            products_to_return = mentioned_products
+        if response_cache:
+            await response_cache.astore(req.message, history,
+                                        {"response": ai_response, "route": route, "products": products_to_return},
+                                        elapsed)
         
         return ChatResponse(response=ai_response, session_id=session_id, products=products_to_return)
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing request: {str(e)}")
 
-def extract_mentioned_products(response_text: str, filtered_products: List[Dict]) -> List[Dict]:
+@api.post("/chat/stream")
+async def chat_stream(req: ChatRequest):
     """
-    Extract products that are actually mentioned in the AI response.
-    This is a simple implementation that looks for product titles in the response.
+    Streaming variant of /chat (Server-Sent Events). Emits node_start/node_end
+    progress events, token events with the generator's output as it is
+    produced, and a final done event with the response, products and timings.
     """
-    if not filtered_products:
-        return []
-    
-    mentioned_products = []
+    session_id = req.session_id or str(uuid.uuid4())
     
-    for product in filtered_products:
-        meta = product.get('metadata', {})
-        title = meta.get('title', '').lower()
-        
-        if title and title in response_text.lower():
-            mentioned_products.append(product)
-    
-
-    if not mentioned_products and filtered_products:
-        return filtered_products
+    async def event_stream():
+        yield {"event": "session", "data": json.dumps({"session_id": session_id})}
+        try:
+            inputs, history = await session_turn_input(session_id, req.message)
+            
+            start = time.perf_counter()
+            cached = await response_cache.alookup(req.message, history) if response_cache else None
+            if cached:
+                await record_cached_turn(session_id, inputs, cached)
+                total_ms = (time.perf_counter() - start) * 1000
+                yield {"event": "token", "data": json.dumps({"text": cached["response"]}, ensure_ascii=False)}
+                done = {**cached, "timings": {"first_token_ms": total_ms, "total_ms": total_ms},
+                        "cached": True, "session_id": session_id}
+                yield {"event": "done", "data": json.dumps(done, ensure_ascii=False)}
+                return
+            
+            with trace_turn(session_id) as trace:
+                async for event in astream_turn(agent_app, inputs, config=trace.config(thread_config(session_id))):
+                    if event["event"] == "done":
+                        session_store.set(session_id, event["state"].get("messages", []))
+                        if response_cache:
+                            result = {key: event["data"][key] for key in ("response", "route", "products")}
+                            await response_cache.astore(req.message, history, result,
+                                                        event["data"]["timings"]["total_ms"] / 1000)
+                        event["data"]["session_id"] = session_id
+                    yield {"event": event["event"], "data": json.dumps(event["data"], ensure_ascii=False)}
+        except Exception as e:
+            yield {"event": "error", "data": json.dumps({"detail": f"Error processing request: {str(e)}"})}
     
-    return mentioned_products
+    return EventSourceResponse(event_stream())
 
 @api.get("/sessions/{session_id}")
 async def get_session_history(session_id: str):
     """Get the conversation history for a specific session"""
-    if session_id not in conversation_sessions:
+    history = session_store.get(session_id)
+    if history is None:
         raise HTTPException(status_code=404, detail="Session not found")
     
-    history = conversation_sessions[session_id]
     formatted_history = []
     
     for msg in history:
@@ -133,13 +221,13 @@ async def get_session_history(session_id: str):
 @api.delete("/sessions/{session_id}")
 async def clear_session(session_id: str):
     """Clear the conversation history for a specific session"""
-    if session_id in conversation_sessions:
-        del conversation_sessions[session_id]
+    if session_store.delete(session_id):
         return {"message": f"Session {session_id} cleared"}
     else:
         raise HTTPException(status_code=404, detail="Session not found")
 
 @api.get("/sessions")
-async def list_sessions():
-    """List all active session IDs"""
-    return {"sessions": list(conversation_sessions.keys())}
\ No newline at end of file
+async def list_sessions(offset: int = Query(0, ge=0), limit: int = Query(50, ge=1, le=500)):
+    """List active session IDs, most recently used first, one page at a time"""
+    sessions, total = session_store.list(offset=offset, limit=limit)
+    return {"sessions": sessions, "total": total, "offset": offset, "limit": limit}
\ No newline at end of file
@@ -1,139 +1,173 @@
 # db/setup_database.py
 
+import argparse
+import logging
 import sqlite3
+import time
+
 import pandas as pd
-import logging
-import os
-import re
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 logger = logging.getLogger(__name__)
 
+# CSV column -> products column, in insert order
+COLUMNS = [
+    ("Category", "category"),
+    ("Sub Category", "sub_category"),
+    ("Product Name", "title"),
+    ("Sale Price", "sale_price"),
+    ("Original Price", "original_price"),
+    ("Currency", "currency"),
+    ("Available Sizes", "available_sizes"),
+    ("Product URL", "product_url"),
+    ("Image URL", "image_url"),
+    ("Product Details JSON", "product_details_json"),
+    ("Product Name Masri", "title_masri"),
+]
+CSV_COLUMNS = [csv_column for csv_column, _ in COLUMNS]
+DB_COLUMNS = [db_column for _, db_column in COLUMNS]
+PRICE_COLUMNS = ["Sale Price", "Original Price"]
+# Price strings that mean "no price" rather than a malformed one
+EMPTY_PRICES = ["", "none", "null", "n/a"]
+
+# Bulk-load settings: WAL with synchronous=NORMAL only syncs at checkpoints,
+# and a larger page cache keeps the product_url index in memory
+PRAGMAS = [
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-65536",
+]
+
+
 class DatabaseSetup:
-    def __init__(self, 
-                 db_path="db/ecommerce_products.db", 
-                 csv_path="data/raw/sutra_products_cleaned.csv", 
-                 schema_path="db/schema.sql"):
+    """
+    Loads the product CSV into SQLite incrementally.
+
+    The CSV is read in chunks of ``chunk_size`` rows so memory stays bounded,
+    prices are cleaned per column, and each chunk is upserted on product_url
+    with one ``executemany`` inside a single transaction. Existing products
+    keep their ids, unchanged rows are not rewritten, and with ``prune``
+    products no longer in the CSV are deleted.
+    """
+
+    def __init__(self,
+                 db_path="db/ecommerce_products.db",
+                 csv_path="data/raw/sutra_products_cleaned.csv",
+                 schema_path="db/schema.sql",
+                 chunk_size=50_000,
+                 prune=False):
         self.db_path = db_path
         self.csv_path = csv_path
         self.schema_path = schema_path
+        self.chunk_size = chunk_size
+        self.prune = prune
 
     def initialize_schema(self):
-        """Creates a fresh database and executes the schema."""
-        if os.path.exists(self.db_path):
-            os.remove(self.db_path)
+        """Opens the database with the bulk-load pragmas and creates missing tables."""
         conn = sqlite3.connect(self.db_path)
+        for pragma in PRAGMAS:
+            conn.execute(pragma)
         with open(self.schema_path, 'r', encoding='utf-8') as f:
             conn.executescript(f.read())
         conn.commit()
-        logger.info("Database schema created successfully.")
+        logger.info("Database schema ready.")
         return conn
 
-    def convert_price_string(self, price_str):
-        """Convert price string to float, handling various formats."""
-        if not isinstance(price_str, str):
-            return price_str
-        
-        # Handle "From" prices by extracting the numeric part
-        if price_str.startswith('From '):
-            price_str = price_str[5:]  # Remove "From " prefix
-            
-        # Remove currency symbols and commas
-        price_str = price_str.replace('LE', '').replace('₹', '').replace(',', '').strip()
-        
-        # Handle empty or invalid strings
-        if not price_str or price_str.lower() in ['none', 'null', 'n/a']:
-            return None
-            
-        try:
-            return float(price_str)
-        except ValueError:
-            logger.warning(f"Could not convert price string '{price_str}' to float")
-            return None
+    def convert_price_column(self, prices: pd.Series) -> pd.Series:
+        """Convert price strings ("LE1,299.00", "From LE199") to floats; None when missing or invalid."""
+        text = prices.astype("string").str.strip().str.removeprefix("From ")
+        text = text.str.replace(r"LE|₹|,", "", regex=True).str.strip()
+        numbers = pd.to_numeric(text, errors="coerce")
+
+        invalid = numbers.isna() & text.notna() & ~text.str.lower().isin(EMPTY_PRICES).fillna(False)
+        if invalid.any():
+            logger.warning(f"Could not convert {int(invalid.sum())} price strings to float "
+                           f"(e.g. '{text[invalid].iloc[0]}')")
+        return numbers
+
+    def prepare_chunk(self, chunk: pd.DataFrame, seen_urls: set) -> list:
+        """Rows of a CSV chunk as insert tuples: cleaned, and without rows lacking a
+        URL or title or repeating an earlier row's URL."""
+        chunk = chunk.reindex(columns=CSV_COLUMNS)
+        urls = chunk["Product URL"].str.strip()
+        chunk = chunk.assign(**{"Product URL": urls})
+        chunk = chunk[urls.notna() & (urls != "") & chunk["Product Name"].notna()]
+        chunk = chunk.drop_duplicates(subset="Product URL", keep="first")
+        chunk = chunk[~chunk["Product URL"].isin(seen_urls)]
+        seen_urls.update(chunk["Product URL"])
+
+        for column in PRICE_COLUMNS:
+            chunk[column] = self.convert_price_column(chunk[column])
+        chunk = chunk.astype(object).where(chunk.notna(), None)
+        return list(chunk.itertuples(index=False, name=None))
 
     def load_and_insert_data(self, conn):
-        """Loads data from the cleaned CSV and inserts it."""
-        logger.info(f"Loading CSV data from {self.csv_path}")
-        df = pd.read_csv(self.csv_path)
-        logger.info(f"Loaded {len(df)} rows. Starting insertion...")
-        
-        insert_sql = """
-        INSERT INTO products (
-            category, sub_category, title, sale_price, original_price, currency,
-            available_sizes, product_url, image_url, product_details_json, title_masri
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """Upserts the CSV rows chunk by chunk in one transaction and reports throughput."""
+        logger.info(f"Loading CSV data from {self.csv_path} in chunks of {self.chunk_size} rows")
+        updates = ", ".join(f"{column} = excluded.{column}" for column in DB_COLUMNS if column != "product_url")
+        changed = " OR ".join(f"products.{column} IS NOT excluded.{column}"
+                              for column in DB_COLUMNS if column != "product_url")
+        upsert_sql = f"""
+        INSERT INTO products ({", ".join(DB_COLUMNS)})
+        VALUES ({", ".join("?" for _ in DB_COLUMNS)})
+        ON CONFLICT(product_url) DO UPDATE SET {updates}
+        WHERE {changed}
         """
-        
-        cursor = conn.cursor()
-        inserted_count = 0
-        product_urls_seen = set()
-        
-        for _, row in df.iterrows():
-            try:
-                # Skip rows without product URL
-                if not row.get("Product URL"):
-                    continue
-                    
-                # Skip duplicate product URLs
-                product_url = row.get("Product URL")
-                if product_url in product_urls_seen:
-                    continue
-                product_urls_seen.add(product_url)
-                
-                # Direct mapping from the new, clean CSV columns
-                data = (
-                    row.get("Category"),
-                    row.get("Sub Category"),
-                    row.get("Product Name"),
-                    row.get("Sale Price"),    # Fixed column name
-                    row.get("Original Price"), # Fixed column name
-                    row.get("Currency"),
-                    row.get("Available Sizes"),
-                    product_url,
-                    row.get("Image URL"),
-                    row.get("Product Details JSON"),
-                    row.get("Product Name Masri")
-                )
-                
-                # Convert price strings to float values
-                sale_price = data[3]
-                original_price = data[4]
-                
-                # Handle price conversion with improved logic
-                sale_price = self.convert_price_string(sale_price)
-                original_price = self.convert_price_string(original_price)
-                
-                # Update the data tuple with converted prices
-                data = (
-                    data[0],  # Category
-                    data[1],  # Sub Category
-                    data[2],  # Product Name
-                    sale_price,    # Converted Sale Price
-                    original_price, # Converted Original Price
-                    data[5],  # Currency
-                    data[6],  # Available Sizes
-                    data[7],  # Product URL
-                    data[8],  # Image URL
-                    data[9],  # Product Details JSON
-                    data[10]  # Product Name Masri
-                )
-                
-                cursor.execute(insert_sql, data)
-                inserted_count += 1
-            except Exception as e:
-                logger.warning(f"Skipping row due to error: {e}")
-        
-        conn.commit()
-        logger.info(f"Data insertion completed. Inserted: {inserted_count} rows.")
+
+        start = time.perf_counter()
+        rows_read, rows_written, removed = 0, 0, 0
+        seen_urls: set = set()
+        products_before = conn.execute("SELECT COUNT(*) FROM products").fetchone()[0]
+        changes_before = conn.total_changes
+
+        # One transaction for the whole load: committed at the end, rolled back on error
+        with conn:
+            for number, chunk in enumerate(pd.read_csv(self.csv_path, dtype=str, chunksize=self.chunk_size), start=1):
+                rows = self.prepare_chunk(chunk, seen_urls)
+                conn.executemany(upsert_sql, rows)
+                rows_read += len(chunk)
+                rows_written += len(rows)
+                logger.info(f"Chunk {number}: {len(chunk)} rows read, {len(rows)} upserted")
+            # Rows inserted or actually modified by the upserts
+            changes = conn.total_changes - changes_before
+
+            if self.prune:
+                conn.execute("CREATE TEMP TABLE loaded_urls (product_url TEXT PRIMARY KEY)")
+                conn.executemany("INSERT INTO loaded_urls VALUES (?)", ((url,) for url in seen_urls))
+                removed = conn.execute(
+                    "DELETE FROM products WHERE product_url NOT IN (SELECT product_url FROM loaded_urls)"
+                ).rowcount
+                conn.execute("DROP TABLE loaded_urls")
+
+        elapsed = time.perf_counter() - start
+        products_after = conn.execute("SELECT COUNT(*) FROM products").fetchone()[0]
+        inserted = products_after - products_before + removed
+        updated = changes - inserted
+        logger.info(
+            f"Data load completed in {elapsed:.2f}s ({rows_read / elapsed if elapsed else 0:.0f} rows/s): "
+            f"{rows_read} rows read, {rows_written} products upserted "
+            f"({inserted} new, {updated} updated, {rows_written - inserted - updated} unchanged), "
+            f"{removed} removed, {rows_read - rows_written} rows skipped."
+        )
 
     def run(self):
         """Runs the entire database setup and data ingestion process."""
         connection = self.initialize_schema()
-        self.load_and_insert_data(connection)
-        connection.close()
+        try:
+            self.load_and_insert_data(connection)
+        finally:
+            connection.close()
 
 if __name__ == '__main__':
-    # Make sure your cleaned CSV file is named 'sutra_products_cleaned.csv'
-    # Or change the name in the line below
-    setup = DatabaseSetup(csv_path="data/raw/sutra_products_cleaned.csv")
-    setup.run()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Load (or incrementally update) the products database from a CSV")
+    parser.add_argument("--csv", default="data/raw/sutra_products_cleaned.csv", help="product CSV to load")
+    parser.add_argument("--db", default="db/ecommerce_products.db", help="SQLite database path")
+    parser.add_argument("--schema", default="db/schema.sql", help="schema file")
+    parser.add_argument("--chunk-size", type=int, default=50_000, help="CSV rows read and upserted at a time")
+    parser.add_argument("--prune", action="store_true", help="delete products that are no longer in the CSV")
+    args = parser.parse_args()
+
+    setup = DatabaseSetup(db_path=args.db, csv_path=args.csv, schema_path=args.schema,
+                          chunk_size=args.chunk_size, prune=args.prune)
+    setup.run()
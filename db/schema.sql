@@ -1,8 +1,7 @@
 -- db/schema.sql
+-- Idempotent: init_db.py runs it on every load and upserts products on product_url
 
-DROP TABLE IF EXISTS products;
-
-CREATE TABLE products (
+CREATE TABLE IF NOT EXISTS products (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     category TEXT,
     sub_category TEXT,
@@ -15,4 +14,4 @@ CREATE TABLE products (
     image_url TEXT,
     product_details_json TEXT,
     title_masri TEXT
-);
\ No newline at end of file
+);
@@ -9,5 +9,6 @@ including vector database operations, agent workflows, and utility functions.
 Subpackages:
 - vector_db: Vector database operations with Qdrant
 - agents: LangGraph agents for complex workflows
+- benchmarks: Offline benchmarks for retrieval quality and latency
 - utils: General utility functions
 """
\ No newline at end of file
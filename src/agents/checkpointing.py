@@ -0,0 +1,114 @@
+"""
+Graph Checkpointers
+
+Each API session is a LangGraph thread (thread_id == session_id). The graph
+state of the thread is kept by a checkpointer, so a turn only submits the new
+user message instead of the whole conversation.
+
+LangGraph writes a checkpoint after every node, and the stock savers keep all
+of them, so storage would still grow with every turn. Both savers here keep
+only the newest checkpoint of each thread. Together with the capped
+``messages`` reducer in ``AgentState``, this keeps per-thread storage and
+per-turn cost flat:
+
+- ``LatestCheckpointMemorySaver``: in-process (CHECKPOINTER=memory)
+- ``LatestCheckpointSqliteSaver``: SQLite file shared by the workers on a
+  host (CHECKPOINTER=sqlite), with async methods that run the sync
+  implementation in a worker thread so ``ainvoke`` / ``astream_events`` work
+"""
+
+import asyncio
+import sqlite3
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Optional, Sequence, Tuple
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import ChannelVersions, Checkpoint, CheckpointMetadata, CheckpointTuple
+from langgraph.checkpoint.memory import InMemorySaver
+
+from src.agents import config
+
+
+def thread_config(session_id: str) -> RunnableConfig:
+    """Run config that binds a graph invocation to the session's thread."""
+    return {"configurable": {"thread_id": session_id}}
+
+
+class LatestCheckpointMemorySaver(InMemorySaver):
+    """InMemorySaver that drops a thread's older checkpoints, writes and blobs."""
+
+    def put(self, config: RunnableConfig, checkpoint: Checkpoint, metadata: CheckpointMetadata,
+            new_versions: ChannelVersions) -> RunnableConfig:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        previous = dict(self.storage[thread_id][checkpoint_ns])
+
+        saved = super().put(config, checkpoint, metadata, new_versions)
+
+        versions = checkpoint["channel_versions"]
+        for checkpoint_id, (serialized, _, _) in previous.items():
+            if checkpoint_id == checkpoint["id"]:
+                continue
+            old_versions = self.serde.loads_typed(serialized)["channel_versions"]
+            for channel, version in old_versions.items():
+                if versions.get(channel) != version:
+                    self.blobs.pop((thread_id, checkpoint_ns, channel, version), None)
+            self.storage[thread_id][checkpoint_ns].pop(checkpoint_id, None)
+            self.writes.pop((thread_id, checkpoint_ns, checkpoint_id), None)
+        return saved
+
+
+def _sqlite_saver_class():
+    # langgraph-checkpoint-sqlite is only needed when CHECKPOINTER=sqlite
+    from langgraph.checkpoint.sqlite import SqliteSaver
+
+    class LatestCheckpointSqliteSaver(SqliteSaver):
+        """SqliteSaver that keeps one checkpoint per thread and supports async callers."""
+
+        def put(self, config: RunnableConfig, checkpoint: Checkpoint, metadata: CheckpointMetadata,
+                new_versions: ChannelVersions) -> RunnableConfig:
+            saved = super().put(config, checkpoint, metadata, new_versions)
+            key = (str(config["configurable"]["thread_id"]), config["configurable"].get("checkpoint_ns", ""),
+                   checkpoint["id"])
+            with self.cursor() as cur:
+                cur.execute(
+                    "DELETE FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id != ?", key
+                )
+                cur.execute(
+                    "DELETE FROM writes WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id != ?", key
+                )
+            return saved
+
+        async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+            return await asyncio.to_thread(self.get_tuple, config)
+
+        async def alist(self, config: Optional[RunnableConfig], *, filter: Optional[Dict[str, Any]] = None,
+                        before: Optional[RunnableConfig] = None,
+                        limit: Optional[int] = None) -> AsyncIterator[CheckpointTuple]:
+            items = await asyncio.to_thread(lambda: list(self.list(config, filter=filter, before=before, limit=limit)))
+            for item in items:
+                yield item
+
+        async def aput(self, config: RunnableConfig, checkpoint: Checkpoint, metadata: CheckpointMetadata,
+                       new_versions: ChannelVersions) -> RunnableConfig:
+            return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+        async def aput_writes(self, config: RunnableConfig, writes: Sequence[Tuple[str, Any]], task_id: str,
+                              task_path: str = "") -> None:
+            await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+        async def adelete_thread(self, thread_id: str) -> None:
+            await asyncio.to_thread(self.delete_thread, thread_id)
+
+    return LatestCheckpointSqliteSaver
+
+
+def create_checkpointer():
+    """Build the checkpointer selected by CHECKPOINTER ("memory" or "sqlite")."""
+    if config.CHECKPOINTER == "sqlite":
+        Path(config.CHECKPOINT_DB_PATH).parent.mkdir(parents=True, exist_ok=True)
+        # The saver serializes access with its own lock
+        conn = sqlite3.connect(config.CHECKPOINT_DB_PATH, check_same_thread=False)
+        conn.execute("PRAGMA busy_timeout=5000")
+        return _sqlite_saver_class()(conn)
+    return LatestCheckpointMemorySaver()
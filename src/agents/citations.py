@@ -0,0 +1,146 @@
+"""
+Product Citations
+
+The generator prompt numbers the products it may mention, and the generator
+is asked to end its answer with a trailer naming the numbers it actually
+mentioned, e.g. ``[[cited: 1, 3]]``. ``split_citations`` strips the trailer
+from the reply, and ``CitationFilter`` keeps it out of streamed tokens. The
+API then returns exactly the cited products.
+
+When a reply has no trailer, ``TitleMatcher`` finds the mentioned products
+in one pass over the reply. It is an Aho-Corasick automaton over the
+normalized ``title`` and ``title_masri`` of the candidate products, so an
+Arabic reply that uses a product's Masri name is matched too.
+"""
+
+import re
+from collections import deque
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from src.vector_db.text_normalization import normalize_arabic, normalize_text
+
+CITATION_START = "[["
+_CITATION = re.compile(r"\[\[\s*cited\s*:(.*?)\]\]", re.I | re.S)
+_NUMBER = re.compile(r"\d+")
+
+
+def split_citations(text: str) -> Tuple[str, Optional[List[int]]]:
+    """The reply without its citation trailer, and the cited product numbers
+    (1-based, as numbered in the prompt; None when there is no trailer)."""
+    match = _CITATION.search(text)
+    if match is None:
+        return text, None
+    numbers = [int(number) for number in _NUMBER.findall(normalize_arabic(match.group(1)))]
+    return text[:match.start()].rstrip(), list(dict.fromkeys(numbers))
+
+
+class CitationFilter:
+    """Passes streamed text through, withholding the citation trailer."""
+
+    def __init__(self):
+        self._pending = ""
+        self._closed = False
+
+    def feed(self, text: str) -> str:
+        if self._closed:
+            return ""
+        text = self._pending + text
+        self._pending = ""
+        start = text.find(CITATION_START)
+        if start >= 0:
+            # Everything from the trailer on is withheld
+            self._closed = True
+            return text[:start]
+        if text.endswith(CITATION_START[0]):
+            # Could be the first half of the trailer's opening brackets
+            self._pending, text = text[-1], text[:-1]
+        return text
+
+    def flush(self) -> str:
+        text, self._pending = self._pending, ""
+        return text
+
+
+def _matcher_text(text: str) -> str:
+    return normalize_text(text.replace("_", " "))
+
+
+class TitleMatcher:
+    """Aho-Corasick automaton that finds whole-word occurrences of many names at once."""
+
+    def __init__(self, names: Iterable[Tuple[str, Any]]):
+        # Trie as parallel lists: transitions, failure links, (length, value) outputs
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[Tuple[int, Any]]] = [[]]
+        for name, value in names:
+            pattern = _matcher_text(name or "")
+            if pattern:
+                self._add(pattern, value)
+        self._build()
+
+    def _add(self, pattern: str, value: Any) -> None:
+        state = 0
+        for char in pattern:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+                self._goto[state][char] = next_state
+            state = next_state
+        self._out[state].append((len(pattern), value))
+
+    def _build(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(char, 0)
+                self._out[next_state] = self._out[next_state] + self._out[self._fail[next_state]]
+
+    def find(self, text: str) -> List[Any]:
+        """Values of the names occurring in ``text`` as whole words, in order of
+        appearance; overlapping matches keep the leftmost, then longest, name."""
+        text = _matcher_text(text)
+        matches = []
+        state = 0
+        for end, char in enumerate(text, start=1):
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            for length, value in self._out[state]:
+                start = end - length
+                if (start == 0 or not text[start - 1].isalnum()) and (end == len(text) or not text[end].isalnum()):
+                    matches.append((start, -length, value))
+
+        found, covered_until = [], 0
+        for start, negative_length, value in sorted(matches, key=lambda match: match[:2]):
+            if start >= covered_until:
+                found.append(value)
+                covered_until = start - negative_length
+        return list(dict.fromkeys(found))
+
+
+def match_products(text: str, products: List[Dict[str, Any]]) -> List[int]:
+    """Indices of the products whose title or Masri title occurs in ``text``."""
+    names = []
+    for index, product in enumerate(products):
+        meta = product.get('metadata', {})
+        names.extend((name, index) for name in (meta.get('title'), meta.get('title_masri')) if name)
+    return TitleMatcher(names).find(text) if names else []
+
+
+def cited_product_indices(text: str, products: List[Dict[str, Any]], cited: Optional[List[int]]) -> List[int]:
+    """
+    0-based indices of the products a reply mentions: its cited numbers when it
+    has a citation trailer, otherwise the products found by name in the text.
+    """
+    if cited is not None:
+        return [number - 1 for number in cited if 1 <= number <= len(products)]
+    return match_products(text, products)
@@ -6,4 +6,58 @@ GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
 
 QDRANT_URL = os.getenv("QDRANT_URL")
 QDRANT_API_KEY = os.getenv("QDRANT_API_KEY")
-COLLECTION_NAME = "sutra_products"
\ No newline at end of file
+COLLECTION_NAME = "sutra_products"
+# Conversation session storage ("memory" or "sqlite")
+SESSION_BACKEND = os.getenv("SESSION_BACKEND", "memory").lower()
+SESSION_DB_PATH = os.getenv("SESSION_DB_PATH", "data/sessions.db")
+SESSION_TTL_SECONDS = float(os.getenv("SESSION_TTL_SECONDS", "86400"))
+SESSION_MAX_SESSIONS = int(os.getenv("SESSION_MAX_SESSIONS", "10000"))
+SESSION_MAX_BYTES = int(os.getenv("SESSION_MAX_BYTES", str(64 * 1024 * 1024)))
+SESSION_FLUSH_INTERVAL = float(os.getenv("SESSION_FLUSH_INTERVAL", "1.0"))
+
+# Graph state checkpointing per session thread ("memory" or "sqlite")
+CHECKPOINTER = os.getenv("CHECKPOINTER", "memory").lower()
+CHECKPOINT_DB_PATH = os.getenv("CHECKPOINT_DB_PATH", "data/checkpoints.db")
+# Messages kept in a thread's state (older ones are dropped)
+MAX_HISTORY_MESSAGES = int(os.getenv("MAX_HISTORY_MESSAGES", "20"))
+
+# Local intent classifier in front of the LLM router: the LLM is only asked
+# when the local prediction's confidence is below the threshold
+INTENT_CLASSIFIER = os.getenv("INTENT_CLASSIFIER", "true").lower() == "true"
+INTENT_DATA_PATH = os.getenv("INTENT_DATA_PATH", "data/evaluation/intent_data.json")
+INTENT_CONFIDENCE_THRESHOLD = float(os.getenv("INTENT_CONFIDENCE_THRESHOLD", "0.85"))
+
+# Semantic cache of complete turn results in front of the agent graph
+RESPONSE_CACHE = os.getenv("RESPONSE_CACHE", "true").lower() == "true"
+RESPONSE_CACHE_SIMILARITY = float(os.getenv("RESPONSE_CACHE_SIMILARITY", "0.95"))
+RESPONSE_CACHE_TTL_SECONDS = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "3600"))
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "1000"))
+
+# LLM backend ("gemini" or "stub": a deterministic local model for offline
+# load tests) and the stub's simulated latency before the first output and per word
+LLM_PROVIDER = os.getenv("LLM_PROVIDER", "gemini").lower()
+LLM_MODEL = os.getenv("LLM_MODEL", "gemini-2.5-flash-lite")
+STUB_LLM_LATENCY_MS = float(os.getenv("STUB_LLM_LATENCY_MS", "0"))
+STUB_LLM_TOKEN_LATENCY_MS = float(os.getenv("STUB_LLM_TOKEN_LATENCY_MS", "0"))
+
+# Search result evaluation: "llm" asks the LLM every product turn; "score"
+# decides from cross-encoder rerank scores and asks the LLM only in the band
+# between the reject and accept scores (products below the reject score are dropped).
+# The score defaults are uncalibrated starting points: set both from
+# `python -m src.benchmarks.evaluator` before switching EVALUATOR_MODE to "score"
+EVALUATOR_MODE = os.getenv("EVALUATOR_MODE", "llm").lower()
+RERANK_ACCEPT_SCORE = float(os.getenv("RERANK_ACCEPT_SCORE", "0.5"))
+RERANK_REJECT_SCORE = float(os.getenv("RERANK_REJECT_SCORE", "0.05"))
+
+# Estimated tokens of product lines put into the evaluator and generator
+# prompts (lower-ranked products beyond it are left out)
+PRODUCT_PROMPT_TOKEN_BUDGET = int(os.getenv("PRODUCT_PROMPT_TOKEN_BUDGET", "1000"))
+
+# Start product and FAQ retrieval concurrently with the LLM router (async
+# graph path only); the branch for the chosen route is kept
+SPECULATIVE_RETRIEVAL = os.getenv("SPECULATIVE_RETRIEVAL", "false").lower() == "true"
+
+# Observability: Prometheus metrics at GET /metrics (needs prometheus-client)
+# and a JSON line of timing spans per turn
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "false").lower() == "true"
+TRACE_LOG = os.getenv("TRACE_LOG", "false").lower() == "true"
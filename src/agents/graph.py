@@ -1,10 +1,12 @@
 from langgraph.graph import StateGraph, END
+from langchain_core.runnables import RunnableLambda
 from src.agents.schemas.agent_state import AgentState
-from src.agents.workflows.orchestrator import orchestrator_node
-from src.agents.workflows.search_node import search_node
-from src.agents.workflows.evaluator_node import evaluator_node
-from src.agents.workflows.generator_node import generative_node
-from src.agents.workflows.faq_workflow import faq_node
+from src.agents.checkpointing import create_checkpointer
+from src.agents.workflows.orchestrator import orchestrator_node, aorchestrator_node
+from src.agents.workflows.search_node import search_node, asearch_node
+from src.agents.workflows.evaluator_node import evaluator_node, aevaluator_node
+from src.agents.workflows.generator_node import generative_node, agenerative_node
+from src.agents.workflows.faq_workflow import faq_node, afaq_node
 from src.agents.workflows.working_memory import load_conversation_memory, update_conversation_memory
 from langchain_core.messages import AIMessage, HumanMessage
 
@@ -39,13 +41,14 @@ def decide_after_evaluation(state: AgentState) -> str:
 
 workflow = StateGraph(AgentState)
 
-# Nodes
+# Nodes (I/O-bound nodes pair a sync implementation for invoke() with an
+# async one that ainvoke()/astream() await instead of blocking a thread)
 workflow.add_node("load_memory", load_conversation_memory)  # Load memory at start
-workflow.add_node("orchestrator", orchestrator_node)
-workflow.add_node("search", search_node)
-workflow.add_node("evaluator", evaluator_node)
-workflow.add_node("generator", generative_node)
-workflow.add_node("faq", faq_node)
+workflow.add_node("orchestrator", RunnableLambda(orchestrator_node, afunc=aorchestrator_node))
+workflow.add_node("search", RunnableLambda(search_node, afunc=asearch_node))
+workflow.add_node("evaluator", RunnableLambda(evaluator_node, afunc=aevaluator_node))
+workflow.add_node("generator", RunnableLambda(generative_node, afunc=agenerative_node))
+workflow.add_node("faq", RunnableLambda(faq_node, afunc=afaq_node))
 workflow.add_node("update_memory", update_conversation_memory)  # Update memory at end
 
 workflow.set_entry_point("load_memory")
@@ -78,12 +81,40 @@ workflow.add_edge("faq", "generator")
 
 workflow.add_edge("update_memory", END)
 
-app = workflow.compile()
-mermaid_string = app.get_graph().draw_mermaid()
+# State is checkpointed per session thread, so each turn only submits the new message
+app = workflow.compile(checkpointer=create_checkpointer())
 
-with open("workflow_graph.md", "w", encoding="utf-8") as f:
-    f.write(f"```mermaid\n{mermaid_string}\n```")
 
-print("Graph definition saved to workflow_graph.md")
+def turn_input(user_message: str) -> dict:
+    """
+    Graph input for one turn: just the new message, plus a reset of the
+    per-turn fields that would otherwise carry over from the thread's last turn.
+    """
+    return {
+        "messages": [HumanMessage(content=user_message)],
+        "search_results": None,
+        "route": None,
+        "filtered_results": None,
+        "result_review": None,
+        "retries": 0,
+        "prefetched_results": None,
+        "cited_products": None,
+    }
+
+
+def save_graph_visualization(path: str = "workflow_graph.md") -> None:
+    """
+    Render the compiled graph as Mermaid and write it to a markdown file.
+    Run on demand with ``python -m src.agents.graph``; importing this module
+    has no file system side effects.
+    """
+    mermaid_string = app.get_graph().draw_mermaid()
+
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(f"```mermaid\n{mermaid_string}\n```")
+
+    print(f"Graph definition saved to {path}")
+
 
-state = {"messages": []}  
+if __name__ == "__main__":
+    save_graph_visualization()
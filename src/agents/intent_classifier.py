@@ -0,0 +1,208 @@
+"""
+Local Intent Classifier
+
+Routes a user message to ``product_search`` or ``faq`` without an LLM call:
+
+1. Keyword rules: a message whose words include only store-policy terms
+   (shipping, returns, branches, ...) or only garment terms is decided
+   immediately.
+2. Nearest centroid: otherwise the message is embedded with the FAQ model
+   (multilingual-e5-small) and compared with the mean embedding of the labeled
+   examples of each intent in INTENT_DATA_PATH.
+
+Each prediction carries a confidence in [0, 1] (1.0 for a rule match, a
+softmax over the centroid similarities otherwise, with its temperature fitted
+to the labeled examples). The orchestrator only asks the LLM router when the
+confidence is below INTENT_CONFIDENCE_THRESHOLD.
+"""
+
+import json
+import re
+import threading
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+from pydantic import BaseModel
+
+from src.agents import config
+from src.vector_db.embedding import EmbeddingModel, faq_embedding_model
+from src.vector_db.model_registry import run_model
+from src.vector_db.text_normalization import normalize_text
+
+INTENTS = ("product_search", "faq")
+
+# Matched as whole normalized words (multi-word terms as consecutive words).
+# A word also matches without an Arabic article/prefix or a plural/pronoun
+# suffix ("الشحن", "بالشحن", "التيشيرتات") or an English plural/verb ending
+# ("shorts", "returned"), but never as a mere substring ("shortly")
+FAQ_KEYWORDS = (
+    "shipping", "deliver", "delivery", "return", "refund", "exchange", "branch", "customer service",
+    "hotline", "working hours", "opening hours", "email", "cash on delivery", "payment", "track my order",
+    "شحن", "توصيل", "بتوصلوا", "ارجاع", "إرجاع", "ارجع", "استرجاع", "استرداد", "استبدال", "استبدل",
+    "فرع", "فروع", "عنوان", "خدمة العملاء", "مواعيد", "البريد", "الدفع", "ادفع",
+)
+PRODUCT_KEYWORDS = (
+    "shirt", "polo", "jeans", "pants", "sweatpant", "trouser", "short", "hoodie", "sweater", "jacket", "belt",
+    "sock", "cargo", "denim", "linen", "oversized", "slim fit",
+    "تيشيرت", "تي شيرت", "قميص", "قمصان", "بنطلون", "بناطيل", "شورت", "هودي", "سويت", "جاكيت", "جواكت",
+    "بولو", "جينز", "حزام", "شراب", "كارجو", "اوفر سايز", "أوفر سايز",
+)
+
+_ARABIC_PREFIXES = ("وال", "بال", "فال", "كال", "لل", "ال", "و", "ب", "ف", "ل")
+_ARABIC_SUFFIXES = ("ات", "ها", "هم", "كم", "نا", "ه", "ا")
+_ENGLISH_SUFFIXES = ("es", "s", "ed", "ing")
+# Shortest stem left after removing an affix
+_MIN_STEM = 3
+
+
+def _keyword_terms(keywords) -> List[Tuple[str, ...]]:
+    return sorted({tuple(normalize_text(keyword).split()) for keyword in keywords})
+
+
+_FAQ_TERMS = _keyword_terms(FAQ_KEYWORDS)
+_PRODUCT_TERMS = _keyword_terms(PRODUCT_KEYWORDS)
+
+# Softmax temperatures over cosine similarities to choose from. The one that
+# best predicts the labeled examples (each scored against centroids built
+# without it) is used, so the confidence is calibrated for the embedding model
+TEMPERATURE_GRID = tuple(np.geomspace(0.001, 1.0, 61).tolist())
+
+
+class IntentPrediction(BaseModel):
+    route: str
+    confidence: float
+    method: str  # "rules" or "centroid"
+
+
+def load_intent_examples(path: Optional[str] = None, split: str = "examples") -> List[Dict[str, str]]:
+    """Load the labeled {question, intent} pairs of one split of the intent data."""
+    with open(path or config.INTENT_DATA_PATH, 'r', encoding='utf-8') as f:
+        return json.load(f)[split]
+
+
+def _word_forms(word: str) -> Set[str]:
+    """A normalized word and its forms without the affixes rules should ignore."""
+    forms = {word}
+    if word.isascii():
+        forms.update(word[:-len(suffix)] for suffix in _ENGLISH_SUFFIXES
+                     if word.endswith(suffix) and len(word) - len(suffix) >= _MIN_STEM)
+        if word.endswith("ies") and len(word) > _MIN_STEM + 2:
+            forms.add(word[:-3] + "y")
+        return forms
+    forms.update(word[len(prefix):] for prefix in _ARABIC_PREFIXES
+                 if word.startswith(prefix) and len(word) - len(prefix) >= _MIN_STEM)
+    forms.update(stem[:-len(suffix)] for stem in list(forms) for suffix in _ARABIC_SUFFIXES
+                 if stem.endswith(suffix) and len(stem) - len(suffix) >= _MIN_STEM)
+    return forms
+
+
+def _mentions(words: List[Set[str]], terms: List[Tuple[str, ...]]) -> bool:
+    return any(
+        all(term[offset] in words[start + offset] for offset in range(len(term)))
+        for term in terms for start in range(len(words) - len(term) + 1)
+    )
+
+
+def match_keywords(text: str) -> Optional[str]:
+    """The intent whose keywords (and only whose keywords) appear in ``text``."""
+    words = [_word_forms(word) for word in re.findall(r"\w+", normalize_text(text))]
+    faq = _mentions(words, _FAQ_TERMS)
+    product = _mentions(words, _PRODUCT_TERMS)
+    if faq != product:
+        return "faq" if faq else "product_search"
+    return None
+
+
+class IntentClassifier:
+    """Keyword rules plus nearest-centroid classification over sentence embeddings."""
+
+    def __init__(self, embedding_model: EmbeddingModel = faq_embedding_model,
+                 examples: Optional[List[Dict[str, str]]] = None):
+        self.embedding_model = embedding_model
+        self._examples = examples
+        self._centroids: Optional[np.ndarray] = None
+        self._temperature = 1.0
+        self._lock = threading.Lock()
+
+    @property
+    def centroids(self) -> np.ndarray:
+        """Unit-length mean embedding of each intent's examples, in INTENTS order."""
+        if self._centroids is None:
+            with self._lock:
+                if self._centroids is None:
+                    examples = self._examples if self._examples is not None else load_intent_examples()
+                    vectors = _normalize(np.asarray(
+                        self.embedding_model.embed_documents([item["question"] for item in examples]),
+                        dtype=np.float32
+                    ))
+                    labels = np.array([INTENTS.index(item["intent"]) for item in examples])
+                    self._temperature = fit_temperature(vectors, labels)
+                    self._centroids = _normalize(np.stack([vectors[labels == i].mean(axis=0)
+                                                           for i in range(len(INTENTS))]))
+        return self._centroids
+
+    @property
+    def temperature(self) -> float:
+        """Softmax temperature fitted to the labeled examples."""
+        self.centroids
+        return self._temperature
+
+    def classify(self, text: str) -> IntentPrediction:
+        intent = match_keywords(text)
+        if intent is not None:
+            return IntentPrediction(route=intent, confidence=1.0, method="rules")
+        return self._from_embedding(self.embedding_model.embed_query(text))
+
+    async def aclassify(self, text: str) -> IntentPrediction:
+        """Like classify, but embeddings are computed on the model executor."""
+        intent = match_keywords(text)
+        if intent is not None:
+            return IntentPrediction(route=intent, confidence=1.0, method="rules")
+        if self._centroids is None:
+            await run_model(lambda: self.centroids)
+        return self._from_embedding(await self.embedding_model.aembed_query(text))
+
+    def _from_embedding(self, embedding: List[float]) -> IntentPrediction:
+        similarities = self.centroids @ _normalize(np.asarray(embedding, dtype=np.float32))
+        logits = (similarities - similarities.max()) / self._temperature
+        probabilities = np.exp(logits) / np.exp(logits).sum()
+        best = int(np.argmax(probabilities))
+        return IntentPrediction(route=INTENTS[best], confidence=float(probabilities[best]), method="centroid")
+
+
+def fit_temperature(vectors: np.ndarray, labels: np.ndarray) -> float:
+    """
+    The TEMPERATURE_GRID value with the lowest negative log-likelihood of the
+    labels, scoring each unit-length example against the intent centroids
+    with the example itself left out of its own intent's centroid.
+    """
+    sums = np.stack([vectors[labels == i].sum(axis=0) for i in range(len(INTENTS))])
+    counts = np.bincount(labels, minlength=len(INTENTS))
+    rows = np.arange(len(labels))
+    centroids = np.broadcast_to(sums, (len(labels),) + sums.shape).copy()
+    centroids[rows, labels] -= vectors
+    centroids /= np.maximum(counts - (np.arange(len(INTENTS)) == labels[:, None]), 1)[..., None]
+    similarities = np.einsum("nkd,nd->nk", _normalize(centroids), vectors)
+
+    def loss(temperature: float) -> float:
+        logits = similarities / temperature
+        logits -= logits.max(axis=1, keepdims=True)
+        return float(np.mean(np.log(np.exp(logits).sum(axis=1)) - logits[rows, labels]))
+
+    return min(TEMPERATURE_GRID, key=loss)
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+_intent_classifier: Optional[IntentClassifier] = None
+
+
+def get_intent_classifier() -> IntentClassifier:
+    """The shared classifier; centroids are embedded on its first centroid lookup."""
+    global _intent_classifier
+    if _intent_classifier is None:
+        _intent_classifier = IntentClassifier()
+    return _intent_classifier
@@ -0,0 +1,172 @@
+"""
+LLM Provider Layer
+
+Every node and tool gets its chat model here instead of constructing one per
+call. Clients are created once per process for each model (and, for
+structured output, once per model and schema) and then reused, so their HTTP
+connection pools and auth state survive across turns.
+
+LLM_PROVIDER selects the backend:
+
+- ``gemini``: ChatGoogleGenerativeAI (the default)
+- ``stub``: ``StubChatModel``, a deterministic local model with configurable
+  latency for load-testing and benchmarking the whole graph offline (no API
+  key, no network)
+"""
+
+import asyncio
+import hashlib
+import threading
+import time
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple, Type
+
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.runnables import Runnable, RunnableLambda
+from pydantic import BaseModel
+
+from src.agents import config
+
+# Values the stub fills into structured output fields, by field name and then
+# by type; "route" keeps the graph on its main (product search) path
+STUB_FIELD_VALUES: Dict[str, Any] = {"route": "product_search", "reasoning": "Stub review."}
+STUB_TYPE_VALUES: Dict[type, Any] = {bool: True, str: "stub", int: 0, float: 0.0, list: []}
+
+
+class StubChatModel(BaseChatModel):
+    """
+    Deterministic local chat model.
+
+    The reply depends only on the prompt. ``latency_ms`` is spent before the
+    first output and ``token_latency_ms`` before each streamed word, so
+    time-to-first-token and total generation time can be simulated.
+    """
+
+    latency_ms: float = 0.0
+    token_latency_ms: float = 0.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "stub"
+
+    def _reply(self, messages: List[BaseMessage]) -> str:
+        prompt = "\n".join(str(message.content) for message in messages)
+        digest = hashlib.sha1(prompt.encode("utf-8")).hexdigest()[:8]
+        return f"Stub response {digest}: here is what I found for your request. تحب أساعدك في حاجة تانية؟"
+
+    @staticmethod
+    def _usage(messages: List[BaseMessage], words: List[str]) -> Dict[str, int]:
+        # Whitespace-separated words stand in for tokens
+        prompt_tokens = sum(len(str(message.content).split()) for message in messages)
+        return {"input_tokens": prompt_tokens, "output_tokens": len(words),
+                "total_tokens": prompt_tokens + len(words)}
+
+    def _result(self, messages: List[BaseMessage], words: List[str]) -> ChatResult:
+        message = AIMessage(content=" ".join(words), usage_metadata=self._usage(messages, words))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> ChatResult:
+        time.sleep(self.latency_ms / 1000)
+        words = self._reply(messages).split(" ")
+        time.sleep(self.token_latency_ms * len(words) / 1000)
+        return self._result(messages, words)
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager: Optional[AsyncCallbackManagerForLLMRun] = None, **kwargs: Any) -> ChatResult:
+        await asyncio.sleep(self.latency_ms / 1000)
+        words = self._reply(messages).split(" ")
+        await asyncio.sleep(self.token_latency_ms * len(words) / 1000)
+        return self._result(messages, words)
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        time.sleep(self.latency_ms / 1000)
+        words = self._reply(messages).split(" ")
+        for i, word in enumerate(words):
+            time.sleep(self.token_latency_ms / 1000)
+            chunk = self._chunk(messages, words, i)
+            if run_manager:
+                run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                       run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+                       **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        await asyncio.sleep(self.latency_ms / 1000)
+        words = self._reply(messages).split(" ")
+        for i, word in enumerate(words):
+            await asyncio.sleep(self.token_latency_ms / 1000)
+            chunk = self._chunk(messages, words, i)
+            if run_manager:
+                await run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+
+    def _chunk(self, messages: List[BaseMessage], words: List[str], i: int) -> ChatGenerationChunk:
+        # Usage is reported once, on the last chunk
+        usage = self._usage(messages, words) if i == len(words) - 1 else None
+        content = words[i] if i == 0 else " " + words[i]
+        return ChatGenerationChunk(message=AIMessageChunk(content=content, usage_metadata=usage))
+
+    def with_structured_output(self, schema: Type[BaseModel], **kwargs: Any) -> Runnable:
+        """Return instances of ``schema`` filled from STUB_FIELD_VALUES / STUB_TYPE_VALUES."""
+        def build(_prompt: Any) -> BaseModel:
+            values = {}
+            for name, field in schema.model_fields.items():
+                if name in STUB_FIELD_VALUES:
+                    values[name] = STUB_FIELD_VALUES[name]
+                elif field.annotation in STUB_TYPE_VALUES:
+                    values[name] = STUB_TYPE_VALUES[field.annotation]
+            return schema(**values)
+
+        def invoke(prompt: Any) -> BaseModel:
+            time.sleep(self.latency_ms / 1000)
+            return build(prompt)
+
+        async def ainvoke(prompt: Any) -> BaseModel:
+            await asyncio.sleep(self.latency_ms / 1000)
+            return build(prompt)
+
+        return RunnableLambda(invoke, afunc=ainvoke, name=f"Stub{schema.__name__}")
+
+
+def _create_chat_model(model: str) -> BaseChatModel:
+    if config.LLM_PROVIDER == "stub":
+        return StubChatModel(latency_ms=config.STUB_LLM_LATENCY_MS, token_latency_ms=config.STUB_LLM_TOKEN_LATENCY_MS)
+    if config.LLM_PROVIDER != "gemini":
+        raise ValueError(f"Unknown LLM_PROVIDER '{config.LLM_PROVIDER}' (expected 'gemini' or 'stub')")
+    from langchain_google_genai import ChatGoogleGenerativeAI
+    return ChatGoogleGenerativeAI(api_key=config.GOOGLE_API_KEY, model=model)
+
+
+_clients: Dict[Tuple[str, Optional[type]], Any] = {}
+# Reentrant: a structured client builds its base client while holding the lock
+_clients_lock = threading.RLock()
+
+
+def _get_client(model: Optional[str], schema: Optional[Type[BaseModel]]):
+    key = (model or config.LLM_MODEL, schema)
+    client = _clients.get(key)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(key)
+            if client is None:
+                if schema is None:
+                    client = _create_chat_model(key[0])
+                else:
+                    # Structured clients wrap the shared base client of the same model
+                    client = _get_client(key[0], None).with_structured_output(schema)
+                _clients[key] = client
+    return client
+
+
+def get_chat_model(model: Optional[str] = None) -> BaseChatModel:
+    """The process-wide chat model for ``model`` (LLM_MODEL by default)."""
+    return _get_client(model, None)
+
+
+def get_structured_model(schema: Type[BaseModel], model: Optional[str] = None) -> Runnable:
+    """The process-wide ``with_structured_output(schema)`` runnable for ``model``."""
+    return _get_client(model, schema)
@@ -1,26 +1,25 @@
 # main.py
-from src.agents.graph import app
-from langchain_core.messages import HumanMessage, AIMessage # 👈 Import AIMessage
+import argparse
+import asyncio
+import uuid
+from src.agents.graph import app, turn_input
+from src.agents.checkpointing import thread_config
+from src.agents.streaming import astream_turn
+from langchain_core.messages import AIMessage # 👈 Import AIMessage
 
 def main():
     print("E-commerce Agent is ready. Type 'exit' to quit.")
-    # We create a message history list to maintain the conversation
-    message_history = []
+    # The conversation history lives in the graph's checkpointed thread
+    config = thread_config(str(uuid.uuid4()))
     
     while True:
         user_input = input("You: ")
         if user_input.lower() == 'exit':
             break
         
-        # Add the new user message to the history
-        message_history.append(HumanMessage(content=user_input))
+        # Only the new user message is sent; the thread holds the history
+        response = app.invoke(turn_input(user_input), config=config)
         
-        # Pass the entire conversation history to the agent
-        inputs = {"messages": message_history}
-        
-        response = app.invoke(inputs)
-        
-        # Update our history with the agent's response
         message_history = response.get("messages", [])
         
         print("Agent Response:")
@@ -34,5 +33,35 @@ def main():
         
         print("-" * 30)
 
+async def stream_main():
+    """Same loop as main(), but prints the response as it is generated."""
+    print("E-commerce Agent is ready (streaming). Type 'exit' to quit.")
+    config = thread_config(str(uuid.uuid4()))
+    
+    while True:
+        user_input = input("You: ")
+        if user_input.lower() == 'exit':
+            break
+        
+        print("Agent Response:")
+        async for event in astream_turn(app, turn_input(user_input), config=config):
+            if event["event"] == "token":
+                print(event["data"]["text"], end="", flush=True)
+            elif event["event"] == "done":
+                timings = event["data"]["timings"]
+                if timings["first_token_ms"] is None:
+                    # Nothing was streamed (e.g. an unhandled route), print the final text
+                    print(event["data"]["response"], end="")
+                print(f"\n[first token: {timings['first_token_ms'] or 0:.0f} ms, total: {timings['total_ms']:.0f} ms]")
+        
+        print("-" * 30)
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Interactive e-commerce agent")
+    parser.add_argument("--stream", action="store_true", help="Stream the response token by token")
+    args = parser.parse_args()
+    
+    if args.stream:
+        asyncio.run(stream_main())
+    else:
+        main()
\ No newline at end of file
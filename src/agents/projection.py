@@ -0,0 +1,136 @@
+"""
+Compact Product Projection
+
+Search results carry the whole catalog payload, including the raw
+``product_details_json`` (specs HTML, variant and image records, color swatch
+URLs), which is around 3 KB per product. The prompt-building nodes only need a
+few facts per product, so they render results through ``format_products``:
+one line per product with title, price and the node's fields (category,
+colors, sizes, key specs), added in rank order until
+PRODUCT_PROMPT_TOKEN_BUDGET is used up. The evaluator gets every field to
+judge attribute matches; the generator, which only presents the products,
+gets colors and sizes.
+
+Token counts are estimated as UTF-8 bytes / 4: about 4 characters per token
+for English and 2 for Arabic, which is close enough for budgeting and prompt
+size reports without a tokenizer dependency.
+"""
+
+import html
+import json
+import math
+import re
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from src.agents import config
+
+# Spec values that carry no information
+_EMPTY_SPEC_VALUES = {"", "not specified", "n/a", "none"}
+# Spec sections that describe the photo shoot rather than the product
+_SKIPPED_SPEC_SECTIONS = {"measurements"}
+_SPEC_TOKENS = re.compile(r"<strong>(.*?)</strong>|<li[^>]*>(.*?)</li>", re.S | re.I)
+_TAGS = re.compile(r"<[^>]+>")
+
+# Optional fields of a product line, besides title and price
+ALL_FIELDS = ("category", "colors", "sizes", "specs")
+GENERATOR_FIELDS = ("colors", "sizes")
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate LLM token count of ``text`` (UTF-8 bytes / 4)."""
+    return math.ceil(len(text.encode("utf-8")) / 4)
+
+
+def _clean(fragment: str) -> str:
+    return " ".join(html.unescape(_TAGS.sub(" ", fragment)).split()).strip(" :")
+
+
+def _parse_specs(raw_html: Optional[str]) -> List[Tuple[str, str]]:
+    """(name, value) pairs from the specs HTML: "Fabric: Cotton" items, and
+    bare items named after their section (e.g. Style: Casual)."""
+    if not raw_html:
+        return []
+    specs, section = [], ""
+    for heading, item in _SPEC_TOKENS.findall(raw_html):
+        if heading:
+            section = _clean(heading)
+            continue
+        if section.lower() in _SKIPPED_SPEC_SECTIONS:
+            continue
+        item = _clean(item)
+        name, value = (part.strip() for part in item.split(":", 1)) if ":" in item else (section, item)
+        if name and value.lower() not in _EMPTY_SPEC_VALUES:
+            specs.append((name, value))
+    return specs
+
+
+@lru_cache(maxsize=4096)
+def _details(product_details_json: str) -> Tuple[Tuple[str, ...], Tuple[Tuple[str, str], ...]]:
+    """Colors (in stock ones, else all) and key specs of a product_details_json payload."""
+    try:
+        details = json.loads(product_details_json) if product_details_json else {}
+    except (TypeError, ValueError):
+        return (), ()
+    colors = [color for color in details.get("colors") or [] if color.get("name")]
+    in_stock = [color["name"] for color in colors if color.get("available")]
+    specs = _parse_specs((details.get("specs") or {}).get("raw_html"))
+    return tuple(in_stock or [color["name"] for color in colors]), tuple(specs)
+
+
+def project_product(result: Dict[str, Any]) -> Dict[str, Any]:
+    """The prompt-relevant fields of a product search result (empty fields left out)."""
+    meta = result.get("metadata", {})
+    colors, specs = _details(meta.get("product_details_json") or "")
+    projection = {
+        "title": meta.get("title"),
+        "price": meta.get("sale_price") or meta.get("selling_price"),
+        "original_price": meta.get("original_price"),
+        "currency": meta.get("currency"),
+        "category": " / ".join(part for part in (meta.get("category"), meta.get("sub_category")) if part),
+        "colors": list(colors),
+        "sizes": meta.get("available_sizes"),
+        "specs": dict(specs),
+    }
+    if projection["original_price"] == projection["price"]:
+        projection["original_price"] = None
+    return {key: value for key, value in projection.items() if value not in (None, "", [], {})}
+
+
+def format_product(index: int, result: Dict[str, Any], fields: Sequence[str] = ALL_FIELDS) -> str:
+    """One numbered prompt line for a product search result."""
+    product = project_product(result)
+    product = {key: value for key, value in product.items() if key not in ALL_FIELDS or key in fields}
+    price = " ".join(str(part) for part in (product.get("currency"), product.get("price", "N/A")) if part)
+    if "original_price" in product:
+        price += f" (was {product['original_price']})"
+    parts = [f"{index}. Title: {product.get('title', 'N/A')}", f"Price: {price}"]
+    if "category" in product:
+        parts.append(f"Category: {product['category']}")
+    if "colors" in product:
+        parts.append(f"Colors: {', '.join(product['colors'])}")
+    if "sizes" in product:
+        parts.append(f"Sizes: {product['sizes']}")
+    if "specs" in product:
+        parts.append("Specs: " + "; ".join(f"{name}: {value}" for name, value in product["specs"].items()))
+    return " | ".join(parts)
+
+
+def format_products(results: List[Dict[str, Any]], token_budget: Optional[int] = None,
+                    fields: Sequence[str] = ALL_FIELDS) -> str:
+    """
+    Numbered product lines in rank order, stopping before the line that would
+    exceed ``token_budget`` (PRODUCT_PROMPT_TOKEN_BUDGET by default). The first
+    product is always included; omitted ones are summarized in a final line.
+    """
+    budget = config.PRODUCT_PROMPT_TOKEN_BUDGET if token_budget is None else token_budget
+    lines, used = [], 0
+    for i, result in enumerate(results):
+        line = format_product(i + 1, result, fields)
+        tokens = estimate_tokens(line) + 1
+        if lines and used + tokens > budget:
+            lines.append(f"({len(results) - i} more lower-ranked products omitted)")
+            break
+        lines.append(line)
+        used += tokens
+    return "\n".join(lines)
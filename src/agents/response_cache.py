@@ -0,0 +1,232 @@
+"""
+Semantic Response Cache
+
+Answers a repeated question (e.g. "عندكم شورت؟", "what's your return policy")
+from a cache in front of the agent graph instead of running the orchestrator,
+retrieval, rerank, evaluator and generator again.
+
+Entries are grouped by route and conversation context:
+
+- the route comes from the local intent classifier, and a lookup only happens
+  when it is confident
+- answers are keyed by a hash of the prior conversation (empty for a
+  session's first turn), since the FAQ and product prompts both include it;
+  only first-turn answers are shared across sessions
+- product answers are also keyed by the constraints ``extract_filters`` finds
+  in the message (price bounds, categories, sizes, colors), which an
+  embedding barely tells apart ("شورت تحت 200" vs "شورت تحت 500")
+
+Within a group, a lookup hits on the same normalized text or on the most
+similar cached question whose embedding cosine similarity is at least
+RESPONSE_CACHE_SIMILARITY, so near-duplicate phrasings share an answer.
+Entries expire after RESPONSE_CACHE_TTL_SECONDS, the least recently used ones
+are evicted beyond RESPONSE_CACHE_MAX_ENTRIES, and the whole cache is cleared
+when the product or FAQ collection is re-indexed (detected from the lexical
+index files that every sync rewrites, so re-indexing from another process is
+noticed too).
+"""
+
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.messages import BaseMessage
+
+from src.agents import config
+from src.agents.intent_classifier import IntentClassifier, get_intent_classifier
+from src.agents.telemetry import record_cache_lookup
+from src.agents.workflows.working_memory import format_conversation
+from src.vector_db.config import config as vector_config
+from src.vector_db.embedding import EmbeddingModel, faq_embedding_model
+from src.vector_db.query_filters import extract_filters
+from src.vector_db.text_normalization import normalize_text
+
+# Prior messages that make up an answer's conversation context
+# (the same window load_conversation_memory gives the graph)
+CONTEXT_MESSAGES = 4
+
+
+def catalog_version() -> Tuple[float, ...]:
+    """Modification times of the product and FAQ lexical indexes (0.0 when missing)."""
+    version = []
+    for collection in (vector_config.PRODUCT_COLLECTION, vector_config.FAQ_COLLECTION):
+        try:
+            version.append(os.path.getmtime(os.path.join(vector_config.LEXICAL_INDEX_PATH, f"{collection}.json")))
+        except OSError:
+            version.append(0.0)
+    return tuple(version)
+
+
+def conversation_context(history: List[BaseMessage]) -> str:
+    """Cache key part for the conversation: empty for first turns."""
+    if not history:
+        return ""
+    prior = format_conversation(history[-CONTEXT_MESSAGES:])
+    return hashlib.sha256(prior.encode("utf-8")).hexdigest()
+
+
+def query_constraints(route: str, message: str) -> str:
+    """Cache key part for the product constraints in ``message``: empty for FAQ answers."""
+    if route == "faq":
+        return ""
+    filters = extract_filters(message)
+    return repr((filters.min_price, filters.max_price, sorted(filters.categories),
+                 sorted(filters.sub_categories), sorted(filters.sizes), sorted(filters.colors)))
+
+
+def cache_context(route: str, message: str, history: List[BaseMessage]) -> str:
+    """The part of the cache key besides the route that cached answers must share."""
+    return f"{conversation_context(history)}|{query_constraints(route, message)}"
+
+
+class SemanticResponseCache:
+    """Thread-safe TTL + LRU cache of turn results, looked up by embedding similarity."""
+
+    def __init__(self, similarity_threshold: float = 0.95, ttl_seconds: float = 3600, max_entries: int = 1000,
+                 embedding_model: EmbeddingModel = faq_embedding_model,
+                 classifier: Optional[IntentClassifier] = None):
+        self.similarity_threshold = similarity_threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.embedding_model = embedding_model
+        self._classifier = classifier
+        # (route, context, normalized query) -> entry, least recently used first
+        self._entries: "OrderedDict[Tuple[str, str, str], Dict[str, Any]]" = OrderedDict()
+        self._groups: Dict[Tuple[str, str], Dict[Tuple[str, str, str], None]] = {}
+        self._version = catalog_version()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self.invalidations = 0
+        self.saved_seconds = 0.0
+
+    @property
+    def classifier(self) -> IntentClassifier:
+        return self._classifier if self._classifier is not None else get_intent_classifier()
+
+    async def alookup(self, message: str, history: List[BaseMessage]) -> Optional[Dict[str, Any]]:
+        """The cached result for ``message`` ({response, route, products}), or None."""
+        start = time.perf_counter()
+        prediction = await self.classifier.aclassify(message)
+        if prediction.confidence < config.INTENT_CONFIDENCE_THRESHOLD:
+            with self._lock:
+                self.bypassed += 1
+            record_cache_lookup("bypass")
+            return None
+        embedding = await self.embedding_model.aembed_query(message)
+        context = cache_context(prediction.route, message, history)
+        return self.lookup(prediction.route, context, message, embedding, time.perf_counter() - start)
+
+    async def astore(self, message: str, history: List[BaseMessage], result: Dict[str, Any],
+                     seconds: float) -> None:
+        """Cache a finished turn's result; ``seconds`` is what the graph took to produce it."""
+        route = result.get("route")
+        if route not in ("faq", "product_search"):
+            return
+        embedding = await self.embedding_model.aembed_query(message)
+        self.put(route, cache_context(route, message, history), message, embedding, result, seconds)
+
+    def lookup(self, route: str, context: str, message: str, embedding: List[float],
+               lookup_seconds: float = 0.0) -> Optional[Dict[str, Any]]:
+        query = normalize_text(message)
+        now = time.time()
+        with self._lock:
+            self._check_version()
+            group = self._groups.get((route, context), {})
+            for key in [key for key in group if self._entries[key]["expires_at"] <= now]:
+                self._discard(key)
+
+            key = (route, context, query)
+            if key not in self._entries and group:
+                keys = list(group)
+                vectors = np.stack([self._entries[k]["embedding"] for k in keys])
+                similarities = vectors @ _unit(embedding)
+                best = int(np.argmax(similarities))
+                if similarities[best] >= self.similarity_threshold:
+                    key = keys[best]
+
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+            else:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                self.saved_seconds += max(0.0, entry["seconds"] - lookup_seconds)
+        record_cache_lookup("miss" if entry is None else "hit")
+        return dict(entry["result"]) if entry is not None else None
+
+    def put(self, route: str, context: str, message: str, embedding: List[float], result: Dict[str, Any],
+            seconds: float) -> None:
+        key = (route, context, normalize_text(message))
+        with self._lock:
+            self._check_version()
+            self._discard(key)
+            self._entries[key] = {
+                "embedding": _unit(embedding),
+                "result": dict(result),
+                "seconds": seconds,
+                "expires_at": time.time() + self.ttl_seconds,
+            }
+            self._groups.setdefault((route, context), {})[key] = None
+            while len(self._entries) > self.max_entries:
+                self._discard(next(iter(self._entries)))
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._clear()
+
+    def _check_version(self) -> None:
+        version = catalog_version()
+        if version != self._version:
+            self._version = version
+            self._clear()
+
+    def _clear(self) -> None:
+        if self._entries:
+            print("Catalog re-indexed or cache invalidated; clearing the response cache")
+        self._entries.clear()
+        self._groups.clear()
+        self.invalidations += 1
+
+    def _discard(self, key: Tuple[str, str, str]) -> None:
+        if self._entries.pop(key, None) is None:
+            return
+        group = self._groups.get(key[:2])
+        if group is not None:
+            group.pop(key, None)
+            if not group:
+                del self._groups[key[:2]]
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "bypassed": self.bypassed,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "saved_seconds": round(self.saved_seconds, 3),
+            "invalidations": self.invalidations,
+        }
+
+
+def _unit(vector) -> np.ndarray:
+    vector = np.asarray(vector, dtype=np.float32)
+    return vector / max(float(np.linalg.norm(vector)), 1e-12)
+
+
+def create_response_cache() -> Optional[SemanticResponseCache]:
+    """Create the response cache unless RESPONSE_CACHE is disabled."""
+    if not config.RESPONSE_CACHE:
+        return None
+    return SemanticResponseCache(
+        similarity_threshold=config.RESPONSE_CACHE_SIMILARITY,
+        ttl_seconds=config.RESPONSE_CACHE_TTL_SECONDS,
+        max_entries=config.RESPONSE_CACHE_MAX_ENTRIES,
+    )
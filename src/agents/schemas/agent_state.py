@@ -1,13 +1,29 @@
 from pydantic import BaseModel, Field
-from typing import List, Optional, Any
+from typing import Annotated, List, Optional, Any
 from langchain_core.messages import BaseMessage
+from langgraph.graph.message import add_messages
 from src.agents.schemas.evaluator_schemas import ResultReview
+from src.agents import config
+
+
+def capped_add_messages(left: List[BaseMessage], right: List[BaseMessage]) -> List[BaseMessage]:
+    """
+    Append new messages (nodes return only what they add) and keep the most
+    recent MAX_HISTORY_MESSAGES, so stored history works like a ring buffer and
+    per-turn state size stays flat however long the conversation gets.
+    """
+    return add_messages(left, right)[-config.MAX_HISTORY_MESSAGES:]
+
 
 class AgentState(BaseModel):
-    messages: List[BaseMessage]
+    messages: Annotated[List[BaseMessage], capped_add_messages]
     search_results: Optional[list[dict]] = None
     route: Optional[str] = None
     filtered_results: Optional[list[dict]] = None
     result_review: Optional[ResultReview] = None
     retries: int = 0
-    prior_conversation: str = ""
\ No newline at end of file
+    prior_conversation: str = ""
+    # Retrieval results computed speculatively by the orchestrator for its route
+    prefetched_results: Optional[list] = None
+    # Indices into filtered_results of the products the response mentions
+    cited_products: Optional[list[int]] = None
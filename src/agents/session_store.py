@@ -0,0 +1,367 @@
+"""
+Conversation Session Stores
+
+The API keeps each session's message history in a ``SessionStore``:
+
+- ``InMemorySessionStore``: per-process store with TTL expiry, LRU eviction and
+  limits on the number of sessions and on their approximate total size.
+- ``SQLiteSessionStore``: the same bounded store used as a hot cache in front
+  of a SQLite database (WAL mode). Writes are applied to the cache immediately
+  and persisted in batches by a background thread (write-behind), so sessions
+  survive restarts and are shared by all uvicorn workers on one host.
+
+``create_session_store()`` builds the store selected by SESSION_BACKEND. The
+optional ``on_remove`` callback is called with the id of every session that is
+deleted, expires or is evicted, so per-session state kept elsewhere (the
+graph's checkpointed thread) can be released with it.
+"""
+
+import atexit
+import json
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from langchain_core.messages import BaseMessage, messages_from_dict, messages_to_dict
+
+from src.agents import config
+
+# Rough per-message bookkeeping overhead (objects, ids, dict keys) in bytes
+_MESSAGE_OVERHEAD_BYTES = 256
+
+
+def estimate_size(messages: List[BaseMessage]) -> int:
+    """Approximate memory held by a message list, in bytes."""
+    return sum(len(str(message.content).encode('utf-8')) + _MESSAGE_OVERHEAD_BYTES for message in messages)
+
+
+class SessionStore(ABC):
+    """Interface shared by the session store implementations."""
+
+    @abstractmethod
+    def get(self, session_id: str) -> Optional[List[BaseMessage]]:
+        ...
+
+    @abstractmethod
+    def set(self, session_id: str, messages: List[BaseMessage]) -> None:
+        ...
+
+    @abstractmethod
+    def delete(self, session_id: str) -> bool:
+        ...
+
+    @abstractmethod
+    def list(self, offset: int = 0, limit: int = 50) -> Tuple[List[str], int]:
+        """A page of session ids (most recently used first) and the total count."""
+
+    @abstractmethod
+    def stats(self) -> dict:
+        ...
+
+    def close(self) -> None:
+        pass
+
+    def __contains__(self, session_id: str) -> bool:
+        return self.get(session_id) is not None
+
+
+class InMemorySessionStore(SessionStore):
+    """Bounded in-process store: TTL expiry, then LRU eviction to fit the limits."""
+
+    def __init__(self, ttl_seconds: float = 86400, max_sessions: int = 10000,
+                 max_bytes: int = 64 * 1024 * 1024, on_remove: Optional[Callable[[str], None]] = None):
+        self.ttl_seconds = ttl_seconds
+        self.on_remove = on_remove
+        self.max_sessions = max(1, max_sessions)
+        self.max_bytes = max_bytes
+        # session_id -> (messages, size_bytes, last_access), least recently used first
+        self._sessions: "OrderedDict[str, Tuple[List[BaseMessage], int, float]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.RLock()
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, session_id: str) -> Optional[List[BaseMessage]]:
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                return None
+            messages, size, last_access = entry
+            now = time.time()
+            if now - last_access > self.ttl_seconds:
+                self._discard(session_id)
+                self.expirations += 1
+                return None
+            self._sessions[session_id] = (messages, size, now)
+            self._sessions.move_to_end(session_id)
+            return list(messages)
+
+    def set(self, session_id: str, messages: List[BaseMessage]) -> None:
+        with self._lock:
+            self._remove(session_id)
+            size = estimate_size(messages)
+            self._sessions[session_id] = (list(messages), size, time.time())
+            self._bytes += size
+            self._evict()
+
+    def delete(self, session_id: str) -> bool:
+        with self._lock:
+            return self._discard(session_id)
+
+    def list(self, offset: int = 0, limit: int = 50) -> Tuple[List[str], int]:
+        with self._lock:
+            self._expire()
+            ids = list(reversed(self._sessions))
+            return ids[offset:offset + limit], len(ids)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "sessions": len(self._sessions),
+                "bytes": self._bytes,
+                "max_sessions": self.max_sessions,
+                "max_bytes": self.max_bytes,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+    def _remove(self, session_id: str) -> bool:
+        entry = self._sessions.pop(session_id, None)
+        if entry is None:
+            return False
+        self._bytes -= entry[1]
+        return True
+
+    def _discard(self, session_id: str) -> bool:
+        """Remove a session for good (delete/expiry/eviction) and notify ``on_remove``."""
+        removed = self._remove(session_id)
+        if removed and self.on_remove is not None:
+            self.on_remove(session_id)
+        return removed
+
+    def _expire(self) -> None:
+        cutoff = time.time() - self.ttl_seconds
+        # Least recently used first, so stop at the first live session
+        while self._sessions:
+            session_id, (_, _, last_access) = next(iter(self._sessions.items()))
+            if last_access >= cutoff:
+                break
+            self._discard(session_id)
+            self.expirations += 1
+
+    def _evict(self) -> None:
+        self._expire()
+        # Always keep the session that was just written
+        while len(self._sessions) > 1 and (len(self._sessions) > self.max_sessions or self._bytes > self.max_bytes):
+            session_id = next(iter(self._sessions))
+            self._discard(session_id)
+            self.evictions += 1
+
+
+class SQLiteSessionStore(SessionStore):
+    """
+    SQLite-backed store with an in-memory cache and write-behind persistence.
+
+    Sessions written by this process are flushed every ``flush_interval``
+    seconds (and on close/exit). Reads are served from the cache unless the
+    database holds a newer version written by another worker.
+    """
+
+    def __init__(self, db_path: str, ttl_seconds: float = 86400, max_sessions: int = 10000,
+                 max_bytes: int = 64 * 1024 * 1024, flush_interval: float = 1.0,
+                 on_remove: Optional[Callable[[str], None]] = None):
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self.flush_interval = flush_interval
+        self.on_remove = on_remove
+        # Evicting from the cache does not end a session; it is still in the database.
+        # Its checkpointed thread is released anyway and seeded again from the
+        # stored history when the session comes back
+        self.cache = InMemorySessionStore(ttl_seconds, max_sessions, max_bytes, on_remove=self._uncached)
+
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS sessions (
+                session_id TEXT PRIMARY KEY,
+                messages TEXT NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_updated_at ON sessions(updated_at)")
+        self._db_lock = threading.Lock()
+
+        # session_id -> (messages, updated_at) waiting to be written; None means delete
+        self._pending: Dict[str, Optional[Tuple[List[BaseMessage], float]]] = {}
+        # updated_at of the version held in the cache, to detect newer rows from other workers
+        self._versions: Dict[str, float] = {}
+        self._pending_lock = threading.Lock()
+        self.flushes = 0
+
+        self._stop = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_loop, name="session-flusher", daemon=True)
+        self._flusher.start()
+        atexit.register(self.close)
+
+    def get(self, session_id: str) -> Optional[List[BaseMessage]]:
+        with self._pending_lock:
+            if session_id in self._pending:
+                # Not yet flushed: this process holds the newest version
+                pending = self._pending[session_id]
+                return list(pending[0]) if pending is not None else None
+
+        cached = self.cache.get(session_id)
+        # With a cached copy only a newer row (from another worker) has to be read
+        since = self._versions.get(session_id, 0.0) if cached is not None else 0.0
+        with self._db_lock:
+            row = self._conn.execute(
+                "SELECT messages, updated_at FROM sessions WHERE session_id = ? AND updated_at > ?",
+                (session_id, max(since, time.time() - self.ttl_seconds))
+            ).fetchone()
+
+        if row is None:
+            if cached is None:
+                self._versions.pop(session_id, None)
+            return cached
+
+        messages = messages_from_dict(json.loads(row[0]))
+        self.cache.set(session_id, messages)
+        self._versions[session_id] = row[1]
+        return messages
+
+    def set(self, session_id: str, messages: List[BaseMessage]) -> None:
+        updated_at = time.time()
+        self.cache.set(session_id, messages)
+        self._versions[session_id] = updated_at
+        with self._pending_lock:
+            self._pending[session_id] = (list(messages), updated_at)
+
+    def delete(self, session_id: str) -> bool:
+        existed = self.get(session_id) is not None
+        # Leaving the cache releases the session through _uncached
+        uncached = self.cache.delete(session_id)
+        with self._pending_lock:
+            self._pending[session_id] = None
+        if existed and not uncached:
+            self._uncached(session_id)
+        return existed
+
+    def _uncached(self, session_id: str) -> None:
+        """Drop what this process keeps for a session that left the cache."""
+        self._versions.pop(session_id, None)
+        if self.on_remove is not None:
+            try:
+                self.on_remove(session_id)
+            except Exception as e:
+                print(f"Error releasing session {session_id}: {e}")
+
+    def list(self, offset: int = 0, limit: int = 50) -> Tuple[List[str], int]:
+        self.flush()
+        cutoff = time.time() - self.ttl_seconds
+        with self._db_lock:
+            total = self._conn.execute(
+                "SELECT COUNT(*) FROM sessions WHERE updated_at > ?", (cutoff,)
+            ).fetchone()[0]
+            rows = self._conn.execute(
+                "SELECT session_id FROM sessions WHERE updated_at > ? ORDER BY updated_at DESC LIMIT ? OFFSET ?",
+                (cutoff, limit, offset)
+            ).fetchall()
+        return [row[0] for row in rows], total
+
+    def flush(self) -> None:
+        """Write pending sessions in one transaction and drop expired rows."""
+        with self._pending_lock:
+            pending, self._pending = self._pending, {}
+        cutoff = time.time() - self.ttl_seconds
+
+        expired: List[str] = []
+        with self._db_lock:
+            try:
+                upserts = [
+                    (session_id, json.dumps(messages_to_dict(entry[0]), ensure_ascii=False), entry[1])
+                    for session_id, entry in pending.items() if entry is not None
+                ]
+                deletes = [(session_id,) for session_id, entry in pending.items() if entry is None]
+                self._conn.execute("BEGIN")
+                if upserts:
+                    # Keep a newer version another worker may have written meanwhile
+                    self._conn.executemany("""
+                        INSERT INTO sessions (session_id, messages, updated_at) VALUES (?, ?, ?)
+                        ON CONFLICT(session_id) DO UPDATE SET
+                            messages = excluded.messages, updated_at = excluded.updated_at
+                        WHERE excluded.updated_at >= sessions.updated_at
+                    """, upserts)
+                if deletes:
+                    self._conn.executemany("DELETE FROM sessions WHERE session_id = ?", deletes)
+                if self.on_remove is not None:
+                    expired = [row[0] for row in self._conn.execute(
+                        "SELECT session_id FROM sessions WHERE updated_at <= ?", (cutoff,)
+                    )]
+                self._conn.execute("DELETE FROM sessions WHERE updated_at <= ?", (cutoff,))
+                self._conn.execute("COMMIT")
+                if upserts or deletes:
+                    self.flushes += 1
+            except Exception as e:
+                # Retry on the next flush unless newer writes superseded them
+                with self._pending_lock:
+                    for session_id, entry in pending.items():
+                        self._pending.setdefault(session_id, entry)
+                print(f"Error flushing sessions to {self.db_path}: {e}")
+                # SQLite may already have rolled back, or BEGIN itself failed
+                if self._conn.in_transaction:
+                    self._conn.execute("ROLLBACK")
+                return
+
+        for session_id in expired:
+            try:
+                self.on_remove(session_id)
+            except Exception as e:
+                print(f"Error removing expired session {session_id}: {e}")
+
+    def _flush_loop(self) -> None:
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                # Keep flushing; a dead flusher would only persist writes on close()
+                print(f"Error in the session flusher: {e}")
+
+    def stats(self) -> dict:
+        with self._pending_lock:
+            pending = len(self._pending)
+        return {**self.cache.stats(), "backend": "sqlite", "pending_writes": pending, "flushes": self.flushes}
+
+    def close(self) -> None:
+        if self._stop.is_set():
+            return
+        self._stop.set()
+        self._flusher.join(timeout=self.flush_interval + 1)
+        self.flush()
+        with self._db_lock:
+            self._conn.close()
+
+
+def create_session_store(on_remove: Optional[Callable[[str], None]] = None) -> SessionStore:
+    """Build the session store selected by SESSION_BACKEND ("memory" or "sqlite")."""
+    if config.SESSION_BACKEND == "sqlite":
+        return SQLiteSessionStore(
+            config.SESSION_DB_PATH,
+            ttl_seconds=config.SESSION_TTL_SECONDS,
+            max_sessions=config.SESSION_MAX_SESSIONS,
+            max_bytes=config.SESSION_MAX_BYTES,
+            flush_interval=config.SESSION_FLUSH_INTERVAL,
+            on_remove=on_remove
+        )
+    return InMemorySessionStore(
+        ttl_seconds=config.SESSION_TTL_SECONDS,
+        max_sessions=config.SESSION_MAX_SESSIONS,
+        max_bytes=config.SESSION_MAX_BYTES,
+        on_remove=on_remove
+    )
@@ -0,0 +1,106 @@
+"""
+Speculative Retrieval
+
+While the orchestrator waits for the LLM router, product and FAQ retrieval
+(which only need the user message and the prior conversation) already run as
+concurrent tasks. When the route is known, the matching branch's results are
+kept and handed to the search / FAQ node, and the other branch is cancelled.
+
+Per turn this saves up to min(retrieval time, routing time) of latency at the
+cost of the discarded branch's work. ``speculation_stats`` accumulates both so
+the trade-off can be checked (exposed by the API at GET /speculation).
+Cancelling a task stops its awaits, but model inference already submitted to
+the model executor still finishes in its thread; that time is counted as
+wasted work up to the moment of cancellation.
+"""
+
+import asyncio
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+
+class SpeculationStats:
+    """Thread-safe totals of speculative turns, latency saved and wasted work."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.turns = 0
+        self.kept: Dict[str, int] = {}
+        self.discarded: Dict[str, int] = {}
+        self.saved_seconds = 0.0
+        self.wasted_seconds = 0.0
+
+    def record(self, kept: Optional[str], saved_seconds: float, wasted: Dict[str, float]) -> None:
+        with self._lock:
+            self.turns += 1
+            if kept is not None:
+                self.kept[kept] = self.kept.get(kept, 0) + 1
+            for name in wasted:
+                self.discarded[name] = self.discarded.get(name, 0) + 1
+            self.saved_seconds += saved_seconds
+            self.wasted_seconds += sum(wasted.values())
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "turns": self.turns,
+                "kept": dict(self.kept),
+                "discarded": dict(self.discarded),
+                "saved_seconds": round(self.saved_seconds, 3),
+                "wasted_seconds": round(self.wasted_seconds, 3),
+                "mean_saved_ms": self.saved_seconds / self.turns * 1000 if self.turns else 0.0,
+                "mean_wasted_ms": self.wasted_seconds / self.turns * 1000 if self.turns else 0.0,
+            }
+
+
+# Global statistics instance
+speculation_stats = SpeculationStats()
+
+
+async def _timed(awaitable: Awaitable[Any]) -> Tuple[Any, float]:
+    start = time.perf_counter()
+    result = await awaitable
+    return result, time.perf_counter() - start
+
+
+async def speculate(decide: Awaitable[str],
+                    branches: Dict[str, Callable[[], Awaitable[Any]]]) -> Tuple[str, Optional[Any]]:
+    """
+    Await ``decide`` (the route) while every branch runs, keyed by the route
+    it serves. Returns the route and the result of its branch, or None when no
+    branch matches the route or the kept branch failed (the node then
+    retrieves normally).
+    """
+    start = time.perf_counter()
+    tasks = {name: asyncio.create_task(_timed(factory())) for name, factory in branches.items()}
+    try:
+        route = await decide
+    except BaseException:
+        for task in tasks.values():
+            task.cancel()
+        raise
+    route_seconds = time.perf_counter() - start
+
+    wasted: Dict[str, float] = {}
+    kept_task = tasks.pop(route, None)
+    for name, task in tasks.items():
+        if task.done() and not task.cancelled() and task.exception() is None:
+            wasted[name] = task.result()[1]
+        else:
+            task.cancel()
+            wasted[name] = time.perf_counter() - start
+
+    result, saved = None, 0.0
+    if kept_task is not None:
+        try:
+            result, branch_seconds = await kept_task
+            # Without speculation the branch would only have started now
+            saved = min(branch_seconds, route_seconds)
+        except Exception as e:
+            print(f"Speculative {route} retrieval failed, retrying in its node: {e}")
+
+    speculation_stats.record(route if result is not None else None, saved, wasted)
+    print(f"Speculation: kept {route if result is not None else 'nothing'} (saved {saved * 1000:.0f} ms), "
+          f"discarded {', '.join(f'{name} ({seconds * 1000:.0f} ms)' for name, seconds in wasted.items()) or 'nothing'}")
+    return route, result
@@ -0,0 +1,113 @@
+"""
+Streaming Chat Turns
+
+Runs one agent turn with ``astream_events`` and turns the raw LangGraph /
+LangChain events into a small, transport-independent event stream shared by
+the SSE endpoint in ``api.py`` and the interactive CLI:
+
+- ``node_start`` / ``node_end``: {"node": name} as each graph node runs
+- ``token``: {"text": chunk} for every chunk the generator LLM produces
+  (without the trailing product citations)
+- ``done``: {"response", "route", "products", "timings"} once the turn ends
+
+The ``done`` event carries the same response text and product list that the
+non-streaming ``/chat`` endpoint returns, plus the time to first token.
+"""
+
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from langchain_core.messages import AIMessage
+
+from src.agents.citations import CitationFilter, match_products
+
+# Only the generator's output is user-facing text; the orchestrator and
+# evaluator LLM calls are structured and are not streamed to the client
+STREAMED_NODE = "generator"
+
+
+def extract_mentioned_products(response_text: str, filtered_products: List[Dict]) -> List[Dict]:
+    """
+    Extract the products mentioned by title or Masri title in the AI response
+    (one pass over the text, see citations.TitleMatcher). Used for responses
+    without citations; cited responses are resolved by the generator node.
+    """
+    if not filtered_products:
+        return []
+    return [filtered_products[i] for i in match_products(response_text, filtered_products)]
+
+
+def chat_result(response: Dict[str, Any]) -> Tuple[str, str, Optional[List[Dict]]]:
+    """Response text, route and product list for a finished turn's final state."""
+    updated_history = response.get("messages", [])
+
+    ai_response = "Sorry, I couldn't process that request."
+    if updated_history and isinstance(updated_history[-1], AIMessage):
+        ai_response = updated_history[-1].content
+    elif "search_results" in response:
+        # Fallback for workflows that don't add an AIMessage
+        ai_response = str(response.get("search_results", ai_response))
+
+    route = response.get("route", "")
+
+    products_to_return = None
+    if route != "faq":
+        filtered_products = response.get("filtered_results") or []
+        cited = response.get("cited_products")
+        if cited is None:
+            products_to_return = extract_mentioned_products(ai_response, filtered_products)
+        else:
+            products_to_return = [filtered_products[i] for i in cited if i < len(filtered_products)]
+
+    return ai_response, route, products_to_return
+
+
+async def astream_turn(app, inputs: Dict[str, Any], config: Optional[Dict[str, Any]] = None) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Run one turn of ``app`` and yield {"event": ..., "data": ...} dicts.
+
+    The final state of the turn is attached to the ``done`` event under the
+    ``state`` key (not JSON serializable; transports should drop it).
+    """
+    start = time.perf_counter()
+    first_token_at = None
+    final_state: Dict[str, Any] = {}
+    citations = CitationFilter()
+
+    async for event in app.astream_events(inputs, config=config, version="v2"):
+        kind = event["event"]
+        node = event.get("metadata", {}).get("langgraph_node")
+
+        if kind == "on_chat_model_stream" and node == STREAMED_NODE:
+            text = citations.feed(event["data"]["chunk"].content)
+            if text:
+                if first_token_at is None:
+                    first_token_at = time.perf_counter()
+                yield {"event": "token", "data": {"text": text}}
+        elif kind in ("on_chain_start", "on_chain_end") and node and event["name"] == node:
+            status = "node_start" if kind == "on_chain_start" else "node_end"
+            yield {"event": status, "data": {"node": node}}
+        elif kind == "on_chain_end" and not event.get("parent_ids"):
+            # The root run ending carries the graph's final state
+            final_state = event["data"].get("output") or {}
+
+    # A lone "[" held back in case it started the citation trailer
+    text = citations.flush()
+    if text:
+        yield {"event": "token", "data": {"text": text}}
+
+    ai_response, route, products = chat_result(final_state)
+    total = time.perf_counter() - start
+    yield {
+        "event": "done",
+        "data": {
+            "response": ai_response,
+            "route": route,
+            "products": products,
+            "timings": {
+                "first_token_ms": (first_token_at - start) * 1000 if first_token_at else None,
+                "total_ms": total * 1000,
+            },
+        },
+        "state": final_state,
+    }
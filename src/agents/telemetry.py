@@ -0,0 +1,243 @@
+"""
+Turn Tracing and Prometheus Metrics
+
+``trace_turn()`` wraps one agent turn. While it is open:
+
+- a LangChain callback handler (added to the run config) records a span for
+  every graph node and every LLM call, with prompt and completion token counts
+- the retrieval stages recorded with ``record_stage`` (query embedding, vector
+  query, lexical query, rerank) are collected through ``profiling.profile()``
+
+When the turn ends the spans feed Prometheus histograms and counters (exposed
+by the API at GET /metrics) and, with TRACE_LOG=true, are printed as one JSON
+line per turn. Response cache lookups are counted with ``record_cache_lookup``.
+
+Both are off by default (METRICS_ENABLED, TRACE_LOG). Disabled, ``trace_turn``
+returns a no-op trace that leaves the run config untouched, so no callback
+runs and ``record_stage`` stays inactive. prometheus-client is imported only
+when metrics are enabled.
+"""
+
+import json
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.runnables import RunnableConfig
+
+from src.agents import config
+from src.vector_db.profiling import profile
+
+# Seconds; spans from sub-millisecond stages up to slow LLM turns
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class _Metrics:
+    """The Prometheus collectors, in a registry of their own."""
+
+    def __init__(self):
+        from prometheus_client import CollectorRegistry, Counter, Histogram
+
+        self.registry = CollectorRegistry()
+        self.turn_seconds = Histogram("agent_turn_duration_seconds", "Duration of complete agent turns",
+                                      ["route"], buckets=LATENCY_BUCKETS, registry=self.registry)
+        self.node_seconds = Histogram("agent_node_duration_seconds", "Duration of graph node executions",
+                                      ["node"], buckets=LATENCY_BUCKETS, registry=self.registry)
+        self.stage_seconds = Histogram("agent_retrieval_stage_duration_seconds",
+                                       "Duration of retrieval stages (embed, vector_query, lexical_query, rerank)",
+                                       ["stage"], buckets=LATENCY_BUCKETS, registry=self.registry)
+        self.llm_seconds = Histogram("agent_llm_call_duration_seconds", "Duration of LLM calls by calling node",
+                                     ["node"], buckets=LATENCY_BUCKETS, registry=self.registry)
+        self.llm_tokens = Counter("agent_llm_tokens", "LLM tokens by calling node and kind (prompt, completion)",
+                                  ["node", "kind"], registry=self.registry)
+        self.routes = Counter("agent_routes", "Turns by route", ["route"], registry=self.registry)
+        self.evaluator_retries = Counter("agent_evaluator_retries", "Searches repeated after a failed evaluation",
+                                         registry=self.registry)
+        self.errors = Counter("agent_errors", "Failed nodes and LLM calls", ["span"], registry=self.registry)
+        self.cache_lookups = Counter("agent_response_cache_lookups", "Response cache lookups by result",
+                                     ["result"], registry=self.registry)
+
+
+_metrics: Optional[_Metrics] = None
+_metrics_lock = threading.Lock()
+
+
+def metrics() -> Optional[_Metrics]:
+    """The collectors, or None when METRICS_ENABLED is off."""
+    global _metrics
+    if not config.METRICS_ENABLED:
+        return None
+    if _metrics is None:
+        with _metrics_lock:
+            if _metrics is None:
+                _metrics = _Metrics()
+    return _metrics
+
+
+def render_metrics() -> Optional[bytes]:
+    """Prometheus text exposition of all collectors (None when disabled)."""
+    collectors = metrics()
+    if collectors is None:
+        return None
+    from prometheus_client import generate_latest
+    return generate_latest(collectors.registry)
+
+
+def record_cache_lookup(result: str) -> None:
+    """Count a response cache lookup ("hit", "miss" or "bypass")."""
+    collectors = metrics()
+    if collectors is not None:
+        collectors.cache_lookups.labels(result=result).inc()
+
+
+def _token_usage(response: Any) -> Dict[str, int]:
+    """Prompt/completion tokens of an LLMResult, from usage metadata or llm_output."""
+    prompt = completion = 0
+    for generations in response.generations:
+        for generation in generations:
+            usage = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+            prompt += usage.get("input_tokens", 0)
+            completion += usage.get("output_tokens", 0)
+    if not prompt and not completion:
+        usage = (response.llm_output or {}).get("token_usage") or {}
+        prompt = usage.get("prompt_tokens", 0)
+        completion = usage.get("completion_tokens", 0)
+    return {"prompt_tokens": prompt, "completion_tokens": completion}
+
+
+class TurnTracer(BaseCallbackHandler):
+    """Callback handler that turns node and LLM runs of one turn into timing spans."""
+
+    # Called directly in the running coroutine instead of a thread executor
+    run_inline = True
+
+    def __init__(self):
+        self.spans: List[Dict[str, Any]] = []
+        self.final_state: Dict[str, Any] = {}
+        self._open: Dict[UUID, Dict[str, Any]] = {}
+        self._start = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def _begin(self, run_id: UUID, kind: str, name: str) -> None:
+        with self._lock:
+            self._open[run_id] = {"kind": kind, "name": name, "start": time.perf_counter()}
+
+    def _end(self, run_id: UUID, **fields: Any) -> None:
+        with self._lock:
+            span = self._open.pop(run_id, None)
+            if span is None:
+                return
+            now = time.perf_counter()
+            span["offset_ms"] = round((span["start"] - self._start) * 1000, 2)
+            span["duration_ms"] = round((now - span.pop("start")) * 1000, 2)
+            span.update(fields)
+            self.spans.append(span)
+
+    def on_chain_start(self, serialized: Dict[str, Any], inputs: Dict[str, Any], *, run_id: UUID,
+                       parent_run_id: Optional[UUID] = None, metadata: Optional[Dict[str, Any]] = None,
+                       **kwargs: Any) -> None:
+        node = (metadata or {}).get("langgraph_node")
+        # Only the node runnables themselves, not the chains nested inside them
+        if node and kwargs.get("name") == node:
+            self._begin(run_id, "node", node)
+
+    def on_chain_end(self, outputs: Any, *, run_id: UUID, parent_run_id: Optional[UUID] = None,
+                     **kwargs: Any) -> None:
+        if parent_run_id is None and isinstance(outputs, dict):
+            self.final_state = outputs
+        self._end(run_id)
+
+    def on_chain_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end(run_id, error=type(error).__name__)
+
+    def on_chat_model_start(self, serialized: Dict[str, Any], messages: List[List[Any]], *, run_id: UUID,
+                            parent_run_id: Optional[UUID] = None, metadata: Optional[Dict[str, Any]] = None,
+                            **kwargs: Any) -> None:
+        self._begin(run_id, "llm", (metadata or {}).get("langgraph_node") or "llm")
+
+    def on_llm_start(self, serialized: Dict[str, Any], prompts: List[str], *, run_id: UUID,
+                     parent_run_id: Optional[UUID] = None, metadata: Optional[Dict[str, Any]] = None,
+                     **kwargs: Any) -> None:
+        self._begin(run_id, "llm", (metadata or {}).get("langgraph_node") or "llm")
+
+    def on_llm_end(self, response: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end(run_id, **_token_usage(response))
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end(run_id, error=type(error).__name__)
+
+
+class Trace:
+    """One traced turn; ``config()`` adds its tracer to a run config."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.tracer = TurnTracer()
+        self.stages: Dict[str, List[float]] = {}
+
+    def config(self, run_config: RunnableConfig) -> RunnableConfig:
+        return {**run_config, "callbacks": [*(run_config.get("callbacks") or []), self.tracer]}
+
+    def finish(self, seconds: float) -> None:
+        state = self.tracer.final_state
+        route = state.get("route") or "none"
+        # Each evaluation increments retries; all but the first repeated the search
+        retries = max(0, (state.get("retries") or 0) - 1)
+
+        collectors = metrics()
+        if collectors is not None:
+            collectors.turn_seconds.labels(route=route).observe(seconds)
+            collectors.routes.labels(route=route).inc()
+            if retries:
+                collectors.evaluator_retries.inc(retries)
+            for span in self.tracer.spans:
+                if "error" in span:
+                    collectors.errors.labels(span=f"{span['kind']}:{span['name']}").inc()
+                if span["kind"] == "node":
+                    collectors.node_seconds.labels(node=span["name"]).observe(span["duration_ms"] / 1000)
+                else:
+                    collectors.llm_seconds.labels(node=span["name"]).observe(span["duration_ms"] / 1000)
+                    collectors.llm_tokens.labels(node=span["name"], kind="prompt").inc(span.get("prompt_tokens", 0))
+                    collectors.llm_tokens.labels(node=span["name"], kind="completion").inc(
+                        span.get("completion_tokens", 0))
+            for stage, durations in self.stages.items():
+                for duration in durations:
+                    collectors.stage_seconds.labels(stage=stage).observe(duration)
+
+        if config.TRACE_LOG:
+            print(json.dumps({
+                "trace": self.name,
+                "route": route,
+                "total_ms": round(seconds * 1000, 2),
+                "evaluator_retries": retries,
+                "spans": sorted(self.tracer.spans, key=lambda span: span["offset_ms"]),
+                "stages_ms": {stage: [round(d * 1000, 2) for d in durations]
+                              for stage, durations in self.stages.items()},
+            }, ensure_ascii=False))
+
+
+class _NoTrace:
+    def config(self, run_config: RunnableConfig) -> RunnableConfig:
+        return run_config
+
+
+_NO_TRACE = _NoTrace()
+
+
+@contextmanager
+def trace_turn(name: str) -> Iterator[Any]:
+    """Trace the agent turn run inside the block (a no-op when telemetry is off)."""
+    if not (config.METRICS_ENABLED or config.TRACE_LOG):
+        yield _NO_TRACE
+        return
+    trace = Trace(name)
+    start = time.perf_counter()
+    try:
+        with profile() as stages:
+            trace.stages = stages
+            yield trace
+    finally:
+        trace.finish(time.perf_counter() - start)
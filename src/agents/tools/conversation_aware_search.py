@@ -1,24 +1,9 @@
-from langchain_core.tools import tool
-from src.agents import config
+from langchain_core.tools import StructuredTool
+from src.agents.llm import get_chat_model
 from src.agents.schemas.tool_schemas import ProductSearchInput
-from langchain_google_genai import ChatGoogleGenerativeAI
-from src.vector_db.vector_store import VectorStore
-from src.vector_db.search import ProductSearch
+from src.agents.tools.product_search import get_product_search
 import re
 
-product_vector_store = VectorStore(
-    qdrant_url=config.QDRANT_URL,
-    qdrant_api_key=config.QDRANT_API_KEY,
-    collection_name="sutra_db"
-)
-
-product_search = ProductSearch(product_vector_store)
-
-llm = ChatGoogleGenerativeAI(
-    api_key=config.GOOGLE_API_KEY,
-    model="gemini-2.5-flash-lite"
-)
-
 def is_vague_query(query: str) -> bool:
     """
     Check if a query is vague and needs context from conversation history.
@@ -40,23 +25,8 @@ def is_vague_query(query: str) -> bool:
     query_lower = query.lower()
     return any(keyword in query_lower for keyword in vague_keywords)
 
-def refine_query_with_context(query: str, conversation_history: str) -> str:
-    """
-    Use an LLM to refine a vague query using conversation context.
-    
-    Args:
-        query (str): The vague query to refine
-        conversation_history (str): The recent conversation history
-        
-    Returns:
-        str: The refined query
-    """
-    # If the query is not vague, return it as is
-    if not is_vague_query(query):
-        return query
-    
-    # Create a prompt to refine the vague query using conversation context
-    refinement_prompt = f"""
+def _refinement_prompt(query: str, conversation_history: str) -> str:
+    return f"""
 You are an expert e-commerce search assistant helping customers find products.
 The user has made a vague request that needs clarification using conversation context.
 
@@ -78,10 +48,28 @@ Examples:
 
 Respond ONLY with the refined search query in the same language as the user's request, nothing else.
 """
+
+def refine_query_with_context(query: str, conversation_history: str) -> str:
+    """
+    Use an LLM to refine a vague query using conversation context.
+    
+    Args:
+        query (str): The vague query to refine
+        conversation_history (str): The recent conversation history
+        
+    Returns:
+        str: The refined query
+    """
+    # If the query is not vague, return it as is
+    if not is_vague_query(query):
+        return query
+    
+    # Create a prompt to refine the vague query using conversation context
+    refinement_prompt = _refinement_prompt(query, conversation_history)
     
     try:
         # Use the LLM to refine the query
-        refined_query = llm.invoke(refinement_prompt).content.strip()
+        refined_query = get_chat_model().invoke(refinement_prompt).content.strip()
         print(f"Refined query: '{query}' -> '{refined_query}'")
         return refined_query
     except Exception as e:
@@ -89,8 +77,24 @@ Respond ONLY with the refined search query in the same language as the user's re
         # Fallback: return a general query for similar items if refinement fails
         return "منتجات مشابهة"
 
-@tool("conversation-aware-product-search-tool", args_schema=ProductSearchInput)
-def conversation_aware_product_search_tool(query: str, conversation_history: str = "") -> list:
+async def arefine_query_with_context(query: str, conversation_history: str) -> str:
+    """
+    Async refine_query_with_context.
+    """
+    if not is_vague_query(query):
+        return query
+    
+    refinement_prompt = _refinement_prompt(query, conversation_history)
+    
+    try:
+        refined_query = (await get_chat_model().ainvoke(refinement_prompt)).content.strip()
+        print(f"Refined query: '{query}' -> '{refined_query}'")
+        return refined_query
+    except Exception as e:
+        print(f"Error refining query: {e}")
+        return "منتجات مشابهة"
+
+def conversation_aware_product_search(query: str, conversation_history: str = "") -> list:
     """
     Searches for products in the vector database with conversation context awareness.
     
@@ -116,7 +120,28 @@ def conversation_aware_product_search_tool(query: str, conversation_history: str
         # Use the original query for search
         search_query = query
     
-    # Perform the product search using the new vector database modules
-    search_results = product_search.search(search_query, limit=10)
+    # Perform the product search with price/category/size/color filters pushed down
+    search_results = get_product_search().search_with_filters(search_query, limit=10)
+    
+    return search_results
+
+async def aconversation_aware_product_search(query: str, conversation_history: str = "") -> list:
+    """
+    Async conversation_aware_product_search.
+    """
+    print(f"Original query: '{query}'")
+    
+    if is_vague_query(query) and conversation_history:
+        search_query = await arefine_query_with_context(query, conversation_history)
+        print(f"Using refined query: '{search_query}'")
+    else:
+        search_query = query
     
-    return search_results
\ No newline at end of file
+    return await get_product_search().asearch_with_filters(search_query, limit=10)
+
+conversation_aware_product_search_tool = StructuredTool.from_function(
+    func=conversation_aware_product_search,
+    coroutine=aconversation_aware_product_search,
+    name="conversation-aware-product-search-tool",
+    args_schema=ProductSearchInput
+)
\ No newline at end of file
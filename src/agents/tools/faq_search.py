@@ -6,13 +6,19 @@ from src.agents.schemas.tool_schemas import FAQSearchInput
 
 # Initialize the FAQ vector store and search components
 # Using the "sutran_faq" collection that was created in the notebook
-faq_vector_store = VectorStore(
-    qdrant_url=config.QDRANT_URL,
-    qdrant_api_key=config.QDRANT_API_KEY,
-    collection_name="sutran_faq"
-)
+_faq_search = None
 
-faq_search = FAQSearch(faq_vector_store)
+def get_faq_search() -> FAQSearch:
+    """Create the FAQ vector store and search on first use instead of at import."""
+    global _faq_search
+    if _faq_search is None:
+        faq_vector_store = VectorStore(
+            qdrant_url=config.QDRANT_URL,
+            qdrant_api_key=config.QDRANT_API_KEY,
+            collection_name="sutran_faq"
+        )
+        _faq_search = FAQSearch(faq_vector_store)
+    return _faq_search
 
 @tool("faq-search-tool", args_schema=FAQSearchInput)
 def faq_search_tool(query: str) -> list:
@@ -28,6 +34,6 @@ def faq_search_tool(query: str) -> list:
     print(f"Searching FAQ database for: '{query}'")
     
     # Perform the FAQ search using the new vector database modules
-    search_results = faq_search.search(query, limit=3)
+    search_results = get_faq_search().search(query, limit=3)
     
     return search_results
\ No newline at end of file
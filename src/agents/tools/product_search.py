@@ -1,42 +1,54 @@
-from langchain_core.tools import tool
+from langchain_core.tools import StructuredTool
 from src.agents import config
+from src.agents.llm import get_chat_model
 from src.agents.schemas.tool_schemas import ProductSearchInput
 from src.vector_db.vector_store import VectorStore
 from src.vector_db.search import ProductSearch
 
-product_vector_store = VectorStore(
-    qdrant_url=config.QDRANT_URL,
-    qdrant_api_key=config.QDRANT_API_KEY,
-    collection_name="sutra_db"
-)
+_product_search = None
 
-product_search = ProductSearch(product_vector_store)
+def get_product_search() -> ProductSearch:
+    """Create the product vector store and search on first use instead of at import."""
+    global _product_search
+    if _product_search is None:
+        product_vector_store = VectorStore(
+            qdrant_url=config.QDRANT_URL,
+            qdrant_api_key=config.QDRANT_API_KEY,
+            collection_name="sutra_db"
+        )
+        _product_search = ProductSearch(product_vector_store)
+    return _product_search
 
-@tool("product-search-tool", args_schema=ProductSearchInput)
-def product_search_tool(query: str, conversation_history: str = "")-> list:
+def search_products(query: str, conversation_history: str = "")-> list:
     """Searches for products in the vector database with conversation context awareness"""
     # If we have conversation history, let the LLM refine the query using context
     if conversation_history:
         # Use the conversation history to refine the query
         refined_query = refine_query_with_context(query, conversation_history)
-        return product_search.search(refined_query, limit=10)
+        return get_product_search().search_with_filters(refined_query, limit=10)
     else:
         # Direct search without context
-        return product_search.search(query, limit=10)
+        return get_product_search().search_with_filters(query, limit=10)
 
-def refine_query_with_context(query: str, conversation_history: str) -> str:
-    """
-    Use the conversation history to refine the query if needed
-    """
-    # Check if this is a vague query that needs context
-    if is_vague_query(query):
-        from langchain_google_genai import ChatGoogleGenerativeAI
-        llm = ChatGoogleGenerativeAI(
-            api_key=config.GOOGLE_API_KEY,
-            model="gemini-2.5-flash-lite"
-        )
-        
-        refinement_prompt = f"""
+async def asearch_products(query: str, conversation_history: str = "") -> list:
+    """Async search_products: query refinement and retrieval do not block the event loop"""
+    if conversation_history:
+        refined_query = await arefine_query_with_context(query, conversation_history)
+        return await get_product_search().asearch_with_filters(refined_query, limit=10)
+    else:
+        return await get_product_search().asearch_with_filters(query, limit=10)
+
+# invoke() runs the sync implementation, ainvoke() the async one
+product_search_tool = StructuredTool.from_function(
+    func=search_products,
+    coroutine=asearch_products,
+    name="product-search-tool",
+    description="Searches for products in the vector database with conversation context awareness",
+    args_schema=ProductSearchInput
+)
+
+def _refinement_prompt(query: str, conversation_history: str) -> str:
+    return f"""
 You are an e-commerce search assistant. The user has made a request that needs clarification using conversation context.
 
 Conversation History:
@@ -55,9 +67,16 @@ Examples:
 
 Respond ONLY with the refined search query, nothing else.
 """
-        
+
+def refine_query_with_context(query: str, conversation_history: str) -> str:
+    """
+    Use the conversation history to refine the query if needed
+    """
+    # Check if this is a vague query that needs context
+    if is_vague_query(query):
         try:
-            refined_query = llm.invoke(refinement_prompt).content.strip()
+            refinement_prompt = _refinement_prompt(query, conversation_history)
+            refined_query = get_chat_model().invoke(refinement_prompt).content.strip()
             print(f"Refined query: '{query}' -> '{refined_query}'")
             return refined_query
         except Exception as e:
@@ -68,6 +87,22 @@ Respond ONLY with the refined search query, nothing else.
     # If not a vague query, return as is
     return query
 
+async def arefine_query_with_context(query: str, conversation_history: str) -> str:
+    """
+    Async refine_query_with_context
+    """
+    if is_vague_query(query):
+        try:
+            refinement_prompt = _refinement_prompt(query, conversation_history)
+            refined_query = (await get_chat_model().ainvoke(refinement_prompt)).content.strip()
+            print(f"Refined query: '{query}' -> '{refined_query}'")
+            return refined_query
+        except Exception as e:
+            print(f"Error refining query: {e}")
+            return query
+    
+    return query
+
 def is_vague_query(query: str) -> bool:
     """
     Check if a query is vague and needs context from conversation history.
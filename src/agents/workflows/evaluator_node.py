@@ -1,61 +1,123 @@
 from src.agents.schemas.agent_state import AgentState 
 from src.agents.schemas.evaluator_schemas import ResultReview
-from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.messages import AIMessage
+from src.agents.llm import get_structured_model
+from src.agents.projection import format_products
 from src.agents import config
 from pathlib import Path
+from typing import List, Optional, Tuple
 
 evaluator_prompt_path = Path(__file__).parent.parent / "prompts/evaluator.txt"
 with open(evaluator_prompt_path, 'r', encoding='utf-8') as f: 
     evaluator_prompt_template = f.read()
 
+def _evaluation_prompt(state: AgentState, results: Optional[list] = None) -> str:
+    user_query = state.messages[-1].content
+    prior_conversation = getattr(state, "prior_conversation", "")
+    results = state.search_results if results is None else results
+    return evaluator_prompt_template.format(
+        user_query=user_query,
+        prior_conversation=prior_conversation,
+        search_results=format_products(results[:10])  # Limit to first 10 results
+    )
+
+def score_review(results: List[dict]) -> Tuple[Optional[ResultReview], List[dict]]:
+    """
+    Judge search results from their cross-encoder scores (EVALUATOR_MODE=score).
+
+    Products scoring below RERANK_REJECT_SCORE are dropped. The results are
+    valid when the best score reaches RERANK_ACCEPT_SCORE and invalid when
+    nothing is left; in the band between, the review is None and the LLM
+    decides on the kept results. Results without rerank scores always go to
+    the LLM. The default thresholds are not calibrated; see
+    src.benchmarks.evaluator.
+    """
+    if not results or any(result.get('rerank_score') is None for result in results):
+        return None, results
+
+    best = max(result['rerank_score'] for result in results)
+    kept = [result for result in results if result['rerank_score'] >= config.RERANK_REJECT_SCORE]
+    if not kept:
+        return ResultReview(is_valid=False,
+                            reasoning=f"Best rerank score {best:.3f} is below {config.RERANK_REJECT_SCORE}."), []
+    if best >= config.RERANK_ACCEPT_SCORE:
+        return ResultReview(is_valid=True,
+                            reasoning=f"Best rerank score {best:.3f} reaches {config.RERANK_ACCEPT_SCORE}."), kept
+    return None, kept
+
+def _no_results_update(state: AgentState) -> dict:
+    review = ResultReview(is_valid=False, reasoning="No search results.")
+    return {
+        "result_review": review, 
+        "filtered_results": [], 
+        "retries": state.retries + 1
+    }
+
+def _review_update(state: AgentState, review: ResultReview, results: Optional[list] = None) -> dict:
+    print(f"Evaluation result: is_valid = {review.is_valid}")
+
+    # If evaluation passes, send all (kept) results to generator
+    # If evaluation fails, send empty list
+    results = state.search_results if results is None else results
+    filtered_results = results if review.is_valid else []
+    return {
+        "result_review": review.model_dump(), 
+        "filtered_results": filtered_results,
+        "retries": state.retries + 1
+    }
+
+def _error_update(state: AgentState, e: Exception) -> dict:
+    print(f"Error in evaluator node: {e}")
+    # In case of error, be conservative and don't show any results
+    return {
+        "result_review": ResultReview(is_valid=False, reasoning=f"Error during evaluation: {str(e)}").model_dump(),
+        "filtered_results": [],
+        "retries": state.retries + 1
+    }
+
 def evaluator_node(state: AgentState):
     """
     Evaluates search results using an LLM to see if they match the user's query,
-    considering the prior conversation.
+    considering the prior conversation. With EVALUATOR_MODE=score, clear cases
+    are decided from the rerank scores and only ambiguous ones reach the LLM.
+    """
+    print("--- Executing Intelligent Evaluator Node ---")
+
+    if not state.search_results:
+        return _no_results_update(state)
+    
+    results = None
+    if config.EVALUATOR_MODE == "score":
+        review, results = score_review(state.search_results)
+        if review is not None:
+            print(f"Score-based evaluation: {review.reasoning}")
+            return _review_update(state, review, results)
+    
+    try:
+        # Evaluate all (kept) search results
+        review = get_structured_model(ResultReview).invoke(_evaluation_prompt(state, results))
+        return _review_update(state, review, results)
+    except Exception as e:
+        return _error_update(state, e)
+
+async def aevaluator_node(state: AgentState):
+    """
+    Async evaluator_node used by ainvoke/astream.
     """
     print("--- Executing Intelligent Evaluator Node ---")
-    user_query = state.messages[-1].content
-    search_results = state.search_results
-    prior_conversation = getattr(state, "prior_conversation", "")
 
-    if not search_results:
-        review = ResultReview(is_valid=False)
-        return {
-            "result_review": review, 
-            "filtered_results": [], 
-            "retries": state.retries + 1
-        }
+    if not state.search_results:
+        return _no_results_update(state)
+    
+    results = None
+    if config.EVALUATOR_MODE == "score":
+        review, results = score_review(state.search_results)
+        if review is not None:
+            print(f"Score-based evaluation: {review.reasoning}")
+            return _review_update(state, review, results)
     
     try:
-        # Evaluate all search results
-        formatted_prompt = evaluator_prompt_template.format(
-            user_query=user_query,
-            prior_conversation=prior_conversation,
-            search_results=str(search_results[:10])  # Limit to first 10 results
-        )
-
-        llm = ChatGoogleGenerativeAI(
-            api_key=config.GOOGLE_API_KEY, 
-            model="gemini-2.5-flash-lite"
-        ).with_structured_output(ResultReview)
-
-        review = llm.invoke(formatted_prompt)
-        print(f"Evaluation result: is_valid = {review.is_valid}")
-
-        # If evaluation passes, send all results to generator
-        # If evaluation fails, send empty list
-        filtered_results = search_results if review.is_valid else []
-        return {
-            "result_review": review.model_dump(), 
-            "filtered_results": filtered_results,
-            "retries": state.retries + 1
-        }
+        review = await get_structured_model(ResultReview).ainvoke(_evaluation_prompt(state, results))
+        return _review_update(state, review, results)
     except Exception as e:
-        print(f"Error in evaluator node: {e}")
-        # In case of error, be conservative and don't show any results
-        return {
-            "result_review": ResultReview(is_valid=False, reasoning=f"Error during evaluation: {str(e)}").model_dump(),
-            "filtered_results": [],
-            "retries": state.retries + 1
-        }
\ No newline at end of file
+        return _error_update(state, e)
@@ -1,14 +1,22 @@
 from src.agents.schemas.agent_state import AgentState
 from src.agents import config
-from qdrant_client import QdrantClient
-from langchain_community.embeddings import HuggingFaceEmbeddings
+from src.vector_db.vector_store import VectorStore
 
-qdrant_client = QdrantClient(
-    url=config.QDRANT_URL,
-    api_key=config.QDRANT_API_KEY
-)
+_faq_vector_store = None
 
-embedding_model = HuggingFaceEmbeddings(model_name="intfloat/multilingual-e5-small")
+def get_faq_vector_store() -> VectorStore:
+    """
+    The vector store selects the FAQ embedding model and the configured backend.
+    It is created on first use so importing the graph does not open a client.
+    """
+    global _faq_vector_store
+    if _faq_vector_store is None:
+        _faq_vector_store = VectorStore(
+            qdrant_url=config.QDRANT_URL,
+            qdrant_api_key=config.QDRANT_API_KEY,
+            collection_name="faq"
+        )
+    return _faq_vector_store
 
 def faq_node(state: AgentState) -> dict:
     """
@@ -18,14 +26,27 @@ def faq_node(state: AgentState) -> dict:
     
     user_query = state.messages[-1].content
     
-    query_embedding = embedding_model.embed_query(user_query)
+    search_results = get_faq_vector_store().search(user_query, limit=3)
+    return _faq_update(search_results)
+
+async def afaq_node(state: AgentState) -> dict:
+    """
+    Async faq_node used by ainvoke/astream.
+    """
+    print("--- Executing FAQ Node ---")
     
-    search_results = qdrant_client.search(
-        collection_name="faq",
-        query_vector=query_embedding,
-        limit=3
-    )
+    # Results retrieved while the orchestrator was routing
+    if state.prefetched_results is not None:
+        return {**_faq_update(state.prefetched_results), "prefetched_results": None}
     
+    search_results = await aretrieve_faq(state)
+    return _faq_update(search_results)
+
+async def aretrieve_faq(state: AgentState) -> list:
+    """FAQ retrieval for the last message; also started speculatively by the orchestrator."""
+    return await get_faq_vector_store().asearch(state.messages[-1].content, limit=3)
+
+def _faq_update(search_results) -> dict:
     # Convert search results to the format expected by the generator
     faq_results = []
     for result in search_results:
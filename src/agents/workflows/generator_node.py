@@ -1,7 +1,9 @@
 from src.agents.schemas.agent_state import AgentState 
-from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.messages import AIMessage
-from src.agents import config
+from langchain_core.runnables import RunnableConfig
+from src.agents.citations import cited_product_indices, split_citations
+from src.agents.llm import get_chat_model
+from src.agents.projection import GENERATOR_FIELDS, format_products
 from pathlib import Path
 
 generator_prompt_path = Path(__file__).parent.parent / "prompts/generator.txt"
@@ -12,9 +14,7 @@ faq_generator_prompt_path = Path(__file__).parent.parent / "prompts/faq_generato
 with open(faq_generator_prompt_path, 'r', encoding='utf-8') as f: 
     faq_generator_prompt_template = f.read()
 
-def generative_node(state: AgentState) -> dict:
-    print("--- Executing Generative Node ---")
-
+def _generation_prompt(state: AgentState) -> str:
     user_query = state.messages[-1].content
     filtered_results = state.filtered_results
     route = getattr(state, "route", "product_search")  # Default to product search
@@ -29,49 +29,54 @@ def generative_node(state: AgentState) -> dict:
             for i, faq in enumerate(filtered_results):
                 faq_list_str += f"{faq['content']}\n\n"
 
-        llm = ChatGoogleGenerativeAI(
-            api_key=config.GOOGLE_API_KEY, 
-            model="gemini-2.5-flash-lite"
-        )
-
-        formatted_prompt = faq_generator_prompt_template.format(
+        return faq_generator_prompt_template.format(
             user_query=user_query,
             faq_list=faq_list_str,
             prior_conversation=state.prior_conversation
         )
 
-        final_response_text = llm.invoke(formatted_prompt).content
+    # Handle product search generation (existing logic)
+    if not filtered_results:
+        product_list_str = "No products found."
     else:
-        # Handle product search generation (existing logic)
-        product_list_str = ""
-        if not filtered_results:
-            product_list_str = "No products found."
-        else:
-            # Include all filtered products in the prompt so the AI can choose which to mention
-            for i, product in enumerate(filtered_results):
-                meta = product.get('metadata', {})
-                title = meta.get('title', 'N/A')
-                price = meta.get('sale_price', 'N/A')
-                currency = meta.get('currency', '') 
-                product_list_str += f"{i+1}. Title: {title}, Price: {currency} {price}\n"
-
-        llm = ChatGoogleGenerativeAI(
-            api_key=config.GOOGLE_API_KEY, 
-            model="gemini-2.5-flash-lite"
-        )
-
-        formatted_prompt = generator_prompt_template.format(
-            user_query=user_query,
-            product_list=product_list_str,
-            prior_conversation=state.prior_conversation
-        )
+        # Include the filtered products (as many as the token budget allows)
+        # so the AI can choose which to mention
+        product_list_str = format_products(filtered_results, fields=GENERATOR_FIELDS)
 
-        final_response_text = llm.invoke(formatted_prompt).content
+    return generator_prompt_template.format(
+        user_query=user_query,
+        product_list=product_list_str,
+        prior_conversation=state.prior_conversation
+    )
 
-    # Only append the AI message - memory update will be handled separately
-    messages = state.messages + [AIMessage(content=final_response_text)]
+def _response_update(state: AgentState, final_response_text: str) -> dict:
+    # The citation trailer names the products the response mentions; it is
+    # not part of the text the user sees
+    final_response_text, cited = split_citations(final_response_text)
+    cited_products = None
+    if getattr(state, "route", "product_search") != "faq":
+        cited_products = cited_product_indices(final_response_text, state.filtered_results or [], cited)
 
+    # Only return the new AI message; the messages reducer appends it to the
+    # thread history. Memory update will be handled separately
     return {
-        "messages": messages
+        "messages": [AIMessage(content=final_response_text)],
+        "cited_products": cited_products
         # Don't update prior_conversation here - let update_memory handle it
-    }
\ No newline at end of file
+    }
+
+def generative_node(state: AgentState) -> dict:
+    print("--- Executing Generative Node ---")
+
+    final_response_text = get_chat_model().invoke(_generation_prompt(state)).content
+    return _response_update(state, final_response_text)
+
+async def agenerative_node(state: AgentState, config: RunnableConfig) -> dict:
+    """
+    Async generative_node used by ainvoke/astream. Passing the run config on
+    lets astream_events() stream the completion token by token.
+    """
+    print("--- Executing Generative Node ---")
+
+    final_response_text = (await get_chat_model().ainvoke(_generation_prompt(state), config=config)).content
+    return _response_update(state, final_response_text)
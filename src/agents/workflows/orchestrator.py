@@ -1,8 +1,11 @@
-# src/agents/workflows/orchestrator.py
 from pathlib import Path
-from langchain_google_genai import ChatGoogleGenerativeAI
 from src.agents.schemas.agent_state import AgentState
 from src.agents import config
+from src.agents.intent_classifier import get_intent_classifier
+from src.agents.llm import get_structured_model
+from src.agents.speculation import speculate
+from src.agents.workflows.search_node import aretrieve_products
+from src.agents.workflows.faq_workflow import aretrieve_faq
 from pydantic import BaseModel, Field
 
 class RouteQuery(BaseModel):
@@ -12,16 +15,60 @@ prompt_path = Path(__file__).parent.parent / "prompts/orchestrator.txt"
 with open(prompt_path, 'r', encoding='utf-8') as f:
     prompt_template = f.read()
 
+def llm_route(user_question: str) -> str:
+    """Route with the LLM intent classifier."""
+    return get_structured_model(RouteQuery).invoke(prompt_template.format(user_question=user_question)).route
+
+async def allm_route(user_question: str) -> str:
+    return (await get_structured_model(RouteQuery).ainvoke(prompt_template.format(user_question=user_question))).route
+
+def _confident(prediction) -> bool:
+    confident = prediction.confidence >= config.INTENT_CONFIDENCE_THRESHOLD
+    print(f"Local intent: {prediction.route} ({prediction.method}, confidence {prediction.confidence:.2f})"
+          f"{'' if confident else ' -> asking LLM router'}")
+    return confident
+
 def orchestrator_node(state: AgentState) -> dict:
     """Determines the user's intent and decides the route."""
     print("--- Executing Orchestrator Node ---")
     user_question = state.messages[-1].content
 
-    llm = ChatGoogleGenerativeAI(api_key=config.GOOGLE_API_KEY, model="gemini-2.5-flash-lite").with_structured_output(RouteQuery)
+    # Confident local predictions skip the LLM round trip
+    route = None
+    if config.INTENT_CLASSIFIER:
+        prediction = get_intent_classifier().classify(user_question)
+        if _confident(prediction):
+            route = prediction.route
+    if route is None:
+        route = llm_route(user_question)
+
+    print(f"Intent determined: {route}")
+    return {"route": route}
+
+async def aorchestrator_node(state: AgentState) -> dict:
+    """
+    Async orchestrator_node used by ainvoke/astream. With SPECULATIVE_RETRIEVAL,
+    turns that need the LLM router retrieve for both routes while it runs.
+    """
+    print("--- Executing Orchestrator Node ---")
+    user_question = state.messages[-1].content
+
+    route = None
+    if config.INTENT_CLASSIFIER:
+        prediction = await get_intent_classifier().aclassify(user_question)
+        if _confident(prediction):
+            route = prediction.route
 
-    # Format the prompt and invoke the LLM
-    formatted_prompt = prompt_template.format(user_question=user_question)
-    response = llm.invoke(formatted_prompt)
+    update = {}
+    if route is None and config.SPECULATIVE_RETRIEVAL:
+        # Retrieve for both routes while the LLM decides; keep only the chosen one
+        route, prefetched = await speculate(allm_route(user_question), {
+            "product_search": lambda: aretrieve_products(state),
+            "faq": lambda: aretrieve_faq(state),
+        })
+        update["prefetched_results"] = prefetched
+    elif route is None:
+        route = await allm_route(user_question)
 
-    print(f"Intent determined: {response.route}")
-    return {"route": response.route}
\ No newline at end of file
+    print(f"Intent determined: {route}")
+    return {"route": route, **update}
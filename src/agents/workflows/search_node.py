@@ -15,4 +15,23 @@ def search_node(state: AgentState)-> dict:
         "conversation_history": conversation_history
     })
     
+    return {"search_results": search_results}
+
+async def aretrieve_products(state: AgentState) -> list:
+    """Refine and search for the last message; also started speculatively by the orchestrator"""
+    return await product_search_tool.ainvoke({
+        "query": state.messages[-1].content,
+        "conversation_history": getattr(state, "prior_conversation", "")
+    })
+
+async def asearch_node(state: AgentState) -> dict:
+    """Async search_node: the tool's coroutine refines and searches without blocking"""
+    print("--- Executing Conversation-Aware Search Node ---")
+    
+    # Results retrieved while the orchestrator was routing are used once
+    if state.prefetched_results is not None:
+        return {"search_results": state.prefetched_results, "prefetched_results": None}
+    
+    search_results = await aretrieve_products(state)
+    
     return {"search_results": search_results}
\ No newline at end of file
@@ -1,5 +1,18 @@
 from src.agents.schemas.agent_state import AgentState
-from langchain_core.messages import AIMessage, HumanMessage
+from typing import List
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+
+def format_conversation(messages: List[BaseMessage]) -> str:
+    """Format messages as "HUMAN: ..." / "AI: ..." lines."""
+    conversation = []
+    for message in messages:
+        if message.type == "human":
+            conversation.append(f"HUMAN: {message.content}")
+        elif message.type == "ai":
+            conversation.append(f"AI: {message.content}")
+    
+    return "\n".join(conversation)
+
 
 def load_conversation_memory(state: AgentState) -> dict:
     """
@@ -11,14 +24,7 @@ def load_conversation_memory(state: AgentState) -> dict:
     # Get the last 4 messages (or all if less than 4)
     last_msgs = state.messages[-4:] if len(state.messages) >= 4 else state.messages
     
-    conversation = []
-    for message in last_msgs:
-        if message.type == "human":
-            conversation.append(f"HUMAN: {message.content}")
-        elif message.type == "ai":
-            conversation.append(f"AI: {message.content}")
-    
-    formatted_conversation = "\n".join(conversation)
+    formatted_conversation = format_conversation(last_msgs)
     
     print(f"Loaded conversation context: {len(last_msgs)} messages")
     
@@ -0,0 +1,7 @@
+"""
+Benchmarks for the E-commerce Personal Shopper Agent
+
+Each module is runnable with ``python -m src.benchmarks.<name>`` from the project
+root and prints a human-readable report; pass ``--output`` to also write the
+results as JSON so runs can be compared between commits.
+"""
@@ -0,0 +1,146 @@
+"""
+Micro-Batching Benchmark
+
+Simulates concurrent chat requests at the model layer: each request embeds a
+distinct query with the product embedding model and reranks candidates
+with the cross-encoder, all through the async path. The same load runs with
+MICRO_BATCHING off (one model call per request) and on (calls batched across
+requests); for each concurrency level the report shows throughput, latency
+percentiles and the mean batch size.
+
+With --simulate-ms CALL ITEM the models are replaced by stand-ins that sleep
+CALL ms per model call plus ITEM ms per text or pair, which isolates the
+batching gain from the hardware and needs no model download.
+
+Usage:
+    python -m src.benchmarks.batching --requests 64 --concurrency 1 8 32 --candidates 20 --output results/batching.json
+    python -m src.benchmarks.batching --simulate-ms 20 2
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import time
+from typing import Dict, List
+
+from qdrant_client.http import models
+
+from src.benchmarks.common import DB_PATH, latency_summary, load_evaluation_data, write_json
+from src.vector_db import batching
+from src.vector_db.config import config
+from src.vector_db.embedding import EmbeddingModel
+from src.vector_db.local_index import LocalVectorIndex
+from src.vector_db.model_registry import model_registry
+from src.vector_db.search import SemanticSearch
+from src.vector_db.vector_store import VectorStore
+
+
+def load_candidates(count: int) -> List[models.ScoredPoint]:
+    loader = VectorStore("", "", collection_name=config.PRODUCT_COLLECTION, client=LocalVectorIndex())
+    chunks = loader.chunk_products(loader.load_product_data_from_db(DB_PATH))[:count]
+    return [models.ScoredPoint(id=i, version=0, score=0.0, payload={'content': chunk['content']})
+            for i, chunk in enumerate(chunks)]
+
+
+class SimulatedEmbeddings:
+    """Embedding stand-in with a fixed per-call and per-text cost."""
+
+    def __init__(self, call_ms: float, item_ms: float):
+        self.call_ms, self.item_ms = call_ms, item_ms
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        time.sleep((self.call_ms + self.item_ms * len(texts)) / 1000)
+        return [[float(len(text)), 1.0] for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+
+class SimulatedCrossEncoder:
+    """Cross-encoder stand-in with a fixed per-call and per-pair cost."""
+
+    def __init__(self, call_ms: float, item_ms: float):
+        self.call_ms, self.item_ms = call_ms, item_ms
+
+    def predict(self, pairs: List[List[str]]) -> List[float]:
+        time.sleep((self.call_ms + self.item_ms * len(pairs)) / 1000)
+        return [float(len(pair[1]) % 7) for pair in pairs]
+
+
+def simulate_models(call_ms: float, item_ms: float) -> None:
+    """Register the stand-ins in place of the configured models."""
+    model_registry._models[("embedding", config.PRODUCT_EMBEDDING_MODEL)] = SimulatedEmbeddings(call_ms, item_ms)
+    # Rerank pairs are shorter than documents to embed
+    model_registry._models[("cross_encoder", config.RERANKER_MODEL)] = SimulatedCrossEncoder(call_ms, item_ms / 4)
+
+
+async def run_load(requests: int, concurrency: int, candidates: List[models.ScoredPoint],
+                   questions: List[str]) -> Dict:
+    # No query cache: every request must reach the model
+    embedding_model = EmbeddingModel(config.PRODUCT_EMBEDDING_MODEL)
+    search = SemanticSearch(vector_store=None)
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one_request(i: int) -> None:
+        query = f"{questions[i % len(questions)]} #{i}"
+        async with semaphore:
+            start = time.perf_counter()
+            await embedding_model.aembed_query(query)
+            await search._arerank(query, candidates)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one_request(i) for i in range(requests)))
+    wall_seconds = time.perf_counter() - start
+    return {
+        "throughput_rps": requests / wall_seconds,
+        "latency": latency_summary(latencies),
+        "batching": batching.batcher_stats(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput of batched vs. one-at-a-time model inference")
+    parser.add_argument("--requests", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--candidates", type=int, default=20, help="rerank pairs per request")
+    parser.add_argument("--simulate-ms", type=float, nargs=2, metavar=("CALL", "ITEM"),
+                        help="replace the models with stand-ins costing CALL ms per call plus ITEM ms per item")
+    parser.add_argument("--output", help="optional path of a JSON report")
+    args = parser.parse_args()
+
+    if args.simulate_ms:
+        simulate_models(*args.simulate_ms)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        candidates = load_candidates(args.candidates)
+    questions = [item['question'] for item in load_evaluation_data()]
+
+    # Load both models before timing
+    config.MICRO_BATCHING = False
+    asyncio.run(run_load(1, 1, candidates, questions))
+
+    results = {}
+    print(f"\n=== Micro-batching ({args.requests} requests, {args.candidates} rerank pairs each) ===")
+    print(f"{'mode':<10}{'conc.':>6}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'mean batch':>12}")
+    for batched in (False, True):
+        config.MICRO_BATCHING = batched
+        mode = "batched" if batched else "single"
+        for concurrency in args.concurrency:
+            batching._batchers.clear()
+            result = asyncio.run(run_load(args.requests, concurrency, candidates, questions))
+            results[f"{mode}/{concurrency}"] = result
+            mean_batch = max((stats["mean_batch_size"] for stats in result["batching"]
+                              if stats["name"].startswith("embed:")), default=1.0)
+            print(f"{mode:<10}{concurrency:>6}{result['throughput_rps']:>9.1f}"
+                  f"{result['latency']['p50_ms']:>9.1f}{result['latency']['p95_ms']:>9.1f}{mean_batch:>12.1f}")
+
+    if args.output:
+        write_json(args.output, {"requests": args.requests, "candidates": args.candidates,
+                                 "simulate_ms": args.simulate_ms, "results": results})
+
+
+if __name__ == "__main__":
+    main()
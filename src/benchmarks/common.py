@@ -0,0 +1,53 @@
+"""
+Shared helpers for the benchmark scripts.
+"""
+
+import json
+import math
+from pathlib import Path
+from typing import Any, Dict, List
+
+EVALUATION_DATA_PATH = "data/evaluation/evaluation_data.json"
+DB_PATH = "db/ecommerce_products.db"
+
+
+def load_evaluation_data(path: str = EVALUATION_DATA_PATH) -> List[Dict[str, str]]:
+    """Load the question -> expected product title pairs."""
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Nearest-rank percentile (q in 0..100); 0.0 for an empty list."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(q / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def latency_summary(seconds: List[float]) -> Dict[str, float]:
+    """Mean/p50/p95/p99 of a list of durations, in milliseconds."""
+    millis = [value * 1000 for value in seconds]
+    return {
+        "count": len(millis),
+        "mean_ms": sum(millis) / len(millis) if millis else 0.0,
+        "p50_ms": percentile(millis, 50),
+        "p95_ms": percentile(millis, 95),
+        "p99_ms": percentile(millis, 99),
+    }
+
+
+def rank_of(expected_title: str, titles: List[str]) -> int:
+    """1-based rank of the expected product title, or 0 when it is missing."""
+    for rank, title in enumerate(titles, start=1):
+        if title == expected_title:
+            return rank
+    return 0
+
+
+def write_json(path: str, results: Dict[str, Any]) -> None:
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2, ensure_ascii=False)
+    print(f"Results written to {path}")
@@ -0,0 +1,119 @@
+"""
+Evaluator Mode Benchmark
+
+Runs product search for every question in data/evaluation/evaluation_data.json
+(which the catalog can answer) and for a few requests for products the store
+does not sell, then compares the score-based evaluator (EVALUATOR_MODE=score)
+with the LLM evaluator on the same results. For each (accept, reject)
+threshold pair it reports the fraction of LLM evaluator calls removed, how
+often the score decision agrees with the LLM where it decides alone, and the
+distribution of top rerank scores to calibrate the thresholds with.
+
+Usage:
+    python -m src.benchmarks.evaluator --accept 0.3 0.5 0.7 --reject 0.01 0.05 --output results/evaluator.json
+"""
+
+import argparse
+import contextlib
+import io
+import itertools
+from typing import Dict, List
+
+from langchain_core.messages import HumanMessage
+
+from src.agents import config as agent_config
+from src.agents.llm import get_structured_model
+from src.agents.schemas.agent_state import AgentState
+from src.agents.schemas.evaluator_schemas import ResultReview
+from src.agents.tools.product_search import get_product_search
+from src.agents.workflows.evaluator_node import _evaluation_prompt, score_review
+from src.benchmarks.common import load_evaluation_data, percentile, write_json
+
+# Requests the catalog cannot satisfy, so the evaluators also see invalid results
+UNAVAILABLE_QUERIES = [
+    "show me running shoes", "I need a winter coat for women", "عاوز شنطة ضهر", "عندكم ساعات رجالي؟",
+    "do you sell sunglasses?", "محتاج فستان سواريه",
+]
+
+
+def collect(use_llm: bool) -> List[Dict]:
+    questions = [item["question"] for item in load_evaluation_data()] + UNAVAILABLE_QUERIES
+    search = get_product_search()
+    turns = []
+    for question in questions:
+        with contextlib.redirect_stdout(io.StringIO()):
+            results = search.search_with_filters(question, limit=10)
+        state = AgentState(messages=[HumanMessage(content=question)], search_results=results)
+        llm_valid = None
+        if use_llm and results:
+            llm_valid = get_structured_model(ResultReview).invoke(_evaluation_prompt(state)).is_valid
+        scores = [result.get("rerank_score") for result in results]
+        turns.append({"question": question, "results": results, "llm_valid": llm_valid,
+                      "top_rerank_score": max((s for s in scores if s is not None), default=None)})
+    return turns
+
+
+def evaluate(turns: List[Dict], accept: float, reject: float) -> Dict:
+    agent_config.RERANK_ACCEPT_SCORE, agent_config.RERANK_REJECT_SCORE = accept, reject
+    decided, agreed, dropped, evaluated = 0, 0, 0, 0
+    for turn in turns:
+        if not turn["results"]:
+            continue
+        evaluated += 1
+        review, kept = score_review(turn["results"])
+        dropped += len(turn["results"]) - len(kept)
+        if review is not None:
+            decided += 1
+            if turn["llm_valid"] is not None and review.is_valid == turn["llm_valid"]:
+                agreed += 1
+    with_llm = [turn for turn in turns if turn["llm_valid"] is not None]
+    return {
+        "llm_calls_removed": decided / evaluated if evaluated else 0.0,
+        "agreement_with_llm": agreed / decided if decided and with_llm else None,
+        "products_dropped": dropped,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the score-based and LLM search result evaluators")
+    parser.add_argument("--accept", type=float, nargs="+", default=[agent_config.RERANK_ACCEPT_SCORE])
+    parser.add_argument("--reject", type=float, nargs="+", default=[agent_config.RERANK_REJECT_SCORE])
+    parser.add_argument("--no-llm", action="store_true", help="only report how many calls are removed")
+    parser.add_argument("--output", help="optional path of a JSON report")
+    args = parser.parse_args()
+
+    turns = collect(use_llm=not args.no_llm)
+    empty = sum(1 for turn in turns if not turn["results"])
+    if empty == len(turns):
+        # Search errors are printed (and captured) inside collect(), not raised
+        raise SystemExit("Every product search returned no results; check that the embedding and rerank "
+                         "models are installed and the product collection is indexed")
+    top_scores = [turn["top_rerank_score"] for turn in turns if turn["top_rerank_score"] is not None]
+    llm_valid = [turn["llm_valid"] for turn in turns if turn["llm_valid"] is not None]
+
+    results = {
+        "turns": len(turns),
+        "turns_without_results": empty,
+        "llm_valid_rate": sum(llm_valid) / len(llm_valid) if llm_valid else None,
+        "top_rerank_score": {q: percentile(top_scores, q) for q in (5, 25, 50, 75, 95)},
+        "thresholds": {},
+    }
+    print(f"\n=== Evaluator modes ({len(turns)} turns, {empty} without results) ===")
+    print(f"top rerank score p5/p50/p95: {results['top_rerank_score'][5]:.3f} / "
+          f"{results['top_rerank_score'][50]:.3f} / {results['top_rerank_score'][95]:.3f}")
+    print(f"{'accept':>7} {'reject':>7} {'LLM calls removed':>18} {'agreement':>10} {'dropped':>8}")
+    for accept, reject in itertools.product(args.accept, args.reject):
+        if reject > accept:
+            continue
+        summary = evaluate(turns, accept, reject)
+        results["thresholds"][f"{accept}/{reject}"] = summary
+        agreement = summary["agreement_with_llm"]
+        print(f"{accept:>7.2f} {reject:>7.2f} {summary['llm_calls_removed']:>18.1%} "
+              f"{'n/a' if agreement is None else f'{agreement:.1%}':>10} {summary['products_dropped']:>8}")
+
+    if args.output:
+        write_json(args.output, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Agent Graph Load Benchmark
+
+Runs complete agent turns (orchestrator, retrieval, rerank, evaluator and
+generator) concurrently through ``app.ainvoke`` and reports turn latency and
+throughput. By default the LLM calls go to the local stub backend with a
+simulated latency, so the graph can be load-tested offline and results do not
+depend on API quotas; pass ``--provider gemini`` to measure the real service.
+
+Usage:
+    python -m src.benchmarks.graph_load --turns 200 --concurrency 20 --latency-ms 300 --output results/graph_load.json
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import itertools
+import time
+import uuid
+from collections import Counter
+
+from src.agents import config as agent_config
+from src.benchmarks.common import latency_summary, load_evaluation_data, write_json
+
+
+async def run_turns(turns: int, concurrency: int) -> dict:
+    # Imported after the provider settings are applied
+    from src.agents.checkpointing import thread_config
+    from src.agents.graph import app, turn_input
+
+    questions = itertools.cycle([item["question"] for item in load_evaluation_data()])
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, routes, errors = [], Counter(), 0
+
+    async def one_turn(question: str) -> None:
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                state = await app.ainvoke(turn_input(question), config=thread_config(str(uuid.uuid4())))
+                routes[state.get("route") or "none"] += 1
+                latencies.append(time.perf_counter() - start)
+            except Exception:
+                errors += 1
+
+    # Node progress prints would dominate the output
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        await asyncio.gather(*(one_turn(next(questions)) for _ in range(turns)))
+    wall_seconds = time.perf_counter() - start
+
+    return {
+        "turns": turns,
+        "concurrency": concurrency,
+        "errors": errors,
+        "routes": dict(routes),
+        "wall_seconds": wall_seconds,
+        "throughput_turns_per_s": len(latencies) / wall_seconds if wall_seconds else 0.0,
+        "latency": latency_summary(latencies),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the agent graph (offline with the stub LLM)")
+    parser.add_argument("--turns", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--provider", default="stub", choices=["stub", "gemini"])
+    parser.add_argument("--latency-ms", type=float, default=300.0, help="stub latency before the first output")
+    parser.add_argument("--token-latency-ms", type=float, default=0.0, help="stub latency per generated word")
+    parser.add_argument("--warmup", type=int, default=2, help="untimed turns that load the models first")
+    parser.add_argument("--output", help="optional path of a JSON report")
+    args = parser.parse_args()
+
+    agent_config.LLM_PROVIDER = args.provider
+    agent_config.STUB_LLM_LATENCY_MS = args.latency_ms
+    agent_config.STUB_LLM_TOKEN_LATENCY_MS = args.token_latency_ms
+
+    if args.warmup:
+        asyncio.run(run_turns(args.warmup, 1))
+    results = asyncio.run(run_turns(args.turns, args.concurrency))
+    results["provider"] = args.provider
+
+    print(f"\n=== Graph load ({args.provider}, {args.turns} turns, concurrency {args.concurrency}) ===")
+    print(f"throughput: {results['throughput_turns_per_s']:.2f} turns/s  errors: {results['errors']}  "
+          f"routes: {results['routes']}")
+    latency = results["latency"]
+    print(f"latency ms: mean {latency['mean_ms']:.0f}  p50 {latency['p50_ms']:.0f}  "
+          f"p95 {latency['p95_ms']:.0f}  p99 {latency['p99_ms']:.0f}")
+
+    if args.output:
+        write_json(args.output, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Intent Routing Benchmark
+
+Runs the local intent classifier and the LLM router on the held-out
+``evaluation`` split of data/evaluation/intent_data.json plus the product
+questions of data/evaluation/evaluation_data.json, and reports:
+
+- accuracy of both routers against the labels
+- agreement of the local classifier with the LLM router on the turns it
+  would answer by itself (confidence >= threshold)
+- the fraction of turns that skip the LLM, for a sweep of thresholds
+- latency of both routers
+- the softmax temperature fitted to the labeled examples
+
+With ``--no-llm`` only the local classifier runs (no API key needed).
+
+Usage:
+    python -m src.benchmarks.intent --thresholds 0.6 0.75 0.85 0.95 --output results/intent.json
+"""
+
+import argparse
+import time
+from typing import Dict, List
+
+from src.agents import config
+from src.agents.intent_classifier import IntentClassifier, load_intent_examples
+from src.agents.workflows.orchestrator import llm_route
+from src.benchmarks.common import latency_summary, load_evaluation_data, write_json
+
+
+def load_turns() -> List[Dict[str, str]]:
+    turns = load_intent_examples(split="evaluation")
+    turns += [{"question": item["question"], "intent": "product_search"} for item in load_evaluation_data()]
+    return turns
+
+
+def run(thresholds: List[float], use_llm: bool) -> dict:
+    turns = load_turns()
+    classifier = IntentClassifier()
+    # Embed the labeled examples before timing
+    classifier.centroids
+
+    local, local_seconds, llm, llm_seconds = [], [], [], []
+    for turn in turns:
+        start = time.perf_counter()
+        local.append(classifier.classify(turn["question"]))
+        local_seconds.append(time.perf_counter() - start)
+        if use_llm:
+            start = time.perf_counter()
+            llm.append(llm_route(turn["question"]))
+            llm_seconds.append(time.perf_counter() - start)
+
+    labels = [turn["intent"] for turn in turns]
+    results = {
+        "turns": len(turns),
+        "rule_fraction": sum(p.method == "rules" for p in local) / len(turns),
+        "temperature": classifier.temperature,
+        "local_accuracy": sum(p.route == label for p, label in zip(local, labels)) / len(turns),
+        "local_latency": latency_summary(local_seconds),
+        "thresholds": {},
+    }
+    if use_llm:
+        results["llm_accuracy"] = sum(route == label for route, label in zip(llm, labels)) / len(turns)
+        results["llm_latency"] = latency_summary(llm_seconds)
+
+    for threshold in thresholds:
+        confident = [i for i, p in enumerate(local) if p.confidence >= threshold]
+        # Turns below the threshold fall back to the LLM (or its label without one)
+        routed = [local[i].route if local[i].confidence >= threshold else (llm[i] if use_llm else labels[i])
+                  for i in range(len(turns))]
+        summary = {
+            "skip_llm_fraction": len(confident) / len(turns),
+            "confident_accuracy": (sum(local[i].route == labels[i] for i in confident) / len(confident)
+                                   if confident else None),
+            "end_to_end_accuracy": sum(route == label for route, label in zip(routed, labels)) / len(turns),
+        }
+        if use_llm:
+            summary["agreement_with_llm"] = (sum(local[i].route == llm[i] for i in confident) / len(confident)
+                                             if confident else None)
+        results["thresholds"][str(threshold)] = summary
+    return results
+
+
+def print_report(results: dict) -> None:
+    print(f"\nTurns: {results['turns']}  (decided by keyword rules: {results['rule_fraction']:.1%}, "
+          f"fitted temperature {results['temperature']:.4f})")
+    print(f"Local accuracy: {results['local_accuracy']:.1%}  p50 {results['local_latency']['p50_ms']:.2f} ms")
+    if "llm_accuracy" in results:
+        print(f"LLM accuracy:   {results['llm_accuracy']:.1%}  p50 {results['llm_latency']['p50_ms']:.0f} ms")
+    print(f"{'threshold':<12}{'skip LLM':>10}{'conf. acc':>11}{'LLM agree':>11}{'end-to-end':>12}")
+    for threshold, summary in results["thresholds"].items():
+        agreement = summary.get("agreement_with_llm")
+        confident_accuracy = summary["confident_accuracy"]
+        print(f"{threshold:<12}{summary['skip_llm_fraction']:>10.1%}"
+              f"{confident_accuracy if confident_accuracy is not None else float('nan'):>11.1%}"
+              f"{agreement if agreement is not None else float('nan'):>11.1%}"
+              f"{summary['end_to_end_accuracy']:>12.1%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the local intent classifier with the LLM router")
+    parser.add_argument("--thresholds", type=float, nargs="+",
+                        default=sorted({0.6, 0.75, config.INTENT_CONFIDENCE_THRESHOLD, 0.95}),
+                        help="Confidence thresholds to evaluate")
+    parser.add_argument("--no-llm", action="store_true", help="Only run the local classifier")
+    parser.add_argument("--output", default=None, help="Optional JSON output path")
+    args = parser.parse_args()
+
+    results = run(args.thresholds, use_llm=not args.no_llm)
+    print_report(results)
+    if args.output:
+        write_json(args.output, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Prompt Size Report
+
+Builds the evaluator and generator prompts for the product results of every
+question in data/evaluation/evaluation_data.json, once with the compact
+product projection the nodes use and once the way they were built before it
+(the evaluator stringified the raw results; the generator listed title and
+price), and reports the estimated tokens per node before and after.
+
+With --offline the results are consecutive windows of the processed catalog
+instead of search results, so no embedding or rerank model is needed.
+
+Usage:
+    python -m src.benchmarks.prompt_size --limit 10 --output results/prompt_size.json
+    python -m src.benchmarks.prompt_size --offline
+"""
+
+import argparse
+import contextlib
+import io
+import json
+from typing import Dict, List, Tuple
+
+from langchain_core.messages import HumanMessage
+
+from src.agents import config as agent_config
+from src.agents.projection import estimate_tokens
+from src.agents.schemas.agent_state import AgentState
+from src.agents.workflows.evaluator_node import _evaluation_prompt, evaluator_prompt_template
+from src.agents.workflows.generator_node import _generation_prompt, generator_prompt_template
+from src.benchmarks.common import load_evaluation_data, percentile, write_json
+
+PROCESSED_CHUNKS_PATH = "data/processed/all_chunks.json"
+
+
+def legacy_evaluation_prompt(question: str, results: List[Dict]) -> str:
+    return evaluator_prompt_template.format(user_query=question, prior_conversation="",
+                                            search_results=str(results[:10]))
+
+
+def legacy_generation_prompt(question: str, results: List[Dict]) -> str:
+    product_list = ""
+    for i, product in enumerate(results):
+        meta = product.get('metadata', {})
+        product_list += (f"{i+1}. Title: {meta.get('title', 'N/A')}, "
+                         f"Price: {meta.get('currency', '')} {meta.get('sale_price', 'N/A')}\n")
+    return generator_prompt_template.format(user_query=question, product_list=product_list or "No products found.",
+                                            prior_conversation="")
+
+
+def search_turns(limit: int) -> List[Tuple[str, List[Dict]]]:
+    from src.agents.tools.product_search import get_product_search
+
+    search = get_product_search()
+    turns = []
+    for item in load_evaluation_data():
+        with contextlib.redirect_stdout(io.StringIO()):
+            turns.append((item["question"], search.search_with_filters(item["question"], limit=limit)))
+    return turns
+
+
+def catalog_turns(limit: int) -> List[Tuple[str, List[Dict]]]:
+    with open(PROCESSED_CHUNKS_PATH, 'r', encoding='utf-8') as f:
+        chunks = json.load(f)
+    results = [{"score": 0.0, "content": chunk["page_content"], "metadata": chunk["metadata"]} for chunk in chunks]
+    questions = [item["question"] for item in load_evaluation_data()]
+    return [(question, results[i * limit % len(results):][:limit]) for i, question in enumerate(questions)]
+
+
+def token_summary(counts: List[int]) -> Dict[str, float]:
+    return {
+        "mean": sum(counts) / len(counts) if counts else 0.0,
+        "p50": percentile(counts, 50),
+        "p95": percentile(counts, 95),
+        "max": max(counts, default=0),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report evaluator and generator prompt sizes before/after projection")
+    parser.add_argument("--limit", type=int, default=10, help="products per turn")
+    parser.add_argument("--budget", type=int, default=agent_config.PRODUCT_PROMPT_TOKEN_BUDGET,
+                        help="PRODUCT_PROMPT_TOKEN_BUDGET to report with")
+    parser.add_argument("--offline", action="store_true", help="use catalog windows instead of search results")
+    parser.add_argument("--output", help="optional path of a JSON report")
+    args = parser.parse_args()
+
+    agent_config.PRODUCT_PROMPT_TOKEN_BUDGET = args.budget
+    turns = catalog_turns(args.limit) if args.offline else search_turns(args.limit)
+    turns = [(question, results) for question, results in turns if results]
+
+    counts = {node: {"before": [], "after": []} for node in ("evaluator", "generator")}
+    for question, results in turns:
+        state = AgentState(messages=[HumanMessage(content=question)], search_results=results,
+                           filtered_results=results, route="product_search")
+        counts["evaluator"]["before"].append(estimate_tokens(legacy_evaluation_prompt(question, results)))
+        counts["evaluator"]["after"].append(estimate_tokens(_evaluation_prompt(state)))
+        counts["generator"]["before"].append(estimate_tokens(legacy_generation_prompt(question, results)))
+        counts["generator"]["after"].append(estimate_tokens(_generation_prompt(state)))
+
+    report = {"turns": len(turns), "products_per_turn": args.limit, "token_budget": args.budget,
+              "source": "catalog" if args.offline else "search", "nodes": {}}
+    print(f"\n=== Estimated prompt tokens per turn ({len(turns)} turns, {args.limit} products, "
+          f"budget {args.budget}) ===")
+    print(f"{'node':<10} {'before mean':>12} {'after mean':>11} {'before p95':>11} {'after p95':>10} {'change':>8}")
+    for node, sizes in counts.items():
+        before, after = token_summary(sizes["before"]), token_summary(sizes["after"])
+        change = after["mean"] / before["mean"] - 1 if before["mean"] else 0.0
+        report["nodes"][node] = {"before": before, "after": after, "mean_change": change}
+        print(f"{node:<10} {before['mean']:>12.0f} {after['mean']:>11.0f} {before['p95']:>11.0f} "
+              f"{after['p95']:>10.0f} {change:>+8.1%}")
+
+    if args.output:
+        write_json(args.output, report)
+
+
+if __name__ == "__main__":
+    main()
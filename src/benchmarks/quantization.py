@@ -0,0 +1,152 @@
+"""
+Quantization Benchmark
+
+Compares recall and search latency of unquantized, int8 and binary quantized
+product collections on data/evaluation/evaluation_data.json. The catalog is
+embedded once and loaded into in-process LocalVectorIndex collections, so the
+comparison isolates the index and needs no Qdrant instance.
+
+With --synthetic ROWS the collections hold ROWS clustered random vectors of
+the product model's dimension instead (a shared offset makes them
+anisotropic, like sentence embeddings), and the queries are noisy copies of
+random rows. No embedding model is needed, so memory, latency and recall
+against exact search can be measured at catalog sizes the shop does not have
+yet; hit rate and MRR need the real catalog and are left out.
+
+Usage:
+    python -m src.benchmarks.quantization --top-k 10 --oversampling 2.0 --output results/quantization.json
+    python -m src.benchmarks.quantization --synthetic 100000 --oversampling 1.0 2.0 4.0
+"""
+
+import argparse
+import time
+import uuid
+from typing import Dict, List, Optional
+
+import numpy as np
+from qdrant_client.http import models
+
+from src.benchmarks.common import DB_PATH, latency_summary, load_evaluation_data, rank_of, write_json
+from src.vector_db.config import config
+from src.vector_db.local_index import LocalVectorIndex
+from src.vector_db.vector_store import VectorStore
+
+QUANTIZATIONS = ["none", "int8", "binary"]
+
+
+def build_store(quantization: str, points: List[models.PointStruct]) -> VectorStore:
+    store = VectorStore("", "", collection_name=config.PRODUCT_COLLECTION, client=LocalVectorIndex())
+    store.create_collection(vector_size=len(points[0].vector), quantization=quantization)
+    store.client.upsert(collection_name=store.collection_name, points=points)
+    return store
+
+
+def catalog_points():
+    """Points of the embedded catalog, the query vectors and their expected titles."""
+    loader = VectorStore("", "", collection_name=config.PRODUCT_COLLECTION, client=LocalVectorIndex())
+    chunks = loader.chunk_products(loader.load_product_data_from_db(DB_PATH))
+    print(f"Embedding {len(chunks)} products with {loader.embedding_model.model_name}...")
+    vectors = loader.embedding_model.embed_documents([chunk['content'] for chunk in chunks])
+    points = [loader._make_point(chunk, vector) for chunk, vector in zip(chunks, vectors)]
+
+    questions = load_evaluation_data()
+    query_vectors = [loader.embedding_model.embed_query(item['question']) for item in questions]
+    return points, query_vectors, [item['expected_id'] for item in questions]
+
+
+def synthetic_points(rows: int, queries: int, dim: int, seed: int = 0):
+    """Clustered random points with a shared offset, and noisy copies of random rows as queries."""
+    rng = np.random.default_rng(seed)
+    offset = rng.normal(size=dim)
+    centers = rng.normal(size=(max(1, rows // 50), dim))
+    vectors = offset + centers[rng.integers(len(centers), size=rows)] + 0.5 * rng.normal(size=(rows, dim))
+    query_vectors = vectors[rng.integers(rows, size=queries)] + 0.5 * rng.normal(size=(queries, dim))
+    points = [models.PointStruct(id=str(uuid.UUID(int=row)), vector=vector, payload={"metadata": {}})
+              for row, vector in enumerate(vectors.astype(np.float32).tolist())]
+    return points, query_vectors.tolist(), None
+
+
+def run(points: List[models.PointStruct], query_vectors: List[List[float]], expected: Optional[List[str]],
+        top_k: int, oversamplings: List[float], repeats: int) -> Dict[str, dict]:
+    results: Dict[str, dict] = {}
+    exact_ids: List[List[str]] = []
+    for quantization in QUANTIZATIONS:
+        store = build_store(quantization, points)
+        info = store.client.get_collection(store.collection_name)
+        # Oversampling only applies to the quantized modes
+        for oversampling in (oversamplings if quantization != "none" else [1.0]):
+            search_params = models.SearchParams(
+                quantization=models.QuantizationSearchParams(rescore=True, oversampling=oversampling)
+            )
+            latencies, hits, reciprocal_ranks, overlaps = [], 0, 0.0, []
+
+            for i, query_vector in enumerate(query_vectors):
+                for _ in range(repeats):
+                    start = time.perf_counter()
+                    points_found = store.client.query_points(
+                        collection_name=store.collection_name,
+                        query=query_vector,
+                        limit=top_k,
+                        search_params=search_params
+                    ).points
+                    latencies.append(time.perf_counter() - start)
+
+                ids = [str(point.id) for point in points_found]
+                if quantization == "none":
+                    exact_ids.append(ids)
+                overlaps.append(len(set(ids) & set(exact_ids[i])) / max(1, len(exact_ids[i])))
+
+                if expected is not None:
+                    rank = rank_of(expected[i], [point.payload['metadata'].get('title') for point in points_found])
+                    if rank:
+                        hits += 1
+                        reciprocal_ranks += 1 / rank
+
+            name = quantization if quantization == "none" else f"{quantization}@{oversampling:g}"
+            results[name] = {
+                "quantization": quantization,
+                "oversampling": oversampling if quantization != "none" else None,
+                "hit_rate": hits / len(query_vectors) if expected is not None else None,
+                "mrr": reciprocal_ranks / len(query_vectors) if expected is not None else None,
+                "recall_vs_exact": sum(overlaps) / len(overlaps),
+                "search_memory_bytes": info["search_memory_bytes"],
+                "latency": latency_summary(latencies),
+            }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare quantized and unquantized product collections")
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--oversampling", type=float, nargs="+", default=[config.QUANTIZATION_OVERSAMPLING],
+                        help="oversampling factors to try for the quantized modes")
+    parser.add_argument("--repeats", type=int, default=20, help="timed searches per question")
+    parser.add_argument("--synthetic", type=int, metavar="ROWS",
+                        help="search ROWS synthetic vectors instead of the embedded catalog")
+    parser.add_argument("--queries", type=int, default=100, help="synthetic queries (with --synthetic)")
+    parser.add_argument("--output", help="optional path of a JSON report")
+    args = parser.parse_args()
+
+    if args.synthetic:
+        points, query_vectors, expected = synthetic_points(args.synthetic, args.queries, config.PRODUCT_VECTOR_SIZE)
+    else:
+        points, query_vectors, expected = catalog_points()
+    results = run(points, query_vectors, expected, args.top_k, args.oversampling, args.repeats)
+
+    source = f"{args.synthetic} synthetic vectors" if args.synthetic else f"{len(points)} catalog products"
+    print(f"\n=== Quantization benchmark ({source}, {len(query_vectors)} queries, top-{args.top_k}) ===")
+    print(f"{'mode':<12} {'hit@k':>7} {'MRR':>7} {'recall':>7} {'memory':>10} {'mean ms':>8} {'p95 ms':>8}")
+    for mode, result in results.items():
+        hit_rate = f"{result['hit_rate']:.2%}" if result['hit_rate'] is not None else "-"
+        mrr = f"{result['mrr']:.4f}" if result['mrr'] is not None else "-"
+        print(f"{mode:<12} {hit_rate:>7} {mrr:>7} {result['recall_vs_exact']:>7.2%} "
+              f"{result['search_memory_bytes'] / 1024:>8.0f}KB {result['latency']['mean_ms']:>8.3f} "
+              f"{result['latency']['p95_ms']:>8.3f}")
+
+    if args.output:
+        write_json(args.output, {"source": source, "queries": len(query_vectors), "top_k": args.top_k,
+                                 "results": results})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+Retrieval Quality and Latency Benchmark
+
+Runs every question of data/evaluation/evaluation_data.json through
+``ProductSearch`` and reports recall@k and MRR of the expected product
+together with per-stage latency percentiles (query embedding, vector query,
+lexical query, rerank) and end-to-end search latency.
+
+It runs fully offline: the catalog from the SQLite database is embedded into
+an in-process LocalVectorIndex (and a temporary BM25 index), and the LLM
+provider is switched to the local stub so no code path can reach the network.
+Results are written as JSON with the current commit, so runs can be compared
+between commits with ``--compare``.
+
+Usage:
+    python -m src.benchmarks.retrieval --output results/retrieval.json
+    python -m src.benchmarks.retrieval --compare results/retrieval.json --output results/retrieval_new.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import subprocess
+import tempfile
+import time
+from typing import Dict, List
+
+from src.agents import config as agent_config
+from src.benchmarks.common import DB_PATH, latency_summary, load_evaluation_data, rank_of, write_json
+from src.vector_db.config import config
+from src.vector_db.local_index import LocalVectorIndex
+from src.vector_db.profiling import profile
+from src.vector_db.search import ProductSearch
+from src.vector_db.vector_store import VectorStore
+
+RECALL_AT = (1, 5, 10)
+# Metrics compared by --compare: (key, higher is better)
+COMPARED = [("recall@1", True), ("recall@5", True), ("recall@10", True), ("mrr", True),
+            ("latency.p50_ms", False), ("latency.p95_ms", False)]
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def build_search() -> ProductSearch:
+    store = VectorStore("", "", collection_name=config.PRODUCT_COLLECTION, client=LocalVectorIndex())
+    with contextlib.redirect_stdout(io.StringIO()):
+        chunks = store.chunk_products(store.load_product_data_from_db(DB_PATH))
+    print(f"Embedding {len(chunks)} products with {store.embedding_model.model_name}...")
+    store.create_collection()
+    vectors = store.embedding_model.embed_documents([chunk['content'] for chunk in chunks])
+    store.client.upsert(
+        collection_name=store.collection_name,
+        points=[store._make_point(chunk, vector) for chunk, vector in zip(chunks, vectors)]
+    )
+    with contextlib.redirect_stdout(io.StringIO()):
+        store.build_lexical_index()
+    return ProductSearch(store)
+
+
+def run(top_k: int, repeats: int, use_filters: bool) -> dict:
+    # Offline: stub LLM, and a throwaway lexical index directory
+    agent_config.LLM_PROVIDER = "stub"
+    config.LEXICAL_INDEX_PATH = tempfile.mkdtemp(prefix="retrieval-benchmark-")
+    search = build_search()
+    # Every timed search must embed its query
+    search.vector_store.embedding_model.query_cache = None
+
+    questions = load_evaluation_data()
+    # Load the reranker before timing
+    search.search(questions[0]['question'], limit=top_k)
+
+    stages: Dict[str, List[float]] = {}
+    totals, per_question = [], []
+    hits = {k: 0 for k in RECALL_AT}
+    reciprocal_ranks = 0.0
+    for item in questions:
+        for _ in range(repeats):
+            with profile() as stage_times, contextlib.redirect_stdout(io.StringIO()):
+                start = time.perf_counter()
+                if use_filters:
+                    results = search.search_with_filters(item['question'], limit=top_k)
+                else:
+                    results = search.search(item['question'], limit=top_k)
+                totals.append(time.perf_counter() - start)
+            for stage, seconds in stage_times.items():
+                stages.setdefault(stage, []).append(sum(seconds))
+
+        rank = rank_of(item['expected_id'], [result['metadata'].get('title') for result in results])
+        for k in RECALL_AT:
+            hits[k] += 1 if rank and rank <= k else 0
+        reciprocal_ranks += 1 / rank if rank else 0.0
+        per_question.append({"question": item['question'], "expected": item['expected_id'], "rank": rank})
+
+    return {
+        "commit": git_commit(),
+        "settings": {
+            "top_k": top_k,
+            "repeats": repeats,
+            "filters": use_filters,
+            "hybrid": config.HYBRID_SEARCH,
+            "quantization": config.QUANTIZATION,
+            "embedding_model": config.PRODUCT_EMBEDDING_MODEL,
+            "reranker_model": config.RERANKER_MODEL,
+        },
+        "questions": len(questions),
+        **{f"recall@{k}": hits[k] / len(questions) for k in RECALL_AT},
+        "mrr": reciprocal_ranks / len(questions),
+        "latency": latency_summary(totals),
+        "stages": {stage: latency_summary(seconds) for stage, seconds in stages.items()},
+        "per_question": per_question,
+    }
+
+
+def _metric(results: dict, key: str) -> float:
+    value = results
+    for part in key.split("."):
+        value = value[part]
+    return value
+
+
+def print_report(results: dict, baseline: dict = None) -> None:
+    print(f"\n=== Retrieval benchmark @ {results['commit']} ({results['questions']} questions) ===")
+    print("  ".join(f"recall@{k}: {results[f'recall@{k}']:.2%}" for k in RECALL_AT) + f"  MRR: {results['mrr']:.4f}")
+    print(f"{'stage':<16}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+    for stage, summary in [*results["stages"].items(), ("total", results["latency"])]:
+        print(f"{stage:<16}{summary['p50_ms']:>9.2f}{summary['p95_ms']:>9.2f}{summary['p99_ms']:>9.2f}")
+
+    if baseline:
+        print(f"\nCompared with {baseline.get('commit', 'baseline')}:")
+        for key, higher_is_better in COMPARED:
+            before, after = _metric(baseline, key), _metric(results, key)
+            delta = after - before
+            better = delta > 0 if higher_is_better else delta < 0
+            print(f"  {key:<16}{before:>10.4f} -> {after:>10.4f}  "
+                  f"({delta:+.4f}{'' if delta == 0 else ', better' if better else ', worse'})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline recall/MRR and per-stage latency of product search")
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--repeats", type=int, default=3, help="timed searches per question")
+    parser.add_argument("--filters", action="store_true", help="use search_with_filters like the agent does")
+    parser.add_argument("--compare", help="JSON report of an earlier run to compare against")
+    parser.add_argument("--output", help="optional path of a JSON report")
+    args = parser.parse_args()
+
+    results = run(args.top_k, args.repeats, args.filters)
+    baseline = None
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+    print_report(results, baseline)
+
+    if args.output:
+        write_json(args.output, results)
+
+
+if __name__ == "__main__":
+    main()
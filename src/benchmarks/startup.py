@@ -0,0 +1,118 @@
+"""
+Startup Import-Time Benchmark
+
+Imports a module (``api`` by default) in a fresh interpreter with
+``python -X importtime`` and reports where the start-up time goes: total
+import time, the slowest top-level packages (cumulative) and whether any of
+the heavy dependencies that should load lazily were imported. With
+``--budget-ms`` the script exits non-zero when the import is slower than the
+budget or a lazy dependency was imported eagerly, so it can gate CI.
+
+Usage:
+    python -m src.benchmarks.startup --module api --top 15 --budget-ms 4000 --output results/startup.json
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, List
+
+from src.benchmarks.common import write_json
+
+# Dependencies that must not be imported until a request needs them
+LAZY_DEPENDENCIES = ["langchain_google_genai", "sentence_transformers", "qdrant_client", "bs4", "torch"]
+
+_PROBE = """
+import json, sys
+import {module}
+print(json.dumps(sorted(name for name in {lazy!r} if name in sys.modules)))
+"""
+
+
+def parse_importtime(stderr: str) -> List[Dict[str, object]]:
+    """Parse ``-X importtime`` lines into {module, self_us, cumulative_us, depth}."""
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+            entries.append({
+                "module": name.strip(),
+                "self_us": int(self_us),
+                "cumulative_us": int(cumulative_us),
+                # Nesting is shown with two spaces per level
+                "depth": (len(name) - len(name.lstrip(" ")) - 1) // 2,
+            })
+        except ValueError:
+            continue
+    return entries
+
+
+def run(module: str, top: int) -> dict:
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _PROBE.format(module=module, lazy=LAZY_DEPENDENCIES)],
+        capture_output=True, text=True
+    )
+    wall_seconds = time.perf_counter() - start
+    if proc.returncode != 0:
+        raise RuntimeError(f"Importing '{module}' failed:\n{proc.stderr[-2000:]}")
+
+    entries = parse_importtime(proc.stderr)
+    eager = json.loads(proc.stdout.strip().splitlines()[-1])
+
+    # Attribute self time to top-level packages so the breakdown stays readable
+    by_package: Dict[str, int] = defaultdict(int)
+    for entry in entries:
+        by_package[entry["module"].split(".")[0]] += entry["self_us"]
+    packages = sorted(by_package.items(), key=lambda item: item[1], reverse=True)[:top]
+
+    target = next((entry for entry in entries if entry["module"] == module), None)
+    return {
+        "module": module,
+        "python": sys.version.split()[0],
+        "wall_ms": wall_seconds * 1000,
+        "import_ms": (target["cumulative_us"] if target else sum(e["self_us"] for e in entries)) / 1000,
+        "modules_imported": len(entries),
+        "top_packages_ms": {name: us / 1000 for name, us in packages},
+        "eager_lazy_dependencies": eager,
+    }
+
+
+def print_report(results: dict) -> None:
+    print(f"\nImport of '{results['module']}': {results['import_ms']:.0f} ms "
+          f"({results['modules_imported']} modules, process wall {results['wall_ms']:.0f} ms)")
+    print(f"{'package':<32}{'self ms':>10}")
+    for name, millis in results["top_packages_ms"].items():
+        print(f"{name:<32}{millis:>10.1f}")
+    eager = results["eager_lazy_dependencies"]
+    print(f"Lazy dependencies imported eagerly: {', '.join(eager) if eager else 'none'}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report the import-time breakdown of the API start-up path")
+    parser.add_argument("--module", default="api", help="Module to import")
+    parser.add_argument("--top", type=int, default=15, help="Number of top-level packages to list")
+    parser.add_argument("--budget-ms", type=float, default=None,
+                        help="Fail when the import takes longer or a lazy dependency is imported")
+    parser.add_argument("--output", default=None, help="Optional JSON output path")
+    args = parser.parse_args()
+
+    results = run(args.module, args.top)
+    print_report(results)
+    if args.output:
+        write_json(args.output, results)
+
+    if args.budget_ms is not None:
+        over_budget = results["import_ms"] > args.budget_ms
+        if over_budget or results["eager_lazy_dependencies"]:
+            print(f"Start-up budget of {args.budget_ms:.0f} ms exceeded or lazy dependencies imported eagerly")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+Cross-Request Micro-Batching
+
+Concurrent requests each embed one query and rerank a few dozen pairs; run one
+at a time, CPU inference spends most of its time on per-call overhead. A
+``MicroBatcher`` collects the items submitted by concurrent coroutines and
+runs them as one model call on the model executor when either
+``max_batch_size`` items are waiting or ``max_wait_ms`` has passed since the
+first one arrived, then hands every caller its own slice of the results.
+
+A lone request therefore waits at most ``max_wait_ms`` extra, while under load
+batches fill up and throughput grows with concurrency. Batchers are used from
+the async path only (the sync path calls the models directly) and belong to
+the event loop they were first used on.
+"""
+
+import asyncio
+import weakref
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .model_registry import run_model
+
+
+class MicroBatcher:
+    """Batch items from concurrent callers into calls of ``process(items) -> results``."""
+
+    def __init__(self, process: Callable[[List[Any]], List[Any]], max_batch_size: int = 32,
+                 max_wait_ms: float = 3.0, name: str = "batch"):
+        self.process = process
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.name = name
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pending: List[Tuple[List[Any], asyncio.Future]] = []
+        self._pending_items = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        # Strong references so running batches are not garbage collected
+        self._running: set = set()
+        self.batches = 0
+        self.items = 0
+        self.max_observed = 0
+
+    async def submit(self, item: Any) -> Any:
+        """Result for a single item."""
+        return (await self.submit_many([item]))[0]
+
+    async def submit_many(self, items: List[Any]) -> List[Any]:
+        """Results for ``items``, computed in one batch with other callers' items."""
+        if not items:
+            return []
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._reset(loop)
+
+        future = loop.create_future()
+        self._pending.append((list(items), future))
+        self._pending_items += len(items)
+        if self._pending_items >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait_ms / 1000, self._flush)
+        return await future
+
+    def _reset(self, loop: asyncio.AbstractEventLoop) -> None:
+        # Futures of another (finished) loop can never be awaited again
+        self._loop = loop
+        self._pending, self._pending_items, self._timer = [], 0, None
+        self._running = set()
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending, self._pending_items = self._pending, [], 0
+        if batch:
+            task = self._loop.create_task(self._run(batch))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _run(self, batch: List[Tuple[List[Any], asyncio.Future]]) -> None:
+        items = [item for request_items, _ in batch for item in request_items]
+        try:
+            results = await run_model(self.process, items)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        self.batches += 1
+        self.items += len(items)
+        self.max_observed = max(self.max_observed, len(items))
+        offset = 0
+        for request_items, future in batch:
+            if not future.done():
+                future.set_result(results[offset:offset + len(request_items)])
+            offset += len(request_items)
+
+    def stats(self) -> dict:
+        return {
+            "name": self.name,
+            "batches": self.batches,
+            "items": self.items,
+            "mean_batch_size": self.items / self.batches if self.batches else 0.0,
+            "max_batch_size_seen": self.max_observed,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait_ms,
+        }
+
+
+_batchers: Dict[str, MicroBatcher] = {}
+# Batchers owned by another object, listed in the stats while it is alive
+_owned_batchers: "weakref.WeakSet[MicroBatcher]" = weakref.WeakSet()
+
+
+def get_batcher(name: str, process: Callable[[List[Any]], List[Any]], max_batch_size: int) -> MicroBatcher:
+    """The shared batcher called ``name``, created with BATCH_MAX_WAIT_MS on first use."""
+    batcher = _batchers.get(name)
+    if batcher is None:
+        from .config import config
+        batcher = _batchers.setdefault(
+            name, MicroBatcher(process, max_batch_size=max_batch_size, max_wait_ms=config.BATCH_MAX_WAIT_MS, name=name)
+        )
+    return batcher
+
+
+def create_owned_batcher(name: str, process: Callable[[List[Any]], List[Any]], max_batch_size: int) -> MicroBatcher:
+    """A batcher for the caller to keep, created with BATCH_MAX_WAIT_MS. It is
+    not shared, and is only tracked for batcher_stats while referenced."""
+    from .config import config
+    batcher = MicroBatcher(process, max_batch_size=max_batch_size, max_wait_ms=config.BATCH_MAX_WAIT_MS, name=name)
+    _owned_batchers.add(batcher)
+    return batcher
+
+
+def batcher_stats() -> List[dict]:
+    """Statistics of every live batcher in this process."""
+    return [batcher.stats() for batcher in list(_batchers.values()) + list(_owned_batchers)]
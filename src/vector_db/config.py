@@ -26,6 +26,11 @@ class VectorDBConfig:
         self.QDRANT_URL = os.getenv("QDRANT_URL", "")
         self.QDRANT_API_KEY = os.getenv("QDRANT_API_KEY", "")
         
+        # Vector backend: "qdrant" (remote Qdrant) or "local" (in-process NumPy index)
+        self.VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "qdrant").lower()
+        self.LOCAL_INDEX_PATH = os.getenv("LOCAL_INDEX_PATH", "data/vector_index")
+        self.LOCAL_INDEX_MMAP = os.getenv("LOCAL_INDEX_MMAP", "true").lower() == "true"
+        
         # Collection names
         self.PRODUCT_COLLECTION = os.getenv("PRODUCT_COLLECTION", "sutra_db")
         self.FAQ_COLLECTION = os.getenv("FAQ_COLLECTION", "faq")
@@ -34,12 +39,54 @@ class VectorDBConfig:
         self.FAQ_EMBEDDING_MODEL = os.getenv("FAQ_EMBEDDING_MODEL", "intfloat/multilingual-e5-small")
         self.PRODUCT_EMBEDDING_MODEL = os.getenv("PRODUCT_EMBEDDING_MODEL", "intfloat/multilingual-e5-large")
         
+        # Cross-encoder used to rerank product search candidates
+        self.RERANKER_MODEL = os.getenv("RERANKER_MODEL", "BAAI/bge-reranker-base")
+        
+        # Threads that run model inference for async requests (bounds CPU contention)
+        self.MODEL_EXECUTOR_WORKERS = int(os.getenv("MODEL_EXECUTOR_WORKERS", "2"))
+        
+        # Async requests' query embeddings and rerank pairs are batched across
+        # concurrent requests: a batch runs when it is full or after the wait
+        self.MICRO_BATCHING = os.getenv("MICRO_BATCHING", "true").lower() == "true"
+        self.BATCH_MAX_WAIT_MS = float(os.getenv("BATCH_MAX_WAIT_MS", "3"))
+        self.EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "32"))
+        self.RERANK_BATCH_SIZE = int(os.getenv("RERANK_BATCH_SIZE", "128"))
+        
+        # Load all models at API startup instead of on the first request
+        self.WARMUP_MODELS = os.getenv("WARMUP_MODELS", "false").lower() == "true"
+        
         # Vector dimensions (based on the embedding models)
         self.FAQ_VECTOR_SIZE = int(os.getenv("FAQ_VECTOR_SIZE", "384"))
         self.PRODUCT_VECTOR_SIZE = int(os.getenv("PRODUCT_VECTOR_SIZE", "1024"))
         
+        # Vector quantization for new collections: "none", "int8" or "binary";
+        # candidates are oversampled by this factor and rescored with the originals.
+        # Off by default: the catalog's float32 vectors fit in under 1 MB, and in
+        # src.benchmarks.quantization int8 was no faster; 4x oversampling kept
+        # the exact top-10 for int8 (2x lost 1-3%) and ~90% of it for binary
+        self.QUANTIZATION = os.getenv("QUANTIZATION", "none").lower()
+        self.QUANTIZATION_OVERSAMPLING = float(os.getenv("QUANTIZATION_OVERSAMPLING", "4.0"))
+        
+        # Hybrid search: BM25 index stored next to the vector index, fused with
+        # dense results by reciprocal rank fusion (score = sum 1 / (RRF_K + rank))
+        self.HYBRID_SEARCH = os.getenv("HYBRID_SEARCH", "true").lower() == "true"
+        self.LEXICAL_INDEX_PATH = os.getenv("LEXICAL_INDEX_PATH", "data/lexical_index")
+        self.RRF_K = int(os.getenv("RRF_K", "60"))
+        
         # Batch processing
         self.BATCH_SIZE = int(os.getenv("BATCH_SIZE", "64"))
+        
+        # Ingestion pipeline: embedding worker processes (1 = embed in-process)
+        # and how many embedded batches may wait for upsert at once
+        self.EMBEDDING_WORKERS = int(os.getenv("EMBEDDING_WORKERS", "1"))
+        self.UPSERT_QUEUE_SIZE = int(os.getenv("UPSERT_QUEUE_SIZE", "4"))
+        
+        # Persistent embedding cache (disabled when the directory is empty)
+        self.EMBEDDING_CACHE_DIR = os.getenv("EMBEDDING_CACHE_DIR", "")
+        self.EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "100000"))
+        
+        # In-memory LRU for query embeddings (0 disables it)
+        self.QUERY_CACHE_SIZE = int(os.getenv("QUERY_CACHE_SIZE", "2048"))
 
 
 # Global configuration instance
@@ -1,21 +1,128 @@
-
-from langchain_community.embeddings import HuggingFaceEmbeddings
-from typing import List, Union
+import atexit
+from typing import List, Optional, Union
+from .config import config
+from .model_registry import model_registry, run_model
+from .batching import create_owned_batcher
+from .embedding_cache import EmbeddingCache
+from .query_cache import QueryEmbeddingCache
 
 
 class EmbeddingModel:
     
-    def __init__(self, model_name: str = "intfloat/multilingual-e5-large"):
+    def __init__(self, model_name: str = "intfloat/multilingual-e5-large",
+                 cache: Optional[EmbeddingCache] = None,
+                 query_cache: Optional[QueryEmbeddingCache] = None):
         self.model_name = model_name
-        self.model = HuggingFaceEmbeddings(model_name=model_name)
+        self.cache = cache
+        self.query_cache = query_cache
+        self._model = None
+        # Query batcher, created on first use; batches go through this instance's caches
+        self._batcher = None
+    
+    @property
+    def model(self):
+        # Loaded on first use through the shared registry, so importing this
+        # module loads nothing and every user of a model shares one copy
+        if self._model is None:
+            self._model = model_registry.get_embeddings(self.model_name)
+        return self._model
     
     def embed_query(self, text: str) -> List[float]:
-        return self.model.embed_query(text)
+        embedding = self._cached_query(text)
+        return embedding if embedding is not None else self._compute_query(text)
+    
+    async def aembed_query(self, text: str) -> List[float]:
+        """
+        Like embed_query, but a cache miss is computed on the model executor,
+        batched with concurrent requests' queries when MICRO_BATCHING is on.
+        """
+        embedding = self._cached_query(text)
+        if embedding is not None:
+            return embedding
+        if config.MICRO_BATCHING:
+            if self._batcher is None:
+                self._batcher = create_owned_batcher(f"embed:{self.model_name}", self._compute_queries,
+                                                     config.EMBED_BATCH_SIZE)
+            return await self._batcher.submit(text)
+        return await run_model(self._compute_query, text)
+    
+    def _cached_query(self, text: str) -> Optional[List[float]]:
+        return self.query_cache.get(text) if self.query_cache is not None else None
+    
+    def _compute_query(self, text: str) -> List[float]:
+        embedding = self.cache.get(text) if self.cache is not None else None
+        if embedding is None:
+            embedding = self.model.embed_query(text)
+            if self.cache is not None:
+                self.cache.put(text, embedding)
+        
+        if self.query_cache is not None:
+            self.query_cache.put(text, embedding)
+        return embedding
+    
+    def _compute_queries(self, texts: List[str]) -> List[List[float]]:
+        """_compute_query for a batch of queries, embedded in one model call."""
+        embeddings = self.cache.get_many(texts) if self.cache is not None else [None] * len(texts)
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        if missing:
+            computed = self.model.embed_documents([texts[i] for i in missing])
+            if self.cache is not None:
+                self.cache.put_many([texts[i] for i in missing], computed)
+            for i, embedding in zip(missing, computed):
+                embeddings[i] = embedding
+        
+        if self.query_cache is not None:
+            for text, embedding in zip(texts, embeddings):
+                self.query_cache.put(text, embedding)
+        return embeddings
     
     def embed_documents(self, texts: List[str]) -> List[List[float]]:
-        return self.model.embed_documents(texts)
+        if self.cache is None:
+            return self.model.embed_documents(texts)
+        
+        embeddings = self.cache.get_many(texts)
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        if missing:
+            computed = self.model.embed_documents([texts[i] for i in missing])
+            self.cache.put_many([texts[i] for i in missing], computed)
+            for i, embedding in zip(missing, computed):
+                embeddings[i] = embedding
+        return embeddings
+    
+    def cache_stats(self) -> dict:
+        """Hit-rate statistics of the query LRU and the on-disk cache."""
+        return {
+            'model_name': self.model_name,
+            'query_cache': self.query_cache.stats() if self.query_cache is not None else None,
+            'disk_cache': self.cache.stats() if self.cache is not None else None
+        }
+
+
+def create_embedding_cache(model_name: str) -> Optional[EmbeddingCache]:
+    """Create the on-disk embedding cache for a model if EMBEDDING_CACHE_DIR is set."""
+    if not config.EMBEDDING_CACHE_DIR:
+        return None
+    cache = EmbeddingCache(config.EMBEDDING_CACHE_DIR, model_name, max_entries=config.EMBEDDING_CACHE_MAX_ENTRIES)
+    # Query-time additions are persisted when the process exits
+    atexit.register(cache.flush)
+    return cache
+
+
+def create_query_cache() -> Optional[QueryEmbeddingCache]:
+    """Create the in-memory query embedding LRU unless QUERY_CACHE_SIZE is 0."""
+    if config.QUERY_CACHE_SIZE <= 0:
+        return None
+    return QueryEmbeddingCache(max_size=config.QUERY_CACHE_SIZE)
 
 
-# Default embedding models
-faq_embedding_model = EmbeddingModel("intfloat/multilingual-e5-small")
-product_embedding_model = EmbeddingModel("intfloat/multilingual-e5-large")
\ No newline at end of file
+# Default embedding models (weights load on first use)
+faq_embedding_model = EmbeddingModel(
+    config.FAQ_EMBEDDING_MODEL,
+    cache=create_embedding_cache(config.FAQ_EMBEDDING_MODEL),
+    query_cache=create_query_cache()
+)
+product_embedding_model = EmbeddingModel(
+    config.PRODUCT_EMBEDDING_MODEL,
+    cache=create_embedding_cache(config.PRODUCT_EMBEDDING_MODEL),
+    query_cache=create_query_cache()
+)
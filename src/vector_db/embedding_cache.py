@@ -0,0 +1,292 @@
+"""
+Persistent Content-Addressed Embedding Cache
+
+Stores embeddings on disk so that rebuilding a collection, pointing the agent at
+a new Qdrant instance or re-running evaluations reuses vectors that were already
+computed. Each embedding model gets its own directory containing:
+
+- vectors.f32: memory-mapped float32 matrix (capacity x dim)
+- keys.bin:    memory-mapped 16-byte BLAKE2b digests of the embedded texts
+- ticks.i64:   memory-mapped last-access counters used for LRU eviction
+- meta.json:   model name, dimension, capacity, number of used rows, eviction
+               count and access counter
+- lock:        lock file serializing writers across processes
+
+Several processes may share a cache directory (API workers, the spawned
+ingestion workers). The memmaps are shared, and each process keeps its own
+key -> row index. Writers hold an exclusive ``flock`` on the lock file while
+they allocate rows. Before allocating, a writer picks up rows that other
+processes appended, or rebuilds its index if they evicted rows. It publishes
+the new size in meta.json right away. Reads check the stored key of a row,
+so a row another process has reused since is a miss, never another text's
+vector. Without ``fcntl`` (Windows) the cache is single-writer.
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process locking
+    fcntl = None
+
+
+KEY_SIZE = 16
+
+
+class EmbeddingCache:
+    """
+    Disk-backed LRU cache of embeddings keyed by (model name, text hash).
+
+    The model name selects the cache directory and the text hash selects the
+    row, so two models never share vectors. When ``max_entries`` is reached the
+    least recently used rows are overwritten.
+    """
+
+    def __init__(self, cache_dir: str, model_name: str, max_entries: int = 100_000):
+        self.model_name = model_name
+        self.max_entries = max(1, max_entries)
+        self.directory = Path(cache_dir) / re.sub(r"[^A-Za-z0-9_.-]+", "__", model_name)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self.dim: Optional[int] = None
+        self.size = 0
+        self._tick = 0
+        self._vectors = None
+        self._keys = None
+        self._ticks = None
+        self._index: Dict[bytes, int] = {}
+        # Evictions recorded in meta.json when the index was last synced with it
+        self._seen_evictions = 0
+        with self._file_lock():
+            self._load()
+
+    # ------------------------------------------------------------------ storage
+
+    @property
+    def _meta_path(self) -> Path:
+        return self.directory / "meta.json"
+
+    def _memmaps(self, dim: int, capacity: int, mode: str):
+        vectors = np.memmap(self.directory / "vectors.f32", dtype=np.float32, mode=mode, shape=(capacity, dim))
+        keys = np.memmap(self.directory / "keys.bin", dtype=np.uint8, mode=mode, shape=(capacity, KEY_SIZE))
+        ticks = np.memmap(self.directory / "ticks.i64", dtype=np.int64, mode=mode, shape=(capacity,))
+        return vectors, keys, ticks
+
+    @contextmanager
+    def _file_lock(self) -> Iterator[None]:
+        """Exclusive lock shared by every process using this cache directory."""
+        if fcntl is None:
+            yield
+            return
+        with open(self.directory / "lock", 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _read_meta(self) -> Optional[dict]:
+        if not self._meta_path.exists():
+            return None
+        with open(self._meta_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _write_meta(self) -> None:
+        meta = {
+            "model_name": self.model_name,
+            "dim": self.dim,
+            "capacity": self.max_entries,
+            "size": self.size,
+            "evictions": self._seen_evictions,
+            "tick": self._tick,
+        }
+        tmp_path = self._meta_path.with_suffix(".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, self._meta_path)
+
+    def _sync(self) -> None:
+        """Catch up with rows other processes wrote (call with the file lock held)."""
+        if self._vectors is None:
+            # Another process may have created the cache since we loaded
+            self._load()
+            return
+        meta = self._read_meta()
+        if meta is None or meta.get("capacity") != self.max_entries:
+            return
+        size = meta["size"]
+        self._tick = max(self._tick, meta.get("tick", 0))
+        if meta.get("evictions", 0) != self._seen_evictions:
+            self._index = {self._keys[row].tobytes(): row for row in range(size)}
+            self._seen_evictions = meta.get("evictions", 0)
+        elif size > self.size:
+            self._index.update((self._keys[row].tobytes(), row) for row in range(self.size, size))
+        self.size = max(self.size, size)
+
+    def _load(self) -> None:
+        try:
+            meta = self._read_meta()
+            if meta is None:
+                return
+            if meta.get("model_name") != self.model_name:
+                print(f"Embedding cache at {self.directory} belongs to another model, ignoring it")
+                return
+            dim, capacity, size = meta["dim"], meta["capacity"], meta["size"]
+            vectors, keys, ticks = self._memmaps(dim, capacity, "r+")
+        except Exception as e:
+            print(f"Error loading embedding cache from {self.directory}: {e}")
+            return
+
+        if capacity != self.max_entries:
+            # Keep the most recently used rows that fit into the new capacity
+            keep = np.argsort(ticks[:size])[::-1][:self.max_entries]
+            kept = (np.array(vectors[keep]), np.array(keys[keep]), np.array(ticks[keep]))
+            del vectors, keys, ticks
+            self._create(dim)
+            size = len(keep)
+            self._vectors[:size], self._keys[:size], self._ticks[:size] = kept
+        else:
+            self.dim = dim
+            self._vectors, self._keys, self._ticks = vectors, keys, ticks
+
+        self.size = size
+        self._tick = max(int(self._ticks[:size].max()) if size else 0, meta.get("tick", 0))
+        self._seen_evictions = meta.get("evictions", 0)
+        self._index = {self._keys[row].tobytes(): row for row in range(size)}
+        if capacity != self.max_entries:
+            # Rows moved: count it as an eviction so other processes rebuild their index
+            self._seen_evictions += 1
+            self._write_meta()
+
+    def _create(self, dim: int) -> None:
+        self.dim = dim
+        self.size = 0
+        self._vectors, self._keys, self._ticks = self._memmaps(dim, self.max_entries, "w+")
+        self._index = {}
+
+    def flush(self) -> None:
+        """Persist the memory-mapped arrays and the metadata."""
+        with self._lock, self._file_lock():
+            if self._vectors is None:
+                return
+            self._sync()
+            for array in (self._vectors, self._keys, self._ticks):
+                array.flush()
+            self._write_meta()
+
+    # ------------------------------------------------------------------ lookups
+
+    @staticmethod
+    def key(text: str) -> bytes:
+        return hashlib.blake2b(text.encode('utf-8'), digest_size=KEY_SIZE).digest()
+
+    def get(self, text: str) -> Optional[List[float]]:
+        return self.get_many([text])[0]
+
+    def get_many(self, texts: List[str]) -> List[Optional[List[float]]]:
+        results: List[Optional[List[float]]] = []
+        with self._lock:
+            for text in texts:
+                key = self.key(text)
+                row = self._index.get(key)
+                vector = None
+                if row is not None:
+                    vector = self._vectors[row].tolist()
+                    # The row may have been reused by another process
+                    if self._keys[row].tobytes() != key:
+                        del self._index[key]
+                        vector = None
+                if vector is None:
+                    self.misses += 1
+                    results.append(None)
+                    continue
+                self.hits += 1
+                self._tick += 1
+                self._ticks[row] = self._tick
+                results.append(vector)
+        return results
+
+    def put(self, text: str, vector: List[float]) -> None:
+        self.put_many([text], [vector])
+
+    def put_many(self, texts: List[str], vectors: List[List[float]]) -> None:
+        if not texts:
+            return
+        with self._lock, self._file_lock():
+            self._sync()
+            if self._vectors is None:
+                self._create(len(vectors[0]))
+
+            new_keys: Dict[bytes, List[float]] = {}
+            for text, vector in zip(texts, vectors):
+                key = self.key(text)
+                row = self._index.get(key)
+                if row is None:
+                    new_keys[key] = vector
+                else:
+                    self._tick += 1
+                    self._vectors[row] = vector
+                    self._ticks[row] = self._tick
+
+            rows = self._allocate_rows(len(new_keys))
+            for row, (key, vector) in zip(rows, new_keys.items()):
+                self._tick += 1
+                # Clear the key first so readers never pair it with the new vector
+                self._keys[row] = 0
+                self._vectors[row] = vector
+                self._keys[row] = np.frombuffer(key, dtype=np.uint8)
+                self._ticks[row] = self._tick
+                self._index[key] = row
+            # Publish the allocation before releasing the lock
+            self._write_meta()
+
+    def _allocate_rows(self, count: int) -> List[int]:
+        """Hand out free rows, evicting the least recently used ones if needed."""
+        count = min(count, self.max_entries)
+        used = self.size
+        free = min(count, self.max_entries - used)
+        rows = list(range(used, used + free))
+        self.size += free
+
+        needed = count - free
+        if needed > 0:
+            victims = np.argpartition(self._ticks[:used], needed - 1)[:needed]
+            for row in victims.tolist():
+                self._index.pop(self._keys[row].tobytes(), None)
+                rows.append(row)
+            self.evictions += needed
+            self._seen_evictions += needed
+        return rows
+
+    # ------------------------------------------------------------------ stats
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self) -> dict:
+        return {
+            "model_name": self.model_name,
+            "entries": self.size,
+            "capacity": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hit_rate,
+            "evictions": self.evictions,
+            "disk_bytes": self.max_entries * ((self.dim or 0) * 4 + KEY_SIZE + 8),
+        }
@@ -0,0 +1,211 @@
+"""
+Ingestion Pipeline for Vector Database Population
+
+Embeds documents in real batches (optionally across a pool of worker processes)
+and overlaps embedding with Qdrant upserts through a bounded queue, so that
+neither stage has to wait for the other to finish the whole catalog.
+
+This module deliberately avoids heavy imports at module level: worker processes
+are started with the ``spawn`` method and re-import it, and each worker only
+loads the single embedding model it needs.
+"""
+
+import os
+import queue
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List
+
+
+# Embedding model owned by a worker process (set by _init_worker)
+_worker_model = None
+
+
+def _init_worker(model_name: str, num_threads: int) -> None:
+    """Load the embedding model once per worker process."""
+    global _worker_model
+    import torch
+    from .model_registry import model_registry
+
+    torch.set_num_threads(max(1, num_threads))
+    _worker_model = model_registry.get_embeddings(model_name)
+
+
+def _embed_batch(texts: List[str]) -> List[List[float]]:
+    """Embed a batch of texts inside a worker process."""
+    return _worker_model.embed_documents(texts)
+
+
+class StageStats:
+    """Throughput counters for a single pipeline stage."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.documents = 0
+        self.seconds = 0.0
+
+    def add(self, documents: int, seconds: float) -> None:
+        self.documents += documents
+        self.seconds += seconds
+
+    @property
+    def docs_per_second(self) -> float:
+        return self.documents / self.seconds if self.seconds > 0 else 0.0
+
+    def __str__(self) -> str:
+        return f"{self.name}: {self.documents} docs in {self.seconds:.2f}s ({self.docs_per_second:.1f} docs/sec)"
+
+
+class IngestionPipeline:
+    """
+    Embeds and upserts documents in batches with embedding and upserting
+    running concurrently.
+
+    With ``num_workers > 1`` embedding is spread over a process pool where each
+    worker owns its own copy of the model and a share of the CPU threads.
+    Otherwise the batches are embedded in-process with ``embed_documents``.
+    """
+
+    def __init__(
+        self,
+        client,
+        collection_name: str,
+        embedding_model,
+        batch_size: int = 64,
+        num_workers: int = 1,
+        queue_size: int = 4,
+    ):
+        self.client = client
+        self.collection_name = collection_name
+        self.embedding_model = embedding_model
+        self.batch_size = max(1, batch_size)
+        self.num_workers = max(1, num_workers)
+        self.queue_size = max(1, queue_size)
+
+    def _upsert_worker(self, points_queue: queue.Queue, stats: StageStats, errors: list) -> None:
+        """Consume batches of points and upsert them until the sentinel arrives."""
+        batch_number = 0
+        while True:
+            points = points_queue.get()
+            if points is None:
+                return
+            if errors:
+                # Keep draining so the producer never blocks on a full queue
+                continue
+            try:
+                start = time.perf_counter()
+                self.client.upsert(collection_name=self.collection_name, points=points)
+                stats.add(len(points), time.perf_counter() - start)
+                batch_number += 1
+                print(f"✅ Inserted batch {batch_number} ({stats.documents} documents)")
+            except Exception as e:
+                errors.append(e)
+
+    def _embed_in_process(self, batches: List[List[str]]):
+        for texts in batches:
+            yield self.embedding_model.embed_documents(texts)
+
+    def _submit(self, executor, texts: List[str]):
+        """Send the texts that are not already cached to the worker pool."""
+        cache = getattr(self.embedding_model, 'cache', None)
+        cached = cache.get_many(texts) if cache is not None else [None] * len(texts)
+        missing = [text for text, vector in zip(texts, cached) if vector is None]
+        future = executor.submit(_embed_batch, missing) if missing else None
+        return cached, missing, future
+
+    def _collect(self, cached: list, missing: List[str], future) -> List[List[float]]:
+        if future is None:
+            return cached
+        computed = future.result()
+        cache = getattr(self.embedding_model, 'cache', None)
+        if cache is not None:
+            cache.put_many(missing, computed)
+        computed_iter = iter(computed)
+        return [vector if vector is not None else next(computed_iter) for vector in cached]
+
+    def _embed_with_pool(self, batches: List[List[str]]):
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+
+        threads_per_worker = max(1, (os.cpu_count() or 1) // self.num_workers)
+        with ProcessPoolExecutor(
+            max_workers=self.num_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self.embedding_model.model_name, threads_per_worker),
+        ) as executor:
+            # Keep a bounded number of batches in flight and yield them in order
+            pending = deque()
+            batch_iter = iter(batches)
+            for texts in batch_iter:
+                pending.append(self._submit(executor, texts))
+                if len(pending) >= self.num_workers * 2:
+                    break
+            while pending:
+                vectors = self._collect(*pending.popleft())
+                next_texts = next(batch_iter, None)
+                if next_texts is not None:
+                    pending.append(self._submit(executor, next_texts))
+                yield vectors
+
+    def run(self, documents: List[Dict[str, Any]], make_point: Callable[[Dict[str, Any], List[float]], Any]) -> Dict[str, StageStats]:
+        """
+        Embed and upsert ``documents``, returning per-stage throughput stats.
+
+        ``make_point`` turns a document and its vector into a ``PointStruct``.
+        """
+        doc_batches = [documents[i:i + self.batch_size] for i in range(0, len(documents), self.batch_size)]
+        text_batches = [[doc['content'] for doc in batch] for batch in doc_batches]
+
+        embed_stats = StageStats("embed")
+        upsert_stats = StageStats("upsert")
+        total_stats = StageStats("total")
+        errors: list = []
+
+        points_queue: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        upserter = threading.Thread(
+            target=self._upsert_worker,
+            args=(points_queue, upsert_stats, errors),
+            daemon=True,
+        )
+
+        start = time.perf_counter()
+        upserter.start()
+        try:
+            if self.num_workers > 1:
+                embedded = self._embed_with_pool(text_batches)
+            else:
+                embedded = self._embed_in_process(text_batches)
+
+            batch_start = time.perf_counter()
+            for batch, vectors in zip(doc_batches, embedded):
+                embed_stats.add(len(batch), time.perf_counter() - batch_start)
+                if errors:
+                    break
+                points = [make_point(doc, vector) for doc, vector in zip(batch, vectors)]
+                points_queue.put(points)
+                batch_start = time.perf_counter()
+        finally:
+            points_queue.put(None)
+            upserter.join()
+            cache = getattr(self.embedding_model, 'cache', None)
+            if cache is not None:
+                cache.flush()
+
+        if errors:
+            raise errors[0]
+
+        total_stats.add(len(documents), time.perf_counter() - start)
+        stats = {"embed": embed_stats, "upsert": upsert_stats, "total": total_stats}
+        self.print_report(stats)
+        return stats
+
+    def print_report(self, stats: Dict[str, StageStats]) -> None:
+        print(f"\n--- Ingestion throughput for '{self.collection_name}' "
+              f"(batch_size={self.batch_size}, workers={self.num_workers}) ---")
+        for stage in stats.values():
+            print(f"   {stage}")
+        cache = getattr(self.embedding_model, 'cache', None)
+        if cache is not None:
+            print(f"   embedding cache: {cache.hit_rate:.1%} hit rate ({cache.size} entries)")
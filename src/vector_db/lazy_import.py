@@ -0,0 +1,41 @@
+"""
+Deferred Module Imports
+
+Some dependencies take a noticeable share of process start-up (importing
+qdrant_client alone pulls in grpc and hundreds of pydantic models). Modules on
+the API import path bind them through ``lazy_module`` so the real import happens
+on first attribute access, i.e. when the first request actually needs them.
+Annotations that mention such modules are kept unevaluated with
+``from __future__ import annotations``.
+"""
+
+import importlib
+import threading
+from types import ModuleType
+
+
+class LazyModule:
+    """Proxy that imports ``name`` on first attribute access."""
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module = None
+        self._lock = threading.Lock()
+
+    def _load(self) -> ModuleType:
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    self._module = importlib.import_module(self._name)
+        return self._module
+
+    def __getattr__(self, attr: str):
+        return getattr(self._load(), attr)
+
+    def __repr__(self) -> str:
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<lazy module '{self._name}' ({state})>"
+
+
+def lazy_module(name: str) -> LazyModule:
+    return LazyModule(name)
@@ -0,0 +1,130 @@
+"""
+Lexical BM25 Index for Hybrid Search
+
+Dense retrieval misses queries that hinge on exact tokens such as model names
+("Game Over", "SOL", "V2"), size codes or Masri spellings. This module keeps a
+small BM25 index over the same documents as the vector collection and provides
+reciprocal rank fusion to merge lexical and dense rankings.
+
+Tokenization handles both Arabic and English: text is normalized with
+``normalize_text`` and split on non-word characters, Arabic tokens lose common
+attached prefixes (al-, wal-, bil-, ...) and English plurals lose a trailing "s".
+"""
+
+import json
+import math
+import os
+import re
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .text_normalization import normalize_text
+
+
+_TOKEN_SPLIT = re.compile(r"[^\w]+")
+_ARABIC_PREFIXES = ("وال", "بال", "كال", "فال", "لل", "ال")
+
+
+def _stem(token: str) -> str:
+    if token.isascii():
+        if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            return token[:-1]
+        return token
+    for prefix in _ARABIC_PREFIXES:
+        if token.startswith(prefix) and len(token) - len(prefix) >= 2:
+            return token[len(prefix):]
+    return token
+
+
+def tokenize(text: str) -> List[str]:
+    """Split normalized text into Arabic/English terms."""
+    return [_stem(token) for token in _TOKEN_SPLIT.split(normalize_text(text).replace("_", " ")) if token]
+
+
+class BM25Index:
+    """Okapi BM25 over a fixed set of documents identified by point id."""
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.ids: List[str] = []
+        self.doc_lengths: List[int] = []
+        self.postings: Dict[str, List[Tuple[int, int]]] = {}
+        self.avg_length = 0.0
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def build(self, documents: Iterable[Tuple[str, str]]) -> "BM25Index":
+        """Index ``(point_id, text)`` pairs, replacing any previous content."""
+        postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        self.ids, self.doc_lengths = [], []
+        for doc_index, (point_id, text) in enumerate(documents):
+            terms = tokenize(text)
+            self.ids.append(str(point_id))
+            self.doc_lengths.append(len(terms))
+            for term, frequency in Counter(terms).items():
+                postings[term].append((doc_index, frequency))
+        self.postings = dict(postings)
+        self.avg_length = sum(self.doc_lengths) / len(self.doc_lengths) if self.doc_lengths else 0.0
+        return self
+
+    def idf(self, term: str) -> float:
+        document_frequency = len(self.postings.get(term, ()))
+        return math.log(1 + (len(self.ids) - document_frequency + 0.5) / (document_frequency + 0.5))
+
+    def search(self, query: str, limit: int = 10) -> List[Tuple[str, float]]:
+        """Return up to ``limit`` ``(point_id, score)`` pairs, best first."""
+        scores: Dict[int, float] = defaultdict(float)
+        for term in set(tokenize(query)):
+            term_postings = self.postings.get(term)
+            if not term_postings:
+                continue
+            idf = self.idf(term)
+            for doc_index, frequency in term_postings:
+                length_norm = 1 - self.b + self.b * self.doc_lengths[doc_index] / (self.avg_length or 1.0)
+                scores[doc_index] += idf * frequency * (self.k1 + 1) / (frequency + self.k1 * length_norm)
+
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:limit]
+        return [(self.ids[doc_index], score) for doc_index, score in ranked]
+
+    def save(self, path: str) -> None:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        data = {
+            "k1": self.k1,
+            "b": self.b,
+            "ids": self.ids,
+            "doc_lengths": self.doc_lengths,
+            "postings": self.postings,
+        }
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "BM25Index":
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        index = cls(k1=data["k1"], b=data["b"])
+        index.ids = data["ids"]
+        index.doc_lengths = data["doc_lengths"]
+        index.postings = {term: [tuple(entry) for entry in entries] for term, entries in data["postings"].items()}
+        index.avg_length = sum(index.doc_lengths) / len(index.doc_lengths) if index.doc_lengths else 0.0
+        return index
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[str]], k: int = 60,
+                           limit: Optional[int] = None) -> List[Tuple[str, float]]:
+    """
+    Fuse several rankings of ids with RRF: score(d) = sum(1 / (k + rank_i(d))).
+
+    Returns ``(id, fused_score)`` pairs, best first.
+    """
+    fused: Dict[str, float] = defaultdict(float)
+    for ranking in rankings:
+        for rank, item_id in enumerate(ranking, start=1):
+            fused[item_id] += 1.0 / (k + rank)
+    ranked = sorted(fused.items(), key=lambda item: item[1], reverse=True)
+    return ranked[:limit] if limit is not None else ranked
@@ -0,0 +1,411 @@
+"""
+Local In-Process Vector Index
+
+A drop-in replacement for the subset of ``QdrantClient`` used by ``VectorStore``
+that keeps everything in the current process: normalized vectors live in a NumPy
+matrix (memory-mapped from disk when persisted) and payloads in a side store.
+Search is an exact cosine top-k using ``argpartition``, which for a catalog of a
+few thousand products takes well under a millisecond and needs no network.
+
+Collections created with a scalar (int8) or binary ``quantization_config`` keep
+compact codes in RAM for candidate selection and rescore the oversampled
+candidates with the original vectors, which can stay memory-mapped on disk.
+
+On-disk layout (one directory per collection under ``path``):
+
+- vectors.npy:    float32 matrix of L2-normalized vectors
+- ids.json:       point ids in row order
+- payloads.jsonl: one JSON payload per row
+- collection.json: vector size and quantization type
+"""
+
+import atexit
+import json
+import math
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import IO, Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+from qdrant_client.http import models
+
+from .query_filters import matches_filter
+
+
+def quantization_kind(quantization_config) -> Optional[str]:
+    """Map a Qdrant quantization config to "int8", "binary" or None."""
+    if isinstance(quantization_config, models.ScalarQuantization):
+        return "int8"
+    if isinstance(quantization_config, models.BinaryQuantization):
+        return "binary"
+    return None
+
+
+class _Collection:
+    """Vectors, ids and payloads of a single collection."""
+
+    def __init__(self, dim: int, quantization: Optional[str] = None):
+        self.dim = dim
+        self.quantization = quantization
+        self.vectors = np.zeros((0, dim), dtype=np.float32)
+        self.ids: List[str] = []
+        self.payloads: List[dict] = []
+        self.rows: Dict[str, int] = {}
+        self.dirty = False
+        # Quantized codes, rebuilt lazily after writes
+        self.codes: Optional[np.ndarray] = None
+        self.scale = 1.0
+
+    def reindex(self) -> None:
+        self.rows = {point_id: row for row, point_id in enumerate(self.ids)}
+
+    def quantize(self) -> None:
+        """Build int8 codes (symmetric, 0.99 quantile range) or packed sign bits."""
+        if self.quantization == "int8":
+            if len(self.ids):
+                bound = float(np.quantile(np.abs(self.vectors), 0.99)) or 1.0
+            else:
+                bound = 1.0
+            self.scale = bound / 127.0
+            self.codes = np.clip(np.rint(self.vectors / self.scale), -127, 127).astype(np.int8)
+        elif self.quantization == "binary":
+            self.codes = np.packbits(np.asarray(self.vectors) > 0, axis=1)
+
+    def approximate_scores(self, query_vector: np.ndarray, codes: np.ndarray, scale: float,
+                           chunk_size: int = 4096) -> np.ndarray:
+        """Score every row of ``codes`` (quantized with ``scale``) against the query."""
+        if self.quantization == "binary":
+            query_bits = np.packbits(query_vector > 0)
+            xor = codes ^ query_bits
+            if hasattr(np, "bitwise_count"):
+                differing = np.bitwise_count(xor).sum(axis=1, dtype=np.int32)
+            else:
+                differing = np.unpackbits(xor, axis=1).sum(axis=1, dtype=np.int32)
+            return (self.dim - 2 * differing).astype(np.float32)
+
+        # int8: convert in chunks so the float32 temporary stays bounded
+        scores = np.empty(len(codes), dtype=np.float32)
+        for start in range(0, len(codes), chunk_size):
+            chunk = codes[start:start + chunk_size].astype(np.float32)
+            scores[start:start + chunk_size] = chunk @ query_vector
+        return scores * scale
+
+    def memory_bytes(self) -> int:
+        """Bytes of the representation that has to stay in RAM for search."""
+        if self.quantization:
+            if self.codes is None:
+                self.quantize()
+            return int(self.codes.nbytes)
+        return int(np.asarray(self.vectors).nbytes)
+
+
+class LocalVectorIndex:
+    """
+    In-process vector index exposing the QdrantClient methods VectorStore uses
+    (get_collection, create_collection, create_payload_index, upsert,
+    query_points, scroll, retrieve, delete, batch_update_points, count).
+    Payload filters are evaluated in Python over the side store.
+
+    When ``path`` is given collections are loaded from and flushed to disk;
+    ``mmap=True`` maps the stored vector matrix instead of reading it into RAM
+    (it is copied into memory on the first write).
+    """
+
+    def __init__(self, path: Optional[str] = None, mmap: bool = True):
+        self.path = Path(path) if path else None
+        self.mmap = mmap
+        self._collections: Dict[str, _Collection] = {}
+        self._lock = threading.RLock()
+        if self.path is not None:
+            atexit.register(self.flush)
+
+    # ------------------------------------------------------------------ persistence
+
+    def _collection_dir(self, collection_name: str) -> Path:
+        return self.path / collection_name
+
+    def _load(self, collection_name: str) -> Optional[_Collection]:
+        if self.path is None:
+            return None
+        directory = self._collection_dir(collection_name)
+        vectors_path = directory / "vectors.npy"
+        if not vectors_path.exists():
+            return None
+
+        vectors = np.load(vectors_path, mmap_mode='r' if self.mmap else None)
+        quantization = None
+        meta_path = directory / "collection.json"
+        if meta_path.exists():
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                quantization = json.load(f).get("quantization")
+        collection = _Collection(vectors.shape[1], quantization)
+        collection.vectors = vectors
+        with open(directory / "ids.json", 'r', encoding='utf-8') as f:
+            collection.ids = json.load(f)
+        with open(directory / "payloads.jsonl", 'r', encoding='utf-8') as f:
+            collection.payloads = [json.loads(line) for line in f]
+        collection.reindex()
+        return collection
+
+    def flush(self) -> None:
+        """Write every modified collection to disk."""
+        if self.path is None:
+            return
+        with self._lock:
+            for name, collection in self._collections.items():
+                if not collection.dirty:
+                    continue
+                directory = self._collection_dir(name)
+                directory.mkdir(parents=True, exist_ok=True)
+                # Each file is written to a sibling and swapped in, so a process
+                # (or this index) that has vectors.npy memory-mapped keeps
+                # reading the old, complete file
+                with self._replace(directory / "vectors.npy", 'wb') as f:
+                    np.save(f, np.ascontiguousarray(collection.vectors))
+                with self._replace(directory / "collection.json", 'w') as f:
+                    json.dump({"size": collection.dim, "quantization": collection.quantization}, f)
+                with self._replace(directory / "ids.json", 'w') as f:
+                    json.dump(collection.ids, f)
+                with self._replace(directory / "payloads.jsonl", 'w') as f:
+                    for payload in collection.payloads:
+                        f.write(json.dumps(payload, ensure_ascii=False) + "\n")
+                collection.dirty = False
+
+    @staticmethod
+    @contextmanager
+    def _replace(path: Path, mode: str) -> Iterator[IO]:
+        """Open ``path.tmp`` for writing and move it over ``path`` once written."""
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, mode, **({} if 'b' in mode else {"encoding": "utf-8"})) as f:
+            yield f
+        os.replace(tmp_path, path)
+
+    def _get(self, collection_name: str) -> _Collection:
+        collection = self._collections.get(collection_name)
+        if collection is None:
+            collection = self._load(collection_name)
+            if collection is None:
+                raise ValueError(f"Collection {collection_name} not found")
+            self._collections[collection_name] = collection
+        return collection
+
+    @staticmethod
+    def _writable(collection: _Collection) -> None:
+        # A memory-mapped matrix is read-only; copy it before the first write
+        if isinstance(collection.vectors, np.memmap) or not collection.vectors.flags.writeable:
+            collection.vectors = np.array(collection.vectors)
+        collection.dirty = True
+        collection.codes = None
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return (vectors / norms).astype(np.float32)
+
+    # ------------------------------------------------------------------ collections
+
+    def get_collection(self, collection_name: str) -> dict:
+        with self._lock:
+            collection = self._get(collection_name)
+            return {
+                "points_count": len(collection.ids),
+                "dim": collection.dim,
+                "quantization": collection.quantization,
+                "search_memory_bytes": collection.memory_bytes()
+            }
+
+    def create_collection(self, collection_name: str, vectors_config: models.VectorParams,
+                          quantization_config=None, **kwargs) -> bool:
+        with self._lock:
+            collection = _Collection(vectors_config.size, quantization_kind(quantization_config))
+            collection.dirty = True
+            self._collections[collection_name] = collection
+            return True
+
+    def create_payload_index(self, collection_name: str, field_name: str, **kwargs) -> None:
+        # Filters are evaluated over the in-memory payloads; nothing to build
+        self._get(collection_name)
+
+    def count(self, collection_name: str, **kwargs) -> models.CountResult:
+        with self._lock:
+            return models.CountResult(count=len(self._get(collection_name).ids))
+
+    # ------------------------------------------------------------------ points
+
+    def upsert(self, collection_name: str, points: List[models.PointStruct], **kwargs) -> None:
+        with self._lock:
+            collection = self._get(collection_name)
+            self._writable(collection)
+
+            vectors = self._normalize(np.asarray([point.vector for point in points], dtype=np.float32))
+            new_rows = []
+            for point, vector in zip(points, vectors):
+                point_id = str(point.id)
+                row = collection.rows.get(point_id)
+                if row is None:
+                    new_rows.append((point_id, point.payload or {}, vector))
+                else:
+                    collection.vectors[row] = vector
+                    collection.payloads[row] = point.payload or {}
+
+            if new_rows:
+                start = len(collection.ids)
+                collection.vectors = np.vstack([collection.vectors, np.stack([row[2] for row in new_rows])])
+                for offset, (point_id, payload, _) in enumerate(new_rows):
+                    collection.ids.append(point_id)
+                    collection.payloads.append(payload)
+                    collection.rows[point_id] = start + offset
+
+    def delete(self, collection_name: str, points_selector, **kwargs) -> None:
+        if isinstance(points_selector, models.PointIdsList):
+            point_ids = points_selector.points
+        else:
+            point_ids = points_selector
+        with self._lock:
+            collection = self._get(collection_name)
+            rows = [collection.rows[str(point_id)] for point_id in point_ids if str(point_id) in collection.rows]
+            if not rows:
+                return
+            self._writable(collection)
+            keep = np.ones(len(collection.ids), dtype=bool)
+            keep[rows] = False
+            collection.vectors = collection.vectors[keep]
+            collection.ids = [point_id for point_id, kept in zip(collection.ids, keep) if kept]
+            collection.payloads = [payload for payload, kept in zip(collection.payloads, keep) if kept]
+            collection.reindex()
+
+    def batch_update_points(self, collection_name: str, update_operations: list, **kwargs) -> None:
+        with self._lock:
+            collection = self._get(collection_name)
+            for operation in update_operations:
+                if not isinstance(operation, models.OverwritePayloadOperation):
+                    raise TypeError(f"Unsupported update operation: {type(operation).__name__}")
+                update = operation.overwrite_payload
+                for point_id in update.points or []:
+                    row = collection.rows.get(str(point_id))
+                    if row is not None:
+                        # Detaches a memory-mapped matrix before flush rewrites its file
+                        self._writable(collection)
+                        collection.payloads[row] = update.payload
+
+    def retrieve(self, collection_name: str, ids: List[str], with_payload=True,
+                 with_vectors: bool = False, **kwargs) -> List[models.Record]:
+        with self._lock:
+            collection = self._get(collection_name)
+            rows = [collection.rows[str(point_id)] for point_id in ids if str(point_id) in collection.rows]
+            return [
+                models.Record(
+                    id=collection.ids[row],
+                    payload=self._select_payload(collection.payloads[row], with_payload),
+                    vector=collection.vectors[row].tolist() if with_vectors else None
+                )
+                for row in rows
+            ]
+
+    @staticmethod
+    def _select_payload(payload: dict, with_payload) -> Optional[dict]:
+        if with_payload is True:
+            return payload
+        if not with_payload:
+            return None
+        return {key: payload[key] for key in with_payload if key in payload}
+
+    def scroll(self, collection_name: str, limit: int = 10, offset: Optional[int] = None,
+               with_payload=True, with_vectors: bool = False, **kwargs) -> Tuple[List[models.Record], Optional[int]]:
+        with self._lock:
+            collection = self._get(collection_name)
+            start = offset or 0
+            end = min(start + limit, len(collection.ids))
+            records = [
+                models.Record(
+                    id=collection.ids[row],
+                    payload=self._select_payload(collection.payloads[row], with_payload),
+                    vector=collection.vectors[row].tolist() if with_vectors else None
+                )
+                for row in range(start, end)
+            ]
+            return records, (end if end < len(collection.ids) else None)
+
+    def query_points(self, collection_name: str, query: List[float], limit: int = 10,
+                     query_filter: Optional[models.Filter] = None, with_payload=True,
+                     search_params: Optional[models.SearchParams] = None,
+                     **kwargs) -> models.QueryResponse:
+        with self._lock:
+            collection = self._get(collection_name)
+            if collection.quantization and collection.codes is None and collection.ids:
+                collection.quantize()
+            # A concurrent write replaces these (and drops the codes); search the snapshot
+            vectors, ids, payloads = collection.vectors, collection.ids, collection.payloads
+            codes, scale = collection.codes, collection.scale
+        # ids and payloads are appended to in place; only the captured rows are searched
+        count = len(vectors)
+
+        if not count:
+            return models.QueryResponse(points=[])
+
+        query_vector = self._normalize(np.asarray(query, dtype=np.float32))
+
+        allowed = None
+        if query_filter is not None:
+            allowed = np.fromiter((matches_filter(payload, query_filter) for payload in payloads[:count]),
+                                  dtype=bool, count=count)
+            if not allowed.any():
+                return models.QueryResponse(points=[])
+        k = min(limit, count if allowed is None else int(allowed.sum()))
+
+        quantization_params = search_params.quantization if search_params is not None else None
+        use_quantization = collection.quantization and not (quantization_params and quantization_params.ignore)
+
+        if use_quantization:
+            oversampling = (quantization_params.oversampling if quantization_params else None) or 1.0
+            rescore = quantization_params.rescore if quantization_params and quantization_params.rescore is not None else True
+            approximate = collection.approximate_scores(query_vector, codes, scale)
+            if allowed is not None:
+                approximate = np.where(allowed, approximate, -np.inf)
+            candidates = self._top_k(approximate, min(count if allowed is None else int(allowed.sum()),
+                                                      math.ceil(k * oversampling)))
+            if rescore:
+                # Only the candidate rows of the (possibly memory-mapped) originals are read
+                candidate_scores = np.asarray(vectors[np.sort(candidates)]) @ query_vector
+                candidates = np.sort(candidates)
+            else:
+                candidate_scores = approximate[candidates]
+            order = self._top_k(candidate_scores, k)
+            top, top_scores = candidates[order], candidate_scores[order]
+        else:
+            scores = vectors @ query_vector
+            if allowed is not None:
+                scores = np.where(allowed, scores, -np.inf)
+            top = self._top_k(scores, k)
+            top_scores = scores[top]
+
+        points = [
+            models.ScoredPoint(
+                id=ids[row],
+                version=0,
+                score=float(score),
+                payload=self._select_payload(payloads[row], with_payload)
+            )
+            for row, score in zip(top.tolist(), top_scores.tolist())
+        ]
+        return models.QueryResponse(points=points)
+
+    @staticmethod
+    def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+        """Indices of the k highest scores, best first."""
+        top = np.argpartition(-scores, k - 1)[:k]
+        return top[np.argsort(-scores[top])]
+
+
+_local_indexes: Dict[str, LocalVectorIndex] = {}
+
+
+def get_local_index(path: Optional[str], mmap: bool = True) -> LocalVectorIndex:
+    """Return the process-wide index for ``path`` so stores share one instance."""
+    key = path or ""
+    if key not in _local_indexes:
+        _local_indexes[key] = LocalVectorIndex(path or None, mmap=mmap)
+    return _local_indexes[key]
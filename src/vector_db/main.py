@@ -46,9 +46,10 @@ def main():
     product_chunks = product_vector_store.chunk_products(products)
     print(f"Created {len(product_chunks)} product chunks")
     
-    # Store product documents in vector database
-    print("Storing product documents in vector database...")
-    product_success = product_vector_store.store_documents(product_chunks, batch_size=config.BATCH_SIZE)
+    # Sync product documents: only new/changed products are embedded,
+    # products removed from the database are deleted from the collection
+    print("Syncing product documents with vector database...")
+    product_success = product_vector_store.sync_documents(product_chunks, batch_size=config.BATCH_SIZE)
     
     if product_success:
         print("Successfully stored all products in vector database")
@@ -70,9 +71,9 @@ def main():
     
     faq_documents = load_faq_documents(faq_data_path)
     
-    # Store FAQ documents in vector database
-    print("Storing FAQ documents in vector database...")
-    faq_success = faq_vector_store.store_documents(faq_documents, batch_size=config.BATCH_SIZE)
+    # Sync FAQ documents with vector database
+    print("Syncing FAQ documents with vector database...")
+    faq_success = faq_vector_store.sync_documents(faq_documents, batch_size=config.BATCH_SIZE)
     
     if faq_success:
         print("Successfully stored all FAQ documents in vector database")
@@ -0,0 +1,136 @@
+"""
+Process-Wide Model Registry
+
+Loads every embedding model and cross-encoder at most once per process, on
+first use or on an explicit warmup, and reports which models are resident and
+how much memory their weights take. All components that need a model (vector
+stores, the FAQ node, rerankers in every search instance) share these copies.
+
+Async callers run inference through ``run_model``, which uses a small bounded
+thread pool so CPU-bound model calls never block the event loop and at most
+MODEL_EXECUTOR_WORKERS of them compete for the CPU at a time.
+"""
+
+import asyncio
+import functools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+
+def _torch_module(model: Any):
+    """Find the torch module behind a langchain / sentence-transformers wrapper."""
+    for candidate in (model, getattr(model, 'client', None), getattr(model, 'model', None)):
+        if candidate is not None and hasattr(candidate, 'parameters'):
+            return candidate
+    return None
+
+
+def model_memory_bytes(model: Any) -> int:
+    """Bytes taken by the parameters and buffers of a loaded model."""
+    module = _torch_module(model)
+    if module is None:
+        return 0
+    tensors = list(module.parameters())
+    if hasattr(module, 'buffers'):
+        tensors += list(module.buffers())
+    return sum(tensor.numel() * tensor.element_size() for tensor in tensors)
+
+
+class ModelRegistry:
+    """Thread-safe, lazily populated cache of loaded models keyed by (kind, name)."""
+
+    def __init__(self):
+        self._models: Dict[Tuple[str, str], Any] = {}
+        self._load_seconds: Dict[Tuple[str, str], float] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, kind: str, name: str, loader: Callable[[str], Any]) -> Any:
+        key = (kind, name)
+        model = self._models.get(key)
+        if model is not None:
+            return model
+        with self._lock:
+            # Another thread may have finished loading while we waited
+            model = self._models.get(key)
+            if model is None:
+                print(f"Loading {kind} model '{name}'...")
+                start = time.perf_counter()
+                model = loader(name)
+                self._load_seconds[key] = time.perf_counter() - start
+                self._models[key] = model
+            return model
+
+    def get_embeddings(self, model_name: str):
+        """The shared HuggingFaceEmbeddings instance for ``model_name``."""
+        def load(name: str):
+            from langchain_community.embeddings import HuggingFaceEmbeddings
+            return HuggingFaceEmbeddings(model_name=name)
+        return self._get("embedding", model_name, load)
+
+    def get_cross_encoder(self, model_name: str):
+        """The shared sentence-transformers CrossEncoder for ``model_name``."""
+        def load(name: str):
+            from sentence_transformers import CrossEncoder
+            return CrossEncoder(name)
+        return self._get("cross_encoder", model_name, load)
+
+    def warmup(self, embedding_models: Iterable[str] = (), cross_encoders: Iterable[str] = ()) -> None:
+        """Load the given models now instead of on the first request."""
+        for name in embedding_models:
+            self.get_embeddings(name)
+        for name in cross_encoders:
+            self.get_cross_encoder(name)
+
+    def is_loaded(self, kind: str, name: str) -> bool:
+        return (kind, name) in self._models
+
+    def resident(self) -> List[Dict[str, Any]]:
+        """Describe every loaded model: kind, name, load time and weight memory."""
+        return [
+            {
+                "kind": kind,
+                "name": name,
+                "load_seconds": round(self._load_seconds.get((kind, name), 0.0), 3),
+                "memory_bytes": model_memory_bytes(model),
+            }
+            for (kind, name), model in list(self._models.items())
+        ]
+
+
+# Global registry instance
+model_registry = ModelRegistry()
+
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def model_executor() -> ThreadPoolExecutor:
+    """The bounded thread pool used for model inference from async code."""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                from .config import config
+                _executor = ThreadPoolExecutor(
+                    max_workers=max(1, config.MODEL_EXECUTOR_WORKERS),
+                    thread_name_prefix="model-inference"
+                )
+    return _executor
+
+
+async def run_model(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """Run a blocking model call on the model executor and await its result."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(model_executor(), functools.partial(func, *args, **kwargs))
+
+
+def warmup_configured_models() -> None:
+    """Load the configured FAQ/product embedding models and the reranker."""
+    from .config import config
+    model_registry.warmup(
+        embedding_models=(config.FAQ_EMBEDDING_MODEL, config.PRODUCT_EMBEDDING_MODEL),
+        cross_encoders=(config.RERANKER_MODEL,),
+    )
@@ -0,0 +1,45 @@
+"""
+Per-Stage Latency Profiling
+
+Retrieval code wraps its stages (query embedding, vector query, lexical query,
+rerank) in ``record_stage``. Timings are only collected inside a ``profile()``
+block, which benchmarks open around each request, so instrumented code costs
+nothing in normal operation. The active profile lives in a context variable,
+so concurrent requests (threads or asyncio tasks) each fill their own.
+"""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional
+
+_active_profile: ContextVar[Optional[Dict[str, List[float]]]] = ContextVar("retrieval_profile", default=None)
+
+
+@contextmanager
+def profile() -> Iterator[Dict[str, List[float]]]:
+    """Collect {stage: [seconds, ...]} for the stages recorded inside the block."""
+    stages: Dict[str, List[float]] = {}
+    token = _active_profile.set(stages)
+    try:
+        yield stages
+    finally:
+        try:
+            _active_profile.reset(token)
+        except ValueError:
+            # Closed from another context (e.g. an abandoned streaming response)
+            _active_profile.set(None)
+
+
+@contextmanager
+def record_stage(name: str) -> Iterator[None]:
+    """Time the block as stage ``name`` of the active profile, if any."""
+    stages = _active_profile.get()
+    if stages is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stages.setdefault(name, []).append(time.perf_counter() - start)
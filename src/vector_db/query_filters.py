@@ -0,0 +1,350 @@
+"""
+Structured Query Filters for Product Search
+
+Extracts price ranges, categories, sizes and colors from a shopper's query
+(Arabic or English) and turns them into Qdrant payload filters, so constraints
+such as "بنطلون جينز اقل من 200 جنيه" are enforced inside the index instead of
+being checked afterwards by an LLM.
+
+Price is a hard constraint. Category, size and color are applied so that
+products without that information (the offers collection, products without
+size or color data) still qualify; dense ranking orders them afterwards.
+"""
+
+from __future__ import annotations
+
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from .lazy_import import lazy_module
+from .text_normalization import normalize_text
+
+models = lazy_module("qdrant_client.http.models")
+
+
+# Category of the mixed "offers" collection, which contains every product type
+OFFERS_CATEGORY = "كوليكشن العروض"
+
+# keyword (normalized) -> (category, sub_category or None)
+CATEGORY_KEYWORDS: Dict[str, Tuple[str, Optional[str]]] = {
+    "جينز": ("بنطلون", "بنطلون جينز"),
+    "jeans": ("بنطلون", "بنطلون جينز"),
+    "جبردين": ("بنطلون", "بنطلون جبردين"),
+    "gabardine": ("بنطلون", "بنطلون جبردين"),
+    "chino": ("بنطلون", "بنطلون جبردين"),
+    "كارجو": ("بنطلون", "كارجو"),
+    "cargo": ("بنطلون", "كارجو"),
+    "شروال": ("بنطلون", "شروال"),
+    "sweatpant": ("بنطلون", "شروال"),
+    "jogger": ("بنطلون", "شروال"),
+    "كلاسيك": ("بنطلون", "بنطلون كلاسيك"),
+    "بنطلون": ("بنطلون", None),
+    "بناطيل": ("بنطلون", None),
+    "pant": ("بنطلون", None),
+    "pants": ("بنطلون", None),
+    "trouser": ("بنطلون", None),
+    "trousers": ("بنطلون", None),
+    "بولو": ("تيشيرت", "بولو"),
+    "polo": ("تيشيرت", "بولو"),
+    "تيشيرت": ("تيشيرت", None),
+    "تيشرت": ("تيشيرت", None),
+    "tshirt": ("تيشيرت", None),
+    "قميص": ("قميص", "قميص"),
+    "قمصان": ("قميص", "قميص"),
+    "shirt": ("قميص", "قميص"),
+    "برفيوم": ("اكسسوار", "برفيوم"),
+    "برفان": ("اكسسوار", "برفيوم"),
+    "perfume": ("اكسسوار", "برفيوم"),
+    "اكسسوار": ("اكسسوار", None),
+    "accessories": ("اكسسوار", None),
+    "داخلي": ("اكسسوار", "داخلي"),
+    "underwear": ("اكسسوار", "داخلي"),
+}
+
+# Base color families; catalog colors such as "Dark Blue" or "White&Black"
+# are indexed under every family word they contain
+COLOR_KEYWORDS: Dict[str, str] = {
+    "black": "black", "اسود": "black", "سودا": "black", "سوداء": "black",
+    "white": "white", "ابيض": "white", "بيضا": "white", "بيضاء": "white",
+    "red": "red", "احمر": "red", "حمرا": "red",
+    "blue": "blue", "ازرق": "blue", "زرقا": "blue", "navy": "blue", "كحلي": "blue", "لبني": "blue",
+    "green": "green", "اخضر": "green", "خضرا": "green",
+    "gray": "gray", "grey": "gray", "رمادي": "gray", "رصاصي": "gray",
+    "beige": "beige", "بيج": "beige",
+    "brown": "brown", "بني": "brown",
+    "yellow": "yellow", "اصفر": "yellow", "صفرا": "yellow",
+    "pink": "pink", "بمبي": "pink", "وردي": "pink", "rose": "pink",
+    "purple": "purple", "بنفسجي": "purple", "موف": "purple", "move": "purple",
+    "orange": "orange", "برتقالي": "orange",
+    "olive": "olive", "زيتي": "olive",
+    "wine": "wine", "نبيتي": "wine",
+    "camel": "camel", "جملي": "camel",
+    "silver": "silver", "فضي": "silver",
+    "mint": "mint", "منت": "mint",
+    "petrol": "petrol", "بترولي": "petrol",
+    "aqua": "aqua", "turquois": "aqua", "turquoise": "aqua", "تركواز": "aqua",
+}
+
+_NUMBER = r"(\d+(?:[.,]\d+)?)"
+_CURRENCY = r"(?:\s*(?:جنيه|جنيها|جنية|ج|le|egp|pounds?|l\.e))?"
+_RANGE_PATTERNS = [
+    re.compile(rf"(?:between|بين)\s*{_NUMBER}{_CURRENCY}\s*(?:and|و|-)\s*{_NUMBER}{_CURRENCY}"),
+    re.compile(rf"(?:from|من)\s*{_NUMBER}{_CURRENCY}\s*(?:to|ل|لـ|الى|لحد|-)\s*{_NUMBER}{_CURRENCY}"),
+    re.compile(rf"{_NUMBER}\s*-\s*{_NUMBER}\s*(?:جنيه|جنيها|جنية|ج|le|egp|pounds?)"),
+]
+_MAX_PATTERN = re.compile(
+    rf"(?:اقل من|ارخص من|تحت|مش اكتر من|مايزيدش عن|ما يزيدش عن|لحد|حتى|بحد اقصى|"
+    rf"under|below|less than|cheaper than|up to|at most|max(?:imum)?|within)\s*{_NUMBER}{_CURRENCY}"
+)
+_MIN_PATTERN = re.compile(
+    rf"(?:اكتر من|اكثر من|فوق|اغلى من|above|over|more than|at least|min(?:imum)?)\s*{_NUMBER}{_CURRENCY}"
+)
+_SIZE_PATTERN = re.compile(r"(?:size|مقاس)\s*(xxxl|xxl|xl|xs|s|m|l|[2-5]xl|\d{2})\b")
+_STANDALONE_SIZE = re.compile(r"\b(xxxl|xxl|xl|xs|[2-5]xl)\b")
+_SIZE_ALIASES = {"xxl": "2XL", "xxxl": "3XL"}
+# Definite article with a preposition or conjunction written before it;
+# "ل" + "ال" is spelled "لل"
+_ARTICLE_PREFIXES = ("بال", "فال", "كال", "لل", "ال")
+# sub_category -> its category
+_SUB_CATEGORY_PARENTS = {sub: category for category, sub in CATEGORY_KEYWORDS.values() if sub}
+
+
+class ProductFilters:
+    """Constraints extracted from a product query."""
+
+    def __init__(self):
+        self.min_price: Optional[float] = None
+        self.max_price: Optional[float] = None
+        self.categories: List[str] = []
+        self.sub_categories: List[str] = []
+        self.sizes: List[str] = []
+        self.colors: List[str] = []
+        # Query text with price expressions removed, used for the semantic part
+        self.text = ""
+
+    @property
+    def has_price(self) -> bool:
+        return self.min_price is not None or self.max_price is not None
+
+    def is_empty(self) -> bool:
+        return not (self.has_price or self.categories or self.sizes or self.colors)
+
+    def __repr__(self) -> str:
+        return (f"ProductFilters(min_price={self.min_price}, max_price={self.max_price}, "
+                f"categories={self.categories}, sub_categories={self.sub_categories}, "
+                f"sizes={self.sizes}, colors={self.colors})")
+
+
+def _to_float(value: str) -> float:
+    return float(value.replace(",", ""))
+
+
+def normalize_size(size: str) -> str:
+    size = size.strip().lower()
+    return _SIZE_ALIASES.get(size, size.upper())
+
+
+def extract_color_families(color_names: List[str]) -> List[str]:
+    """Map catalog color names ("Dark Blue", "White&Black") to base families."""
+    families = []
+    for name in color_names:
+        for word in re.split(r"[\s&/,-]+", normalize_text(name)):
+            family = COLOR_KEYWORDS.get(word)
+            if family and family not in families:
+                families.append(family)
+    return families
+
+
+def parse_sizes(available_sizes: Optional[str]) -> List[str]:
+    """Split the catalog's "M, L, XL" size string into normalized size codes."""
+    if not available_sizes or not isinstance(available_sizes, str):
+        return []
+    return [normalize_size(size) for size in available_sizes.split(",") if size.strip()]
+
+
+def extract_filters(query: str) -> ProductFilters:
+    """Extract price, category, size and color constraints from a query."""
+    filters = ProductFilters()
+    text = normalize_text(query)
+
+    price_spans = []
+    for pattern in _RANGE_PATTERNS:
+        match = pattern.search(text)
+        if match:
+            low, high = sorted((_to_float(match.group(1)), _to_float(match.group(2))))
+            filters.min_price, filters.max_price = low, high
+            price_spans.append(match.span())
+            break
+    else:
+        match = _MAX_PATTERN.search(text)
+        if match:
+            filters.max_price = _to_float(match.group(1))
+            price_spans.append(match.span())
+        match = _MIN_PATTERN.search(text)
+        if match:
+            filters.min_price = _to_float(match.group(1))
+            price_spans.append(match.span())
+
+    if price_spans:
+        for start, end in sorted(price_spans, reverse=True):
+            text = text[:start] + " " + text[end:]
+        filters.text = re.sub(r"\s+", " ", text).strip() or query.strip()
+    else:
+        filters.text = query.strip()
+
+    # "t-shirt" / "T_Shirt" / "polo shirt" must not also count as a (dress) shirt
+    text = re.sub(r"\bt[\s_-]?shirt", "tshirt", text)
+    text = re.sub(r"\bpolo[\s_-]?shirt", "polo", text)
+    words = [word for word in re.split(r"\W+", text) if word]
+    words += [word[:-1] for word in words if word.isascii() and word.endswith("s") and len(word) > 3]
+    stems = {stem for word in words for stem in _stems(word)}
+    for keyword, (category, sub_category) in CATEGORY_KEYWORDS.items():
+        if keyword not in stems:
+            continue
+        if category not in filters.categories:
+            filters.categories.append(category)
+        if sub_category and sub_category not in filters.sub_categories:
+            filters.sub_categories.append(sub_category)
+
+    for word in words:
+        family = next((COLOR_KEYWORDS[stem] for stem in _stems(word) if stem in COLOR_KEYWORDS), None)
+        if family and family not in filters.colors:
+            filters.colors.append(family)
+
+    sizes = _SIZE_PATTERN.findall(text) + _STANDALONE_SIZE.findall(text)
+    for size in sizes:
+        size = normalize_size(size)
+        if size not in filters.sizes:
+            filters.sizes.append(size)
+
+    return filters
+
+
+def _stems(word: str) -> List[str]:
+    """The word, and the word without a leading "و" and without the definite
+    article and the clitics before it ("البنطلون", "بالاسود", "والاحمر",
+    "للقميص", "وتيشيرت")."""
+    stems = [word]
+    if word.startswith("و") and len(word) > 3:
+        stems.append(word[1:])
+    for stem in list(stems):
+        for prefix in _ARTICLE_PREFIXES:
+            if stem.startswith(prefix) and len(stem) > len(prefix) + 1:
+                stems.append(stem[len(prefix):])
+                break
+    return stems
+
+
+def _match_any_or_missing(key: str, values: List[str]) -> models.Filter:
+    return models.Filter(should=[
+        models.FieldCondition(key=key, match=models.MatchAny(any=values)),
+        models.IsEmptyCondition(is_empty=models.PayloadField(key=key)),
+    ])
+
+
+def _category_filter(filters: ProductFilters) -> models.Filter:
+    """Products of the requested categories, or from the offers collection. A
+    category whose sub-category the query names ("jeans") is narrowed to it;
+    the other requested categories match as a whole."""
+    should: List[Any] = []
+    plain = []
+    for category in filters.categories:
+        subs = [sub for sub in filters.sub_categories if _SUB_CATEGORY_PARENTS.get(sub) == category]
+        if not subs:
+            plain.append(category)
+            continue
+        should.append(models.Filter(must=[
+            models.FieldCondition(key="metadata.category", match=models.MatchValue(value=category)),
+            models.FieldCondition(key="metadata.sub_category", match=models.MatchAny(any=subs)),
+        ]))
+    if plain:
+        should.append(models.FieldCondition(key="metadata.category", match=models.MatchAny(any=plain)))
+    should.append(models.FieldCondition(key="metadata.category", match=models.MatchValue(value=OFFERS_CATEGORY)))
+    return models.Filter(should=should)
+
+
+def to_qdrant_filter(filters: ProductFilters) -> Optional[models.Filter]:
+    """Build the Qdrant payload filter for the extracted constraints."""
+    must: List[Any] = []
+    if filters.has_price:
+        must.append(models.FieldCondition(
+            key="metadata.sale_price",
+            range=models.Range(gte=filters.min_price, lte=filters.max_price)
+        ))
+    if filters.categories:
+        must.append(_category_filter(filters))
+    if filters.sizes:
+        must.append(_match_any_or_missing("metadata.sizes", filters.sizes))
+    if filters.colors:
+        must.append(_match_any_or_missing("metadata.color_families", filters.colors))
+    return models.Filter(must=must) if must else None
+
+
+def price_only_filter(filters: ProductFilters) -> Optional[models.Filter]:
+    """The hard price constraint alone, used when the full filter finds nothing."""
+    if not filters.has_price:
+        return None
+    return models.Filter(must=[models.FieldCondition(
+        key="metadata.sale_price",
+        range=models.Range(gte=filters.min_price, lte=filters.max_price)
+    )])
+
+
+# ---------------------------------------------------------------------- evaluation
+
+def _payload_value(payload: dict, key: str) -> Any:
+    value: Any = payload
+    for part in key.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+
+def _condition_matches(payload: dict, condition) -> bool:
+    if isinstance(condition, models.Filter):
+        return matches_filter(payload, condition)
+    if isinstance(condition, models.IsEmptyCondition):
+        value = _payload_value(payload, condition.is_empty.key)
+        return value is None or value == [] or value == ""
+    if isinstance(condition, models.FieldCondition):
+        value = _payload_value(payload, condition.key)
+        values = value if isinstance(value, list) else [value]
+        if condition.range is not None:
+            bounds = condition.range
+            for item in values:
+                if not isinstance(item, (int, float)):
+                    continue
+                if bounds.gte is not None and item < bounds.gte:
+                    continue
+                if bounds.gt is not None and item <= bounds.gt:
+                    continue
+                if bounds.lte is not None and item > bounds.lte:
+                    continue
+                if bounds.lt is not None and item >= bounds.lt:
+                    continue
+                return True
+            return False
+        if isinstance(condition.match, models.MatchValue):
+            return condition.match.value in values
+        if isinstance(condition.match, models.MatchAny):
+            return any(item in condition.match.any for item in values)
+    raise ValueError(f"Unsupported filter condition: {condition!r}")
+
+
+def matches_filter(payload: dict, query_filter: Optional[models.Filter]) -> bool:
+    """Evaluate a Qdrant filter (must / should / must_not) against a payload."""
+    if query_filter is None:
+        return True
+    must = query_filter.must or []
+    should = query_filter.should or []
+    must_not = query_filter.must_not or []
+    must = must if isinstance(must, list) else [must]
+    should = should if isinstance(should, list) else [should]
+    must_not = must_not if isinstance(must_not, list) else [must_not]
+
+    if not all(_condition_matches(payload, condition) for condition in must):
+        return False
+    if should and not any(_condition_matches(payload, condition) for condition in should):
+        return False
+    return not any(_condition_matches(payload, condition) for condition in must_not)
@@ -1,68 +1,195 @@
+from __future__ import annotations
 
-from typing import List, Dict, Any, Optional
-from sentence_transformers import CrossEncoder
-from qdrant_client.http import models
+import asyncio
+from typing import TYPE_CHECKING, List, Dict, Any, Optional, Tuple, Union
 from .vector_store import VectorStore
+from .lexical_index import reciprocal_rank_fusion
+from .query_filters import extract_filters, to_qdrant_filter, price_only_filter
+from .config import config
+from .model_registry import model_registry, run_model
+from .batching import get_batcher
+from .profiling import record_stage
+
+if TYPE_CHECKING:
+    from qdrant_client.http import models
 
 
 class SemanticSearch:
 
     
-    def __init__(self, vector_store: VectorStore, use_reranking: bool = True):
+    def __init__(self, vector_store: VectorStore, use_reranking: bool = True, use_hybrid: bool = False):
 
         self.vector_store = vector_store
         self.use_reranking = use_reranking
-        
-        if use_reranking:
-            self.reranker = CrossEncoder('BAAI/bge-reranker-base')
+        self.use_hybrid = use_hybrid
     
-    def search(self, query: str, limit: int = 5, initial_limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    @property
+    def reranker(self):
+        # Shared across every search instance and loaded on first rerank
+        return model_registry.get_cross_encoder(config.RERANKER_MODEL)
+    
+    def search(self, query: str, limit: int = 5, initial_limit: Optional[int] = None,
+               query_filter: Optional[models.Filter] = None) -> List[Dict[str, Any]]:
 
         if initial_limit is None:
-            initial_limit = min(50, limit * 3) if self.use_reranking else limit
+            initial_limit = self._initial_limit(limit)
         
-        initial_results = self.vector_store.search(query, initial_limit)
+        if self.use_hybrid:
+            initial_results = self._hybrid_candidates(query, initial_limit, query_filter)
+        else:
+            initial_results = self.vector_store.search(query, initial_limit, query_filter=query_filter)
         
-        if self.use_reranking and len(initial_results) > limit:
-            reranked_results = self._rerank(query, initial_results)
-            final_results = reranked_results[:limit]
+        if self.use_reranking and initial_results:
+            return self._format_results(self._rerank(query, initial_results)[:limit])
+        
+        return self._format_results(initial_results[:limit])
+    
+    async def asearch(self, query: str, limit: int = 5, initial_limit: Optional[int] = None,
+                      query_filter: Optional[models.Filter] = None) -> List[Dict[str, Any]]:
+        """Async search: retrieval is awaited and reranking runs on the model executor."""
+        if initial_limit is None:
+            initial_limit = self._initial_limit(limit)
+        
+        if self.use_hybrid:
+            initial_results = await self._ahybrid_candidates(query, initial_limit, query_filter)
         else:
-            final_results = initial_results[:limit]
+            initial_results = await self.vector_store.asearch(query, initial_limit, query_filter=query_filter)
+        
+        if self.use_reranking and initial_results:
+            return self._format_results((await self._arerank(query, initial_results))[:limit])
         
+        return self._format_results(initial_results[:limit])
+    
+    def _initial_limit(self, limit: int) -> int:
+        # Fusing in lexical matches recovers exact-token hits that dense
+        # search would only reach with a much larger candidate set
+        multiplier = 2 if self.use_hybrid else 3
+        return min(50, limit * multiplier) if self.use_reranking else limit
+    
+    def _format_results(self, final_results: List[Union[models.ScoredPoint, Tuple[float, models.ScoredPoint]]]
+                        ) -> List[Dict[str, Any]]:
+        """
+        ``score`` is the retrieval (dense or fused) score; reranked results,
+        given as (rerank score, point) pairs, also carry ``rerank_score``.
+        """
         formatted_results = []
         for result in final_results:
+            rerank_score = None
+            if isinstance(result, tuple):
+                rerank_score, result = result
             formatted_result = {
                 'score': result.score,
                 'content': result.payload.get('content', ''),
                 'metadata': result.payload.get('metadata', {})
             }
+            if rerank_score is not None:
+                formatted_result['rerank_score'] = float(rerank_score)
             formatted_results.append(formatted_result)
         
         return formatted_results
     
-    def _rerank(self, query: str, results: List[models.ScoredPoint]) -> List[models.ScoredPoint]:
+    def _hybrid_candidates(self, query: str, limit: int,
+                           query_filter: Optional[models.Filter] = None) -> List[models.ScoredPoint]:
+        """Fuse dense and BM25 rankings with reciprocal rank fusion."""
+        dense_results = self.vector_store.search(query, limit, query_filter=query_filter)
+        lexical_results = self.vector_store.lexical_search(query, limit, query_filter=query_filter)
+        return self._fuse(dense_results, lexical_results, limit)
+    
+    async def _ahybrid_candidates(self, query: str, limit: int,
+                                  query_filter: Optional[models.Filter] = None) -> List[models.ScoredPoint]:
+        """Async _hybrid_candidates; the dense and BM25 retrievals run concurrently."""
+        dense_results, lexical_results = await asyncio.gather(
+            self.vector_store.asearch(query, limit, query_filter=query_filter),
+            self.vector_store.alexical_search(query, limit, query_filter=query_filter)
+        )
+        return self._fuse(dense_results, lexical_results, limit)
+    
+    def _fuse(self, dense_results: List[models.ScoredPoint], lexical_results: List[models.ScoredPoint],
+              limit: int) -> List[models.ScoredPoint]:
+        points = {str(result.id): result for result in lexical_results}
+        points.update({str(result.id): result for result in dense_results})
+        
+        fused = reciprocal_rank_fusion(
+            [[str(result.id) for result in dense_results], [str(result.id) for result in lexical_results]],
+            k=config.RRF_K,
+            limit=limit
+        )
+        return [points[point_id].model_copy(update={'score': score}) for point_id, score in fused]
+    
+    def _rerank(self, query: str, results: List[models.ScoredPoint]) -> List[Tuple[float, models.ScoredPoint]]:
 
         if not results:
             return []
         
         pairs = [[query, result.payload.get('content', '')] for result in results]
-        scores = self.reranker.predict(pairs)
+        with record_stage("rerank"):
+            scores = self._predict(pairs)
+        return self._order_by_scores(scores, results)
+    
+    async def _arerank(self, query: str, results: List[models.ScoredPoint]) -> List[Tuple[float, models.ScoredPoint]]:
+
+        if not results:
+            return []
         
+        pairs = [[query, result.payload.get('content', '')] for result in results]
+        with record_stage("rerank"):
+            if config.MICRO_BATCHING:
+                # Scored in one predict() call with concurrent requests' pairs
+                batcher = get_batcher(f"rerank:{config.RERANKER_MODEL}", self._predict, config.RERANK_BATCH_SIZE)
+                scores = await batcher.submit_many(pairs)
+            else:
+                # Loading the reranker (on first use) also happens on the executor
+                scores = await run_model(self._predict, pairs)
+        return self._order_by_scores(scores, results)
+    
+    def _predict(self, pairs: List[List[str]]):
+        return self.reranker.predict(pairs)
+    
+    @staticmethod
+    def _order_by_scores(scores, results: List[models.ScoredPoint]) -> List[Tuple[float, models.ScoredPoint]]:
         reranked = list(zip(scores, results))
         reranked.sort(key=lambda x: x[0], reverse=True)
         
-        return [result for score, result in reranked]
+        return reranked
 
 
 class ProductSearch(SemanticSearch):
 
     
     def __init__(self, vector_store: VectorStore):
-        super().__init__(vector_store, use_reranking=True)
+        super().__init__(vector_store, use_reranking=True, use_hybrid=config.HYBRID_SEARCH)
+    
+    def search_with_filters(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """
+        Search with the price/category/size/color constraints in the query pushed
+        down into the index. If the full filter matches nothing, the soft
+        constraints are dropped but the price range is still enforced.
+        """
+        filters = extract_filters(query)
+        if filters.is_empty():
+            return self.search(query, limit=limit)
+        
+        print(f"Extracted filters: {filters}")
+        results = self.search(filters.text, limit=limit, query_filter=to_qdrant_filter(filters))
+        if not results and (filters.categories or filters.sizes or filters.colors):
+            results = self.search(filters.text, limit=limit, query_filter=price_only_filter(filters))
+        return results
+    
+    async def asearch_with_filters(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """Async search_with_filters."""
+        filters = extract_filters(query)
+        if filters.is_empty():
+            return await self.asearch(query, limit=limit)
+        
+        print(f"Extracted filters: {filters}")
+        results = await self.asearch(filters.text, limit=limit, query_filter=to_qdrant_filter(filters))
+        if not results and (filters.categories or filters.sizes or filters.colors):
+            results = await self.asearch(filters.text, limit=limit, query_filter=price_only_filter(filters))
+        return results
 
 
 class FAQSearch(SemanticSearch):
 
     
     def __init__(self, vector_store: VectorStore):
-        super().__init__(vector_store, use_reranking=False)
\ No newline at end of file
+        super().__init__(vector_store, use_reranking=False)
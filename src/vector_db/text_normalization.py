@@ -0,0 +1,48 @@
+"""
+Text Normalization Utilities
+
+Folds the superficial differences between queries that mean the same thing
+(case, whitespace, Arabic letter variants, diacritics, digit scripts) so they
+can share cache entries and index terms.
+"""
+
+import re
+import unicodedata
+
+
+# Arabic diacritics (tashkeel), superscript alef and tatweel
+_ARABIC_MARKS = re.compile(r"[\u0610-\u061a\u064b-\u065f\u0670\u06d6-\u06ed\u0640]")
+
+_ARABIC_LETTERS = str.maketrans({
+    "أ": "ا", "إ": "ا", "آ": "ا", "ٱ": "ا",   # alef variants
+    "ى": "ي",                               # alef maqsura -> ya
+    "ة": "ه",                               # ta marbuta -> ha
+    "ؤ": "و", "ئ": "ي",                     # hamza carriers
+    "٠": "0", "١": "1", "٢": "2", "٣": "3", "٤": "4",
+    "٥": "5", "٦": "6", "٧": "7", "٨": "8", "٩": "9",
+    "۰": "0", "۱": "1", "۲": "2", "۳": "3", "۴": "4",
+    "۵": "5", "۶": "6", "۷": "7", "۸": "8", "۹": "9",
+    "؟": "?", "،": ",", "؛": ";",
+})
+
+_WHITESPACE = re.compile(r"\s+")
+_TRAILING_PUNCTUATION = re.compile(r"[\s?!.,;:]+$")
+
+
+def normalize_arabic(text: str) -> str:
+    """Unify Arabic letter variants and strip diacritics and tatweel."""
+    return _ARABIC_MARKS.sub("", text).translate(_ARABIC_LETTERS)
+
+
+def normalize_text(text: str) -> str:
+    """
+    Normalize a query for cache keys and lexical matching.
+
+    Applies NFKC, case folding, Arabic normalization, whitespace collapsing and
+    drops trailing punctuation, so "عاوز تيشيرت؟" and " عاوز  تيشيرت" map to
+    the same key.
+    """
+    text = unicodedata.normalize("NFKC", text or "").casefold()
+    text = normalize_arabic(text)
+    text = _WHITESPACE.sub(" ", text).strip()
+    return _TRAILING_PUNCTUATION.sub("", text)
@@ -1,24 +1,79 @@
+from __future__ import annotations
+
+import asyncio
+import os
 import uuid
-from typing import List, Dict, Any, Optional
+import hashlib
+from typing import List, Dict, Any, Optional, Tuple
 import sqlite3
 import json
-from bs4 import BeautifulSoup
-from qdrant_client import QdrantClient
-from qdrant_client.http import models
 from .embedding import faq_embedding_model, product_embedding_model
 from .config import config
+from .ingestion import IngestionPipeline
+from .lazy_import import lazy_module
+from .lexical_index import BM25Index
+from .profiling import record_stage
+from .query_filters import extract_color_families, matches_filter, parse_sizes
+
+# qdrant_client is only imported once a collection is created or searched
+models = lazy_module("qdrant_client.http.models")
+
+
+def create_vector_client(qdrant_url: str, qdrant_api_key: str):
+    """
+    Create the vector database client selected by config.VECTOR_BACKEND:
+    a remote Qdrant instance ("qdrant") or the in-process NumPy index ("local").
+    """
+    if config.VECTOR_BACKEND == "local":
+        from .local_index import get_local_index
+        return get_local_index(config.LOCAL_INDEX_PATH, mmap=config.LOCAL_INDEX_MMAP)
+    from qdrant_client import QdrantClient
+    return QdrantClient(
+        url=qdrant_url,
+        api_key=qdrant_api_key
+    )
+
+
+def create_async_vector_client(qdrant_url: str, qdrant_api_key: str):
+    """
+    Create an AsyncQdrantClient for the remote backend. The local backend has
+    no async client; its calls are run in a worker thread instead.
+    """
+    if config.VECTOR_BACKEND == "local":
+        return None
+    from qdrant_client import AsyncQdrantClient
+    return AsyncQdrantClient(
+        url=qdrant_url,
+        api_key=qdrant_api_key
+    )
+
+
+# Payload fields that product searches filter on (values are PayloadSchemaType names)
+PRODUCT_PAYLOAD_INDEXES = {
+    'metadata.sale_price': "float",
+    'metadata.category': "keyword",
+    'metadata.sub_category': "keyword",
+    'metadata.sizes': "keyword",
+    'metadata.color_families': "keyword",
+}
 
 
 class VectorStore:
 
     
-    def __init__(self, qdrant_url: str, qdrant_api_key: str, collection_name: str = "documents"):
-        self.client = QdrantClient(
-            url=qdrant_url,
-            api_key=qdrant_api_key
-        )
+    def __init__(self, qdrant_url: str, qdrant_api_key: str, collection_name: str = "documents", client=None):
+        # An explicit client (e.g. a LocalVectorIndex in benchmarks) overrides the configured backend
+        self.client = client if client is not None else create_vector_client(qdrant_url, qdrant_api_key)
         self.collection_name = collection_name
         
+        self.qdrant_url = qdrant_url
+        self.qdrant_api_key = qdrant_api_key
+        self._use_async_client = client is None
+        self._async_client = None
+        
+        self._lexical_index: Optional[BM25Index] = None
+        self._lexical_index_mtime: Optional[float] = None
+        
         # Use appropriate embedding model based on collection name
         if collection_name == config.FAQ_COLLECTION:
             self.embedding_model = faq_embedding_model
@@ -51,9 +106,26 @@ class VectorStore:
         """Parse HTML specs to plain text."""
         if not html_string or not isinstance(html_string, str): 
             return ""
+        from bs4 import BeautifulSoup
         soup = BeautifulSoup(html_string, 'html.parser')
         return soup.get_text(separator=', ', strip=True)
     
+    def parse_product_details(self, product: dict) -> dict:
+        """Safely parse the JSON details string."""
+        if product.get('product_details_json'):
+            try:
+                return json.loads(product['product_details_json'])
+            except (json.JSONDecodeError, TypeError):
+                return {}
+        return {}
+    
+    def extract_color_names(self, details: dict) -> List[str]:
+        """Extract color names like 'Black', 'Dark Blue', 'Red'."""
+        colors_list = details.get('colors', [])
+        if not colors_list or not isinstance(colors_list, list):
+            return []
+        return [color.get('name') for color in colors_list if color.get('name')]
+    
     def create_page_content(self, product: dict) -> str:
         """
         Creates a very rich text summary for multilingual semantic search.
@@ -64,21 +136,12 @@ class VectorStore:
         
         content += f"Category: {product.get('category', '')}, {product.get('sub_category', '')}\n"
         
-        # Safely parse the JSON details string
-        details = {}
-        if product.get('product_details_json'):
-            try:
-                details = json.loads(product['product_details_json'])
-            except (json.JSONDecodeError, TypeError):
-                details = {}
+        details = self.parse_product_details(product)
         
         # Extract and add color information to the content
-        colors_list = details.get('colors', [])
-        if colors_list and isinstance(colors_list, list):
-            # Extract color names like 'Black', 'Dark Blue', 'Red'
-            color_names = [color.get('name') for color in colors_list if color.get('name')]
-            if color_names:
-                content += f"Available Colors: {', '.join(color_names)}\n"
+        color_names = self.extract_color_names(details)
+        if color_names:
+            content += f"Available Colors: {', '.join(color_names)}\n"
 
         # Extract and clean specs from the nested HTML in the JSON
         specs_html = details.get('specs', {}).get('raw_html', '')
@@ -92,8 +155,10 @@ class VectorStore:
         """
         Creates a structured metadata dictionary.
         """
+        color_names = self.extract_color_names(self.parse_product_details(product))
         metadata = {
             'title': product.get('title'),
+            'title_masri': product.get('title_masri'),
             'category': product.get('category'),
             'sub_category': product.get('sub_category'),
             'sale_price': product.get('sale_price'),
@@ -102,7 +167,11 @@ class VectorStore:
             'product_url': product.get('product_url'),
             'image_url': product.get('image_url'),
             'available_sizes': product.get('available_sizes'),
-            'product_details_json': product.get('product_details_json')
+            'product_details_json': product.get('product_details_json'),
+            # Structured fields for payload filtering
+            'sizes': parse_sizes(product.get('available_sizes')),
+            'colors': color_names,
+            'color_families': extract_color_families(color_names)
         }
         return metadata
     
@@ -116,56 +185,122 @@ class VectorStore:
             chunks.append(chunk)
         return chunks
     
-    def create_collection(self, vector_size: int = None, distance: models.Distance = models.Distance.COSINE) -> bool:
+    def quantization_config(self, quantization: Optional[str] = None):
+        """
+        Build the Qdrant quantization config for "int8" (scalar) or "binary"
+        quantization; "none" keeps the raw float32 vectors only.
+        """
+        quantization = (quantization or config.QUANTIZATION).lower()
+        if quantization == "int8":
+            return models.ScalarQuantization(
+                scalar=models.ScalarQuantizationConfig(
+                    type=models.ScalarType.INT8,
+                    quantile=0.99,
+                    always_ram=True
+                )
+            )
+        if quantization == "binary":
+            return models.BinaryQuantization(
+                binary=models.BinaryQuantizationConfig(always_ram=True)
+            )
+        return None
+    
+    def create_collection(self, vector_size: int = None, distance: Optional[models.Distance] = None,
+                          quantization: Optional[str] = None) -> bool:
         # Use the vector size for this collection type if not explicitly provided
         if vector_size is None:
             vector_size = self.vector_size
+        if distance is None:
+            distance = models.Distance.COSINE
             
         try:
             self.client.get_collection(collection_name=self.collection_name)
             print(f"Collection '{self.collection_name}' already exists.")
+            self.ensure_payload_indexes()
             return True
         except Exception as e:
             try:
+                quantization_config = self.quantization_config(quantization)
                 self.client.create_collection(
                     collection_name=self.collection_name,
                     vectors_config=models.VectorParams(
                         size=vector_size,
-                        distance=distance
-                    )
+                        distance=distance,
+                        # Originals stay on disk for rescoring when quantized
+                        on_disk=quantization_config is not None
+                    ),
+                    quantization_config=quantization_config
                 )
                 print(f"Collection '{self.collection_name}' created successfully.")
+                self.ensure_payload_indexes()
                 return True
             except Exception as create_error:
                 print(f"Error creating collection '{self.collection_name}': {create_error}")
                 return False
     
-    def store_documents(self, documents: List[Dict[str, Any]], batch_size: int = 64) -> bool:
+    def ensure_payload_indexes(self) -> None:
+        """Index the product fields used by structured filters (idempotent)."""
+        if self.collection_name == config.FAQ_COLLECTION:
+            return
+        for field_name, schema in PRODUCT_PAYLOAD_INDEXES.items():
+            try:
+                self.client.create_payload_index(
+                    collection_name=self.collection_name,
+                    field_name=field_name,
+                    field_schema=models.PayloadSchemaType(schema)
+                )
+            except Exception as e:
+                print(f"Error creating payload index '{field_name}': {e}")
+    
+    def point_id(self, doc: Dict[str, Any]) -> str:
+        """
+        Derive a stable point id: products are keyed by their URL, other
+        documents (e.g. FAQs) by their content.
+        """
+        key = (doc.get('metadata') or {}).get('product_url') or doc['content']
+        return str(uuid.uuid5(uuid.NAMESPACE_URL, key))
+    
+    @staticmethod
+    def content_hash(value: Any) -> str:
+        if not isinstance(value, str):
+            value = json.dumps(value, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(value.encode('utf-8')).hexdigest()
+    
+    def _make_payload(self, doc: Dict[str, Any]) -> dict:
+        metadata = doc.get('metadata', {})
+        return {
+            'content': doc['content'],
+            'metadata': metadata,
+            'content_hash': self.content_hash(doc['content']),
+            'metadata_hash': self.content_hash(metadata)
+        }
+    
+    def _make_point(self, doc: Dict[str, Any], embedding: List[float]) -> models.PointStruct:
+        return models.PointStruct(
+            id=self.point_id(doc),
+            vector=embedding,
+            payload=self._make_payload(doc)
+        )
+    
+    def store_documents(self, documents: List[Dict[str, Any]], batch_size: int = 64, num_workers: Optional[int] = None) -> bool:
         try:
             if not self.create_collection():
                 return False
             
-            points = []
-            for doc in documents:
-                embedding = self.embedding_model.embed_query(doc['content'])
-                
-                point = models.PointStruct(
-                    id=str(uuid.uuid4()),
-                    vector=embedding,
-                    payload={
-                        'content': doc['content'],
-                        'metadata': doc.get('metadata', {})
-                    }
-                )
-                points.append(point)
+            if num_workers is None:
+                num_workers = config.EMBEDDING_WORKERS
             
-            for i in range(0, len(points), batch_size):
-                batch = points[i:i + batch_size]
-                self.client.upsert(
-                    collection_name=self.collection_name,
-                    points=batch
-                )
-                print(f"✅ Inserted batch {i // batch_size + 1}/{(len(points) - 1) // batch_size + 1}")
+            pipeline = IngestionPipeline(
+                client=self.client,
+                collection_name=self.collection_name,
+                embedding_model=self.embedding_model,
+                batch_size=batch_size,
+                num_workers=num_workers,
+                queue_size=config.UPSERT_QUEUE_SIZE
+            )
+            pipeline.run(documents, self._make_point)
+            self._flush_backend()
+            self.build_lexical_index()
             
             print(f"Successfully stored {len(documents)} documents in '{self.collection_name}' collection.")
             return True
@@ -174,18 +309,256 @@ class VectorStore:
             print(f"Error storing documents: {e}")
             return False
     
-    def search(self, query: str, limit: int = 10) -> List[models.ScoredPoint]:
+    def _flush_backend(self) -> None:
+        # The local backend buffers writes in memory; Qdrant persists on its own
+        flush = getattr(self.client, 'flush', None)
+        if flush is not None:
+            flush()
+    
+    @property
+    def lexical_index_path(self) -> str:
+        return os.path.join(config.LEXICAL_INDEX_PATH, f"{self.collection_name}.json")
+    
+    def build_lexical_index(self, page_size: int = 256) -> BM25Index:
+        """Build the BM25 index from the collection's payloads and save it next to the vector index."""
+        documents = []
+        offset = None
+        while True:
+            records, offset = self.client.scroll(
+                collection_name=self.collection_name,
+                limit=page_size,
+                offset=offset,
+                with_payload=['content'],
+                with_vectors=False
+            )
+            documents.extend((str(record.id), (record.payload or {}).get('content', '')) for record in records)
+            if offset is None:
+                break
+        
+        index = BM25Index().build(documents)
+        index.save(self.lexical_index_path)
+        self._lexical_index = index
+        self._lexical_index_mtime = os.path.getmtime(self.lexical_index_path)
+        print(f"Lexical index for '{self.collection_name}' built with {len(index)} documents.")
+        return index
+    
+    @property
+    def lexical_index(self) -> BM25Index:
+        """The BM25 index, reloaded when another process has rebuilt it."""
+        path = self.lexical_index_path
         try:
-            query_embedding = self.embedding_model.embed_query(query)
-            
-            search_result = self.client.query_points(
+            mtime = os.path.getmtime(path)
+        except OSError:
+            return self._lexical_index if self._lexical_index is not None else self.build_lexical_index()
+        if self._lexical_index is None or mtime != self._lexical_index_mtime:
+            self._lexical_index = BM25Index.load(path)
+            self._lexical_index_mtime = mtime
+        return self._lexical_index
+    
+    def lexical_search(self, query: str, limit: int = 10,
+                       query_filter: Optional[models.Filter] = None) -> List[models.ScoredPoint]:
+        """BM25 search returning scored points with payloads, like search()."""
+        try:
+            with record_stage("lexical_query"):
+                hits = self._lexical_hits(query, limit, query_filter)
+                if not hits:
+                    return []
+                records = self.client.retrieve(
+                    collection_name=self.collection_name,
+                    ids=[point_id for point_id, _ in hits],
+                    with_payload=True
+                )
+                return self._lexical_points(hits, records, limit, query_filter)
+        except Exception as e:
+            print(f"Error performing lexical search: {e}")
+            return []
+    
+    async def alexical_search(self, query: str, limit: int = 10,
+                              query_filter: Optional[models.Filter] = None) -> List[models.ScoredPoint]:
+        """Async lexical_search; BM25 scoring is cheap, only payload retrieval is awaited."""
+        try:
+            with record_stage("lexical_query"):
+                hits = self._lexical_hits(query, limit, query_filter)
+                if not hits:
+                    return []
+                records = await self._acall(
+                    'retrieve',
+                    collection_name=self.collection_name,
+                    ids=[point_id for point_id, _ in hits],
+                    with_payload=True
+                )
+                return self._lexical_points(hits, records, limit, query_filter)
+        except Exception as e:
+            print(f"Error performing lexical search: {e}")
+            return []
+    
+    def _lexical_hits(self, query: str, limit: int,
+                      query_filter: Optional[models.Filter]) -> List[Tuple[str, float]]:
+        # Over-fetch when filtering since the BM25 index holds no payloads
+        return self.lexical_index.search(query, limit * 4 if query_filter is not None else limit)
+    
+    def _lexical_points(self, hits: List[Tuple[str, float]], records: list, limit: int,
+                        query_filter: Optional[models.Filter]) -> List[models.ScoredPoint]:
+        payloads = {str(record.id): record.payload for record in records}
+        return [
+            models.ScoredPoint(id=point_id, version=0, score=score, payload=payloads[point_id])
+            for point_id, score in hits
+            if point_id in payloads and matches_filter(payloads[point_id], query_filter)
+        ][:limit]
+    
+    def fetch_indexed_hashes(self, page_size: int = 256) -> Dict[str, Dict[str, Any]]:
+        """Return {point_id: {'content_hash': ..., 'metadata_hash': ...}} for the whole collection."""
+        indexed = {}
+        offset = None
+        while True:
+            records, offset = self.client.scroll(
                 collection_name=self.collection_name,
-                query=query_embedding,
-                limit=limit
+                limit=page_size,
+                offset=offset,
+                with_payload=['content_hash', 'metadata_hash'],
+                with_vectors=False
+            )
+            for record in records:
+                indexed[str(record.id)] = record.payload or {}
+            if offset is None:
+                return indexed
+    
+    def sync_documents(self, documents: List[Dict[str, Any]], batch_size: int = 64) -> bool:
+        """
+        Incrementally re-index: embed only new or changed documents, refresh the
+        payload of documents whose metadata alone changed (e.g. a price update)
+        and delete points that no longer have a source document.
+        """
+        try:
+            if not self.create_collection():
+                return False
+            
+            indexed = self.fetch_indexed_hashes()
+            
+            # Later duplicates of the same id win, matching upsert semantics
+            wanted = {self.point_id(doc): doc for doc in documents}
+            
+            to_embed, to_refresh, unchanged = [], [], 0
+            for point_id, doc in wanted.items():
+                payload = self._make_payload(doc)
+                existing = indexed.get(point_id)
+                if existing is None or existing.get('content_hash') != payload['content_hash']:
+                    to_embed.append(doc)
+                elif existing.get('metadata_hash') != payload['metadata_hash']:
+                    to_refresh.append((point_id, payload))
+                else:
+                    unchanged += 1
+            
+            to_delete = [point_id for point_id in indexed if point_id not in wanted]
+            
+            if to_embed:
+                pipeline = IngestionPipeline(
+                    client=self.client,
+                    collection_name=self.collection_name,
+                    embedding_model=self.embedding_model,
+                    batch_size=batch_size,
+                    num_workers=config.EMBEDDING_WORKERS,
+                    queue_size=config.UPSERT_QUEUE_SIZE
+                )
+                pipeline.run(to_embed, self._make_point)
+            
+            for i in range(0, len(to_refresh), batch_size):
+                self.client.batch_update_points(
+                    collection_name=self.collection_name,
+                    update_operations=[
+                        models.OverwritePayloadOperation(
+                            overwrite_payload=models.SetPayload(payload=payload, points=[point_id])
+                        )
+                        for point_id, payload in to_refresh[i:i + batch_size]
+                    ]
+                )
+            
+            for i in range(0, len(to_delete), batch_size):
+                self.client.delete(
+                    collection_name=self.collection_name,
+                    points_selector=models.PointIdsList(points=to_delete[i:i + batch_size])
+                )
+            
+            self._flush_backend()
+            if to_embed or to_delete or self._lexical_index is None:
+                self.build_lexical_index()
+            
+            print(f"Sync summary for '{self.collection_name}': "
+                  f"{len(to_embed)} changed (re-embedded), {len(to_refresh)} metadata-only updates, "
+                  f"{unchanged} unchanged, {len(to_delete)} deleted")
+            return True
+            
+        except Exception as e:
+            print(f"Error syncing documents: {e}")
+            return False
+    
+    def search_params(self) -> Optional[models.SearchParams]:
+        """Oversample quantized candidates and rescore them with the original vectors."""
+        if config.QUANTIZATION == "none":
+            return None
+        return models.SearchParams(
+            quantization=models.QuantizationSearchParams(
+                rescore=True,
+                oversampling=config.QUANTIZATION_OVERSAMPLING
             )
+        )
+    
+    def search(self, query: str, limit: int = 10,
+               query_filter: Optional[models.Filter] = None) -> List[models.ScoredPoint]:
+        try:
+            with record_stage("embed"):
+                query_embedding = self.embedding_model.embed_query(query)
+            
+            with record_stage("vector_query"):
+                search_result = self.client.query_points(
+                    collection_name=self.collection_name,
+                    query=query_embedding,
+                    query_filter=query_filter,
+                    limit=limit,
+                    search_params=self.search_params()
+                )
+            
+            return search_result.points
+            
+        except Exception as e:
+            print(f"Error performing search: {e}")
+            return []
+    
+    @property
+    def async_client(self):
+        """AsyncQdrantClient for the remote backend, created on first async call (None otherwise)."""
+        if self._async_client is None and self._use_async_client:
+            self._async_client = create_async_vector_client(self.qdrant_url, self.qdrant_api_key)
+            # The local backend has no async client; don't try again
+            self._use_async_client = self._async_client is not None
+        return self._async_client
+    
+    async def _acall(self, method: str, **kwargs):
+        """Call a client method without blocking the event loop."""
+        client = self.async_client
+        if client is not None:
+            return await getattr(client, method)(**kwargs)
+        return await asyncio.to_thread(getattr(self.client, method), **kwargs)
+    
+    async def asearch(self, query: str, limit: int = 10,
+                      query_filter: Optional[models.Filter] = None) -> List[models.ScoredPoint]:
+        """Async search: the query is embedded on the model executor and Qdrant is awaited."""
+        try:
+            with record_stage("embed"):
+                query_embedding = await self.embedding_model.aembed_query(query)
+            
+            with record_stage("vector_query"):
+                search_result = await self._acall(
+                    'query_points',
+                    collection_name=self.collection_name,
+                    query=query_embedding,
+                    query_filter=query_filter,
+                    limit=limit,
+                    search_params=self.search_params()
+                )
             
             return search_result.points
             
         except Exception as e:
             print(f"Error performing search: {e}")
-            return []
\ No newline at end of file
+            return []
@@ -0,0 +1,62 @@
+import unittest
+
+from src.vector_db.query_filters import OFFERS_CATEGORY, extract_filters, matches_filter, to_qdrant_filter
+
+
+def product(category, sub_category=None):
+    return {"metadata": {"category": category, "sub_category": sub_category}}
+
+
+class ExtractFiltersTest(unittest.TestCase):
+
+    def test_colors_with_clitic_prefixes(self):
+        for query, color in [
+            ("بنطلون بالاسود", "black"),
+            ("تيشيرت والاحمر", "red"),
+            ("قميص فالابيض", "white"),
+            ("وبالازرق", "blue"),
+            ("للاخضر", "green"),
+            ("البني", "brown"),
+        ]:
+            with self.subTest(query=query):
+                self.assertEqual(extract_filters(query).colors, [color])
+
+    def test_categories_with_clitic_prefixes(self):
+        for query, category in [
+            ("بالبنطلون", "بنطلون"),
+            ("والقميص", "قميص"),
+            ("للتيشيرت", "تيشيرت"),
+            ("جينز وتيشيرت", "تيشيرت"),
+        ]:
+            with self.subTest(query=query):
+                self.assertIn(category, extract_filters(query).categories)
+
+    def test_sub_category(self):
+        filters = extract_filters("عايز جينز اقل من 500")
+        self.assertEqual(filters.categories, ["بنطلون"])
+        self.assertEqual(filters.sub_categories, ["بنطلون جينز"])
+        self.assertEqual(filters.max_price, 500.0)
+
+
+class CategoryFilterTest(unittest.TestCase):
+
+    def test_sub_category_narrows_its_category(self):
+        query_filter = to_qdrant_filter(extract_filters("jeans"))
+        self.assertTrue(matches_filter(product("بنطلون", "بنطلون جينز"), query_filter))
+        self.assertFalse(matches_filter(product("بنطلون", "شروال"), query_filter))
+        self.assertTrue(matches_filter(product(OFFERS_CATEGORY), query_filter))
+
+    def test_other_categories_match_as_a_whole(self):
+        query_filter = to_qdrant_filter(extract_filters("jeans and a tshirt"))
+        self.assertTrue(matches_filter(product("تيشيرت", "بولو"), query_filter))
+        self.assertFalse(matches_filter(product("بنطلون", "كارجو"), query_filter))
+        self.assertFalse(matches_filter(product("قميص", "قميص"), query_filter))
+
+    def test_category_without_sub_category(self):
+        query_filter = to_qdrant_filter(extract_filters("pants"))
+        self.assertTrue(matches_filter(product("بنطلون", "كارجو"), query_filter))
+        self.assertFalse(matches_filter(product("تيشيرت", "بولو"), query_filter))
+
+
+if __name__ == "__main__":
+    unittest.main()